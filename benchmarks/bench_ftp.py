@@ -0,0 +1,74 @@
+"""Benchmark the uploads with and without the ftp connections pool.
+
+A local ftp stand-in server simulates the network latency of the login and
+of the directory commands. The same files are uploaded opening a new login
+for each file, like the tool used to do, and then with the FtpPool.
+
+Usage:
+    PYTHONPATH=src:. python benchmarks/bench_ftp.py [files] [size_kb]
+"""
+import io
+import sys
+import time
+import ftplib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from podcasttool.ftp_pool import FtpPool
+from tests.ftp_server import FtpStandIn
+
+LOGIN_DELAY = 0.15
+COMMAND_DELAY = 0.02
+
+
+def upload_login_each(server, files):
+    """Upload every file with its own ftp login."""
+    def upload(name_data):
+        name, data = name_data
+        with ftplib.FTP() as ftp:
+            ftp.connect('127.0.0.1', server.port)
+            ftp.login('user', 'password')
+            ftp.cwd('/')
+            ftp.storbinary(f'STOR {name}', io.BytesIO(data))
+
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(upload, files))
+
+
+def upload_pool(server, files):
+    """Upload every file with the connections of the pool."""
+    pool = FtpPool('127.0.0.1', 'user', 'password', port=server.port)
+
+    def upload(name_data):
+        name, data = name_data
+        with pool.connection() as ftp:
+            ftp.cwd('/')
+            ftp.storbinary(f'STOR {name}', io.BytesIO(data))
+
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(upload, files))
+    pool.close()
+
+
+def main(n_files, size_kb):
+    """Print the time and number of logins of both upload methods."""
+    files = [(f'part_{i}.mp3', bytes(size_kb * 1024)) for i in range(n_files)]
+    total_mb = n_files * size_kb / 1024
+
+    print(f'{n_files} files of {size_kb}Kb, login delay {LOGIN_DELAY}s')
+    print(f"{'method':>12} {'time (s)':>9} {'logins':>7} {'MB/s':>7}")
+    for name, method in (('login each', upload_login_each),
+                         ('pool', upload_pool)):
+        with tempfile.TemporaryDirectory() as root:
+            with FtpStandIn(root, login_delay=LOGIN_DELAY,
+                            command_delay=COMMAND_DELAY) as server:
+                start = time.perf_counter()
+                method(server, files)
+                elapsed = time.perf_counter() - start
+                print(f'{name:>12} {elapsed:>9.3f} {server.logins:>7} '
+                      f'{total_mb / elapsed:>7.2f}')
+
+
+if __name__ == '__main__':
+    ARGS = [int(arg) for arg in sys.argv[1:]]
+    main(*(ARGS + [40, 256][len(ARGS):]))
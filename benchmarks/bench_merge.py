@@ -0,0 +1,77 @@
+"""Benchmark the final podcast concatenation.
+
+Compare the old `+=` merge against `audio.stream_segments()`, that feeds the
+encoder, while the number of cuts and the length of the recording grow. The
+audio is synthetic so ffmpeg is not needed.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_merge.py [minutes ...]
+"""
+import sys
+import time
+
+import pydub
+
+from podcasttool import audio
+
+FRAME_RATE = 22050
+INTRO_CLIPS = 13
+INTRO_MS = 1500
+WATERMARK_MS = 3000
+
+
+def silence(ms_time):
+    """Create a mono 16bit audio segment of ms_time milliseconds."""
+    frames = FRAME_RATE * ms_time // 1000
+    return pydub.AudioSegment(data=bytes(frames * 2), sample_width=2,
+                              frame_rate=FRAME_RATE, channels=1)
+
+
+def podcast_pieces(minutes, cuts):
+    """Create the list of audio pieces of a podcast part like the tool does."""
+    pieces = [silence(INTRO_MS) for _ in range(INTRO_CLIPS)]
+    watermark = silence(WATERMARK_MS)
+    segment = silence(minutes * 60_000 // cuts)
+    for _ in range(cuts):
+        pieces.append(segment)
+        pieces.append(watermark)
+    return pieces
+
+
+def merge_append(pieces):
+    """Old merge: append each piece to the growing segment."""
+    podcast_segment = pydub.AudioSegment.empty()
+    for sound in pieces:
+        podcast_segment += sound
+    return len(podcast_segment.raw_data)
+
+
+def merge_stream(pieces):
+    """Stream the pieces in the common format, like the encoder reads them."""
+    chunks = audio.stream_segments(pieces, *audio.common_format(pieces))
+    return sum(len(chunk) for chunk in chunks)
+
+
+def timeit(func, pieces):
+    """Return the seconds taken by func and the bytes of its audio."""
+    start = time.perf_counter()
+    result = func(pieces)
+    return time.perf_counter() - start, result
+
+
+def main(lengths):
+    """Print a table with the merge times of both methods."""
+    print(f"{'minutes':>8} {'cuts':>5} {'+= (s)':>9} "
+          f"{'stream (s)':>16} {'speedup':>8}")
+    for minutes in lengths:
+        for cuts in (3, 5, 9):
+            pieces = podcast_pieces(minutes, cuts)
+            old_time, old_len = timeit(merge_append, pieces)
+            new_time, new_len = timeit(merge_stream, pieces)
+            assert old_len == new_len
+            print(f"{minutes:>8} {cuts:>5} {old_time:>9.3f} "
+                  f"{new_time:>16.3f} {old_time / new_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10, 30, 60])
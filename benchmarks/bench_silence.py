@@ -0,0 +1,98 @@
+"""Benchmark the silence analysis of the cuts.
+
+A synthetic 44.1kHz 16bit stereo recording is written in a temporary folder:
+noise like speech with a short pause every few seconds. Then:
+
+    - snap: `silence.snap_cuts()` over the whole recording, compared with
+      `silence.TIME_BUDGET`. The first run reads the file from disk, the
+      next ones from the page cache.
+    - pydub: `pydub.silence.detect_silence()` over the first minute,
+      extrapolated to the whole recording.
+
+A 3 hours recording needs 1.9GB of disk space.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_silence.py [minutes]
+"""
+import os
+import sys
+import time
+import wave
+import tempfile
+import statistics
+
+import numpy
+
+from podcasttool import audio
+from podcasttool import silence
+
+FRAME_RATE = 44100
+CUTS = 8
+BUDGET_MINUTES = 180
+
+
+def write_recording(path, minutes):
+    """Write the synthetic recording a minute at a time."""
+    random = numpy.random.default_rng(0)
+    frames = FRAME_RATE * 60
+    with wave.open(path, 'wb') as wave_file:
+        wave_file.setnchannels(2)
+        wave_file.setsampwidth(2)
+        wave_file.setframerate(FRAME_RATE)
+        for _ in range(minutes):
+            samples = random.integers(-8000, 8000, (frames, 2),
+                                      dtype=numpy.int16)
+            # a pause of 300ms every 7 seconds
+            for start in range(0, frames, 7 * FRAME_RATE):
+                samples[start:start + FRAME_RATE * 3 // 10] = 0
+            wave_file.writeframes(samples.tobytes())
+
+
+def snap_time(path, minutes):
+    """Return the seconds taken to snap the cuts of the recording."""
+    total_ms = minutes * 60_000
+    ranges = audio.cut_ranges(total_ms, FRAME_RATE, -(-total_ms // CUTS))
+    start = time.perf_counter()
+    silence.snap_cuts(path, ranges)
+    return time.perf_counter() - start
+
+
+def pydub_time(path, minutes):
+    """Return the seconds pydub would take for the whole recording."""
+    import pydub
+    import pydub.silence
+
+    with wave.open(path, 'rb') as reader:
+        data = reader.readframes(FRAME_RATE * 60)
+    minute = pydub.AudioSegment(data=data, sample_width=2,
+                                frame_rate=FRAME_RATE, channels=2)
+    start = time.perf_counter()
+    pydub.silence.detect_silence(minute, min_silence_len=silence.WINDOW_MS,
+                                 silence_thresh=-40)
+    return (time.perf_counter() - start) * minutes
+
+
+def main(minutes):
+    """Run the benchmark and return the exit status."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'recording.wav')
+        print(f'writing {minutes} minutes recording...')
+        write_recording(path, minutes)
+        size = os.path.getsize(path) / 1024 / 1024
+
+        cold = snap_time(path, minutes)
+        warm = statistics.median(snap_time(path, minutes) for _ in range(3))
+        print(f'snap {CUTS} cuts of {size:.0f}MB: first {cold:.2f}s, '
+              f'cached {warm:.2f}s')
+        print(f'pydub detect_silence (estimated): '
+              f'{pydub_time(path, minutes):.0f}s')
+
+    # the budget is for 3 hours, scale it for shorter recordings
+    budget = silence.TIME_BUDGET * minutes / BUDGET_MINUTES
+    on_target = warm <= budget
+    print(f'budget {budget:.2f}s: {"ok" if on_target else "OVER BUDGET"}')
+    return 0 if on_target else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MINUTES))
@@ -0,0 +1,96 @@
+"""Benchmark the gui startup time.
+
+Each measure runs in a new python process, like when the app is launched:
+
+    - import: total `python -X importtime` time of `podcasttool.gui_launch`
+      and the modules that take longer to import.
+    - first paint: from the first import until the main window has been
+      drawn for the first time. Needs a display, so it is skipped without one.
+
+The first run of each measure is discarded so the bytecode cache is warm.
+The script exits with an error if the median is over the target.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_startup.py [runs]
+"""
+import os
+import sys
+import statistics
+import subprocess
+
+TARGET_IMPORT_MS = 120
+TARGET_FIRST_PAINT_MS = 400
+
+FIRST_PAINT = """
+import time
+start = time.perf_counter()
+from podcasttool import gui_launch
+app = gui_launch.MainPage()
+app.update()
+print((time.perf_counter() - start) * 1000)
+app.destroy()
+"""
+
+
+def _run(args):
+    """Run python in a new process with the bytecode cache enabled."""
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return subprocess.run([sys.executable, *args], env=env, check=True,
+                          capture_output=True, text=True)
+
+
+def import_times():
+    """Return total import time and cumulative time of each module in ms."""
+    output = _run(['-X', 'importtime', '-c',
+                   'import podcasttool.gui_launch']).stderr
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        modules[name.strip()] = int(cumulative) / 1000
+    return modules['podcasttool.gui_launch'], modules
+
+
+def first_paint_time():
+    """Return the ms from the first import to the first window paint."""
+    return float(_run(['-c', FIRST_PAINT]).stdout.strip())
+
+
+def report(name, times, target):
+    """Print the median of the times and return True if it is on target."""
+    median = statistics.median(times)
+    status = 'ok' if median <= target else 'OVER TARGET'
+    print(f'{name:>12}: median {median:7.1f}ms '
+          f'(min {min(times):.1f}ms, target {target}ms) {status}')
+    return median <= target
+
+
+def main(runs):
+    """Run the benchmarks and return the exit status."""
+    import_times()
+    results = [import_times() for _ in range(runs)]
+    on_target = report('import', [total for total, _ in results],
+                       TARGET_IMPORT_MS)
+
+    _, modules = results[-1]
+    print('slowest top level imports:')
+    top_level = {name: time for name, time in modules.items()
+                 if '.' not in name or name.startswith('podcasttool')}
+    for name, time in sorted(top_level.items(), key=lambda item: item[1],
+                             reverse=True)[:10]:
+        print(f'{time:10.1f}ms  {name}')
+
+    if not os.environ.get('DISPLAY') and sys.platform.startswith('linux'):
+        print('first paint: skipped, no display')
+    else:
+        first_paint_time()
+        on_target &= report('first paint',
+                            [first_paint_time() for _ in range(runs)],
+                            TARGET_FIRST_PAINT_MS)
+    return 0 if on_target else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
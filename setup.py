@@ -21,4 +21,8 @@ setup(
     data_files=DATA_FILES,
     options={'py2app': OPTIONS},
     setup_requires=['py2app'],
+    # pydub resamples with audioop, out of the standard library since 3.13
+    install_requires=['audioop-lts; python_version >= "3.13"'],
+    # snap the cuts to silence and merge the parts in numpy arrays
+    extras_require={'numpy': ['numpy']},
 )
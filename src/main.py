@@ -1,63 +1,109 @@
 """."""
 import os
+import sys
+import time
 import pathlib
 import logging
-import concurrent.futures
+import argparse
+import multiprocessing
 
-from podcasttool import gui_launch
+from podcasttool.journal import Journal, journal_path
+from podcasttool.podcasttools import RENDER_MODES
 from podcasttool import (
+    util,
     PodcastFile,
+    format_plan,
     generate_html,
-    upload_to_server,
-    check_server_path
+    check_dependencies,
+    check_server_paths,
+    generate_and_upload
 )
 
 LOGGER = logging.getLogger('podcast_tool.main')
 
 
-def run_cli(path, test_env=False):
+def ask_user(message):
+    """Ask a yes or no question on the terminal."""
+    return input(f"{message} y/n\n> ").strip().lower() == "y"
+
+
+def show_progress(progress):
+    """Print the upload progress of a file on the same terminal line."""
+    print(f"\r{progress}", end="", flush=True)
+    if progress.sent == progress.total:
+        print()
+
+
+def run_cli(path, test_env=False, resume=False):
     """Run PodcastTool from command line.
 
+    The parts are generated one at a time and each one is uploaded while the
+    next is generating.
+
     Arguments:
         path {str} - path where to parse for podcast files.
         test_env {bool} - if True then uploads to test folder in server {default: False}.
+        resume {bool} - if True resume the previous run of the folder {default: False}.
     """
-    path = pathlib.Path(path).iterdir()
-    for file in sorted(path):
-        if file.name.endswith('.wav'):
-
-            podcast = PodcastFile(file)
-            podcast.generate_podcast()
+    multi_processing(path, test_env, workers=1, resume=resume)
 
-    for file in podcast.files_to_upload():
-        server_path = check_server_path(file["server_path"], test_env)
-        upload_to_server(file["path"], server_path)
 
-    generate_html(podcast.html_page)
+def multi_processing(path, test_env=False, workers=None, resume=False,
+                     **options):
+    """Run PodcastTool from command line with a pool of processes.
 
-
-def multi_threading(path, test_env=False):
-    """Run PodcastTool from command line in multi threading.
+    The completed stages of every part are recorded in a journal inside the
+    folder, so an interrupted run can be resumed without redoing them.
 
     Arguments:
         path {str} - path where to parse for podcast files.
         test_env {bool} - if True then uploads to test folder in server {default: False}.
+        workers {int} - how many parts to generate at once {default: cpu number}.
+        resume {bool} - if True resume the previous run of the folder {default: False}.
+        options - keyword arguments passed to generate_podcast().
     """
-    path = pathlib.Path(path).glob("*.wav")
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        for file in sorted(path):
-            f1 = executor.submit(PodcastFile, file)
-            podcast = f1.result()
-            executor.submit(podcast.generate_podcast)
+    journal = Journal(journal_path(path), resume)
+    files = sorted(pathlib.Path(path).glob("*.wav"))
+    server_paths = check_server_paths(files, test_env, ask=ask_user,
+                                      notify=print)
+
+    # the html page is planned from the wave headers, before encoding
+    html_pages = PodcastFile.plan_html(files, options.get('num_cuts'),
+                                       journal, options.get('renditions'),
+                                       options.get('hls', False))
+    for archive_name, html_page in html_pages.items():
+        if not journal.done(archive_name, 'html'):
+            generate_html(html_page, test_env)
+            journal.record(archive_name, 'html')
 
-    check_path = list(podcast.files_to_upload())[0]["server_path"]
-    server_path = check_server_path(check_path, test_env)
+    generate_and_upload(files, server_paths, workers=workers,
+                        progress=show_progress, journal=journal, **options)
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        for file in podcast.files_to_upload():
-            executor.submit(upload_to_server, file["path"], server_path)
 
-    generate_html(podcast.html_page)
+def plan(path, bitrate='64k', num_cuts=None, snap_silence=False):
+    """Print the plan of every part without generating anything.
+
+    Only the wave headers, the catalog and the library manifest are read, so
+    a full directory is checked in a moment.
+
+    Arguments:
+        path {str} - path where to parse for podcast files.
+        bitrate {str} - bitrate used to predict the mp3 size {default: 64k}.
+        num_cuts {int} - how many cuts in audio {default: automatic}.
+        snap_silence {bool} - move the cuts to the silence, reading the
+                              frames of every wave {default: False}.
+    """
+    start = time.perf_counter()
+    files = sorted(pathlib.Path(path).glob("*.wav"))
+    total_size = 0
+    for file in files:
+        summary = PodcastFile(str(file)).plan_summary(bitrate, num_cuts,
+                                                      snap_silence)
+        total_size += summary['size']
+        print(format_plan(summary))
+
+    print(f"{len(files)} parts, {total_size / 1024 / 1024:.1f}MB "
+          f"planned in {time.perf_counter() - start:.3f}s")
 
 
 def class_test():
@@ -71,8 +117,62 @@ def class_test():
     print(files)
 
 
+def parse_args(args=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Generate and upload the podcasts of a lesson folder.")
+    parser.add_argument("path", nargs="?",
+                        help="folder with the wav files. "
+                             "Without it the gui is started.")
+    parser.add_argument("--plan", action="store_true",
+                        help="print the plan of each part and exit")
+    parser.add_argument("--bitrate", default="64k",
+                        help="mp3 bitrate (default: 64k)")
+    parser.add_argument("--cuts", type=int, dest="num_cuts",
+                        help="how many cuts in audio (default: automatic)")
+    parser.add_argument("--snap-silence", action="store_true",
+                        help="move each cut to the nearest silence")
+    parser.add_argument("--mono", action="store_true",
+                        help="downmix the podcast to mono")
+    parser.add_argument("--rendition", action="append", dest="renditions",
+                        type=util.parse_rendition, default=[],
+                        metavar="BITRATE/SAMPLE_RATE",
+                        help="also export each part with this bitrate and "
+                             "sample rate, e.g. 128k/44100. Can be repeated")
+    parser.add_argument("--hls", action="store_true",
+                        help="write each part as HLS segments and playlist "
+                             "instead of a single mp3")
+    parser.add_argument("--render", choices=RENDER_MODES, default="pydub",
+                        help="how to render each part: pydub, a single "
+                             "ffmpeg process, splice with the encoded "
+                             "clips or numpy arrays (default: pydub)")
+    parser.add_argument("--workers", type=int,
+                        help="how many parts to generate at once")
+    parser.add_argument("--test-env", action="store_true",
+                        help="upload to the test folder on the server")
+    parser.add_argument("--resume", action="store_true",
+                        help="resume the interrupted run of the folder")
+    return parser.parse_args(args)
+
+
 if __name__ == '__main__':
     # class_test()
-    # run_cli()
-    # multi_threading(os.environ["TEST_DIR"])
-    gui_launch.run()
+    # the pool workers of a frozen executable start from this script
+    multiprocessing.freeze_support()
+    ARGS = parse_args()
+    if not ARGS.path:
+        from podcasttool import gui_launch
+        gui_launch.run()
+    elif ARGS.plan:
+        plan(ARGS.path, ARGS.bitrate, ARGS.num_cuts, ARGS.snap_silence)
+    else:
+        try:
+            util.load_credentials()
+        except FileNotFoundError as error:
+            sys.exit(str(error))
+        check_dependencies()
+        multi_processing(ARGS.path, ARGS.test_env, ARGS.workers, ARGS.resume,
+                         bitrate=ARGS.bitrate, num_cuts=ARGS.num_cuts,
+                         render=ARGS.render, snap_silence=ARGS.snap_silence,
+                         mono=ARGS.mono, renditions=ARGS.renditions,
+                         hls=ARGS.hls)
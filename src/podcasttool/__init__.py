@@ -1,26 +1,24 @@
 import sys
+import shutil
 import platform
 import subprocess
 
-from textwrap import dedent
 from datetime import datetime
-from tkinter import messagebox, TkVersion
 
 from . import logger
 from . import util
 from . import podcasttools
 from .podcasttools import (
     PodcastFile,
+    LessonPage,
+    format_plan,
     generate_html,
     upload_to_server,
-    check_server_path
+    check_server_path,
+    check_server_paths,
+    generate_and_upload
 )
 
-if TkVersion <= 8.5:
-    messagebox.showinfo(message=f"your tcl-tk version {TkVersion} has some serious bugs!"
-                        "please update to the last version: 8.6")
-    sys.exit("tk version is old")
-
 
 if platform.system() == 'Darwin':
     OS_SYSTEM = 'Mac'
@@ -36,19 +34,11 @@ def open_link(link):
         subprocess.run(['xdg-open', link])
 
 
-def open_log(msg, title="Error", icon="warning"):
-    """If fatal error ask user if wants to open log file."""
-    user = messagebox.askyesno(title=title, message=msg, icon=icon)
-    if user:
-        log_path = util.get_path("log") / "errors.log"
-        open_link(log_path)
-
-
-def write_report():
+def write_report(missing):
     """Write and open log with missing dependencies info status."""
     report_file = "log/dependecies_missing.log"
     with open(report_file, "w") as report:
-        for app in MISSING_DEPENDECIES:
+        for app in missing:
             now = datetime.today().strftime("%x_%X")
             msg = f"{now} - the following packages are required: {app}\n"
             report.write(msg)
@@ -59,19 +49,23 @@ def write_report():
     open_link(report_file)
 
 
-# Check if dependecies are installed. Launching from GUI may not show if
-# they are missing so custom msg is needed.
-DEPENDECIES = ["ffmpeg"]
-MISSING_DEPENDECIES = []
+def check_dependencies(gui=False):
+    """Check if dependecies are installed otherwise exit.
+
+    Launching from GUI may not show if they are missing so a report is
+    written and opened.
 
-if OS_SYSTEM == "Linux":
-    DEPENDECIES.append("xsel")
-for package in DEPENDECIES:
-    try:
-        subprocess.check_output(["which", package])
-    except Exception as error:
-        MISSING_DEPENDECIES.append(package)
+    Keyword Arguments:
+        gui {bool} - check also the dependencies of the gui and write the
+                     report (default: {False})
+    """
+    dependencies = ["ffmpeg"]
+    if gui and OS_SYSTEM == "Linux":
+        dependencies.append("xsel")
 
-if MISSING_DEPENDECIES:
-    write_report()
-    sys.exit("some dependecies are required")
+    missing = [package for package in dependencies
+               if not shutil.which(package)]
+    if missing:
+        if gui:
+            write_report(missing)
+        sys.exit(f"some dependecies are required: {', '.join(missing)}")
@@ -0,0 +1,330 @@
+"""Low level audio helpers that work directly on the raw audio data.
+
+The split functions never load a whole recording in memory: the wave file is
+read in fixed size blocks of frames so that the memory used stays the same no
+matter how long the podcast registration is.
+"""
+import os
+import wave
+import struct
+import logging
+
+from podcasttool import encoder
+
+LOGGER = logging.getLogger('podcast_tool.audio')
+
+# how many frames to read/write at once. 64k frames of 44.1kHz 16bit stereo
+# audio are 256Kb of memory.
+BLOCK_FRAMES = 65536
+
+# 8bit wave are unsigned, pydub works with signed samples: flipping the sign
+# bit converts between the two.
+SIGNED_8BIT = bytes(range(128, 256)) + bytes(range(128))
+
+
+def data_offset(wav_file: str) -> int:
+    """Get the file offset of the frames of a wave file.
+
+    Used to memory map the frames without reading the file.
+    """
+    with open(wav_file, 'rb') as wav:
+        header = wav.read(12)
+        if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            raise wave.Error(f'not a wave file: {wav_file}')
+        while True:
+            chunk = wav.read(8)
+            if len(chunk) < 8:
+                raise wave.Error(f'data chunk not found: {wav_file}')
+            name, size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+            if name == b'data':
+                return wav.tell()
+            # chunks are aligned to 2 bytes
+            wav.seek(size + size % 2, 1)
+
+
+def cut_ranges(total_ms: int, frame_rate: int, cut_each: int) -> list:
+    """Calculate the frames ranges of each podcast cut.
+
+    The ranges are the same ones that pydub would create when slicing the
+    audio with a step: `podcast[::cut_each]`.
+
+    Arguments:
+        total_ms {int} - lenght of the audio in milliseconds.
+        frame_rate {int} - frame rate of the audio.
+        cut_each {int} - lenght of each cut in milliseconds.
+
+    Returns:
+        [list] - list of tuples with start and end frame of each cut.
+    """
+    def frame_position(ms_time):
+        return int(min(ms_time, total_ms) * frame_rate / 1000)
+
+    return [(frame_position(start), frame_position(start + cut_each))
+            for start in range(0, total_ms, cut_each)]
+
+
+def scale_ranges(ranges: list, frame_rate: int, new_frame_rate: int) -> list:
+    """Convert frames ranges to the frames of another frame rate."""
+    return [(start * new_frame_rate // frame_rate,
+             end * new_frame_rate // frame_rate) for start, end in ranges]
+
+
+def convert_blocks(wav_file: str, frame_rate: int, mono=False,
+                   block_frames=BLOCK_FRAMES):
+    """Stream the frames of a wave file resampled and downmixed.
+
+    The frames are resampled and downmixed by ffmpeg, which filters the
+    frequencies that the new frame rate can't hold. The sample width of the
+    wave is kept.
+
+    Arguments:
+        wav_file {str} - path of the wave file to convert.
+        frame_rate {int} - frame rate of the converted audio.
+
+    Keyword Arguments:
+        mono {bool} - downmix a stereo wave to mono (default: {False})
+        block_frames {int} - frames to convert at once (default: BLOCK_FRAMES)
+
+    Yields:
+        [bytes] - blocks of converted frames, in the format of the wave.
+    """
+    with wave.open(str(wav_file), 'rb') as reader:
+        params = reader.getparams()
+    downmix = mono and params.nchannels == 2
+    if params.framerate == frame_rate and not downmix:
+        yield from _read_blocks(wav_file, block_frames)
+        return
+
+    channels = 1 if downmix else params.nchannels
+    yield from encoder.resample_wav(
+        wav_file, frame_rate, block_frames * channels * params.sampwidth,
+        channels=channels)
+
+
+def convert_wav(wav_file: str, output: str, frame_rate: int, mono=False,
+                block_frames=BLOCK_FRAMES) -> str:
+    """Resample and downmix a wave file by streaming its frames.
+
+    The frames are converted by convert_blocks(). If the wave is already in
+    the requested format, nothing is written.
+
+    Arguments:
+        wav_file {str} - path of the wave file to convert.
+        output {str} - path of the converted wave file.
+        frame_rate {int} - frame rate of the converted audio.
+
+    Keyword Arguments:
+        mono {bool} - downmix a stereo wave to mono (default: {False})
+        block_frames {int} - frames to convert at once (default: BLOCK_FRAMES)
+
+    Returns:
+        [str] - the path of the wave in the requested format: output or
+                wav_file if it needed no conversion.
+    """
+    with wave.open(str(wav_file), 'rb') as reader:
+        params = reader.getparams()
+    downmix = mono and params.nchannels == 2
+    if params.framerate == frame_rate and not downmix:
+        return wav_file
+
+    channels = 1 if downmix else params.nchannels
+    LOGGER.debug('converting %dHz %d channels into %dHz %d channels: %s',
+                 params.framerate, params.nchannels, frame_rate, channels,
+                 os.path.basename(output))
+
+    with wave.open(str(output), 'wb') as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(params.sampwidth)
+        writer.setframerate(frame_rate)
+        for block in convert_blocks(wav_file, frame_rate, mono,
+                                    block_frames):
+            writer.writeframes(block)
+
+    return output
+
+
+def _read_blocks(wav_file: str, block_frames: int):
+    """Read the frames of a wave file in blocks."""
+    with wave.open(str(wav_file), 'rb') as reader:
+        while True:
+            block = reader.readframes(block_frames)
+            if not block:
+                break
+            yield block
+
+
+def read_cuts(blocks, ranges: list, frame_size: int):
+    """Cut a stream of frames into ranges.
+
+    Only a cut and a block are in memory at once. The ranges must be in
+    order and must not overlap, like the ones of cut_ranges().
+
+    Arguments:
+        blocks {iterable} - blocks of whole frames.
+        ranges {list} - list of (start, end) frames of each cut.
+        frame_size {int} - bytes of each frame.
+
+    Yields:
+        [bytes] - the frames of each cut. The last ones are shorter if the
+                  stream ends before them.
+    """
+    blocks = iter(blocks)
+    buffer = bytearray()
+    # the frame at the start of the buffer
+    position = 0
+    for start, end in ranges:
+        needed = (end - position) * frame_size
+        while len(buffer) < needed:
+            block = next(blocks, None)
+            if block is None:
+                break
+            buffer += block
+        yield bytes(buffer[(start - position) * frame_size:needed])
+        del buffer[:needed]
+        position = end
+
+
+def read_converted(wav_file: str, ranges: list, frame_rate: int,
+                   mono=False):
+    """Read the cuts of a wave file converted on the fly.
+
+    The same audio of convert_wav() followed by read_wav(), without
+    writing the converted wave.
+
+    Arguments:
+        wav_file {str} - path of the wave file to read.
+        ranges {list} - list of (start, end) frames of each cut, in the
+                        frames of the converted audio.
+        frame_rate {int} - frame rate of the converted audio.
+
+    Keyword Arguments:
+        mono {bool} - downmix a stereo wave to mono (default: {False})
+
+    Yields:
+        [AudioSegment] - the audio segment of each cut.
+    """
+    import pydub
+
+    with wave.open(str(wav_file), 'rb') as reader:
+        params = reader.getparams()
+    channels = 1 if mono and params.nchannels == 2 else params.nchannels
+
+    blocks = convert_blocks(wav_file, frame_rate, mono)
+    for data in read_cuts(blocks, ranges, channels * params.sampwidth):
+        if params.sampwidth == 1:
+            data = data.translate(SIGNED_8BIT)
+        yield pydub.AudioSegment(data=data, sample_width=params.sampwidth,
+                                 frame_rate=frame_rate, channels=channels)
+
+
+def split_wav(wav_file: str, ranges: list, export_names: list,
+              block_frames=BLOCK_FRAMES):
+    """Split a wave file into multiple wave files by streaming its frames.
+
+    Arguments:
+        wav_file {str} - path of the wave file to split.
+        ranges {list} - list of (start, end) frames of each cut.
+        export_names {list} - path names of each exported cut.
+
+    Keyword Arguments:
+        block_frames {int} - frames to read at once (default: BLOCK_FRAMES)
+
+    Returns:
+        [list] - the list of the exported files.
+    """
+    with wave.open(str(wav_file), 'rb') as reader:
+        params = reader.getparams()
+        total_frames = params.nframes
+        frame_width = params.sampwidth * params.nchannels
+
+        for (start, end), export_name in zip(ranges, export_names):
+            end = min(end, total_frames)
+            LOGGER.debug('exporting frames %d-%d into: %s',
+                         start, end, os.path.basename(export_name))
+
+            reader.setpos(start)
+            with wave.open(str(export_name), 'wb') as writer:
+                writer.setparams(params)
+
+                remaining = end - start
+                while remaining > 0:
+                    block = reader.readframes(min(block_frames, remaining))
+                    if not block:
+                        break
+                    writer.writeframes(block)
+                    remaining -= len(block) // frame_width
+
+    return export_names
+
+
+def read_wav(wav_file: str, ranges: list):
+    """Read the cuts of a wave file as pydub audio segments.
+
+    The frames are read straight from the wave file without passing from
+    ffmpeg and only one cut at a time is read.
+
+    Arguments:
+        wav_file {str} - path of the wave file to read.
+        ranges {list} - list of (start, end) frames of each cut.
+
+    Yields:
+        [AudioSegment] - the audio segment of each cut.
+    """
+    import pydub
+
+    with wave.open(str(wav_file), 'rb') as reader:
+        params = reader.getparams()
+
+        for start, end in ranges:
+            end = min(end, params.nframes)
+            LOGGER.debug('reading frames %d-%d', start, end)
+
+            reader.setpos(start)
+            data = reader.readframes(end - start)
+            if params.sampwidth == 1:
+                data = data.translate(SIGNED_8BIT)
+
+            yield pydub.AudioSegment(data=data,
+                                     sample_width=params.sampwidth,
+                                     frame_rate=params.framerate,
+                                     channels=params.nchannels)
+
+
+def common_format(segments) -> tuple:
+    """Get the audio format of the concatenation of pydub audio segments.
+
+    Like pydub, it is the highest channels, frame rate and sample width of
+    the segments.
+
+    Returns:
+        [tuple] - the channels, frame rate and sample width.
+    """
+    return (max(segment.channels for segment in segments),
+            max(segment.frame_rate for segment in segments),
+            max(segment.sample_width for segment in segments))
+
+
+def stream_segments(segments, channels: int, frame_rate: int,
+                    sample_width: int):
+    """Convert pydub audio segments to the same format one at a time.
+
+    With the format of common_format(), the audio is in the format of the
+    pydub `+=` merge, but the segments are never joined in a single buffer
+    and never held all together: each one is read and converted only when
+    the next chunk is asked, so it can go straight into the encoder.
+
+    Arguments:
+        segments {iterable} - the pydub audio segments to stream.
+        channels {int} - channels of the streamed audio.
+        frame_rate {int} - frame rate of the streamed audio.
+        sample_width {int} - bytes of each sample of the streamed audio.
+
+    Yields:
+        [bytes] - the raw data of each segment.
+    """
+    LOGGER.debug('streaming segments: %dHz %d channels %d bytes',
+                 frame_rate, channels, sample_width)
+    for segment in segments:
+        yield (segment.set_channels(channels)
+               .set_frame_rate(frame_rate)
+               .set_sample_width(sample_width).raw_data)
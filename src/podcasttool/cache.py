@@ -0,0 +1,142 @@
+"""Decoded audio cache of the audio library.
+
+The intro and watermark audio are the same for every podcast, so instead of
+decoding the same mp3 with ffmpeg for each part, they are decoded once and
+saved as raw 16bit PCM for each export sample rate.
+
+The cache entries are named after the hash of the mp3 content so a modified
+audio file will never use an old entry:
+
+    <sha1>_<frame_rate>_<channels>.pcm
+
+A cached audio is read with a memory map, without starting any subprocess.
+"""
+import os
+import mmap
+import logging
+
+from podcasttool import util
+from podcasttool import library
+from podcasttool import clip_store
+
+LOGGER = logging.getLogger('podcast_tool.cache')
+
+SAMPLE_WIDTH = 2
+
+
+def cache_dir() -> str:
+    """Get the cache directory path and create it if it doesnt exists."""
+    path = os.path.join(util.get_path('include/audio'), '.pcm_cache')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _entry_name(file_hash: str, frame_rate: int, channels: int) -> str:
+    """Get the cache file path of an audio."""
+    return os.path.join(cache_dir(),
+                        f'{file_hash}_{frame_rate}_{channels}.pcm')
+
+
+def _find_entry(file_hash: str, frame_rate: int):
+    """Search the cache entry of an audio.
+
+    Returns:
+        [tuple] - path of the entry and number of channels or None.
+    """
+    for channels in (1, 2):
+        entry = _entry_name(file_hash, frame_rate, channels)
+        if os.path.exists(entry):
+            return entry, channels
+    return None
+
+
+def _read_entry(entry: str, frame_rate: int, channels: int):
+    """Create an audio segment from a memory mapped cache entry."""
+    import pydub
+
+    with open(entry, 'rb') as pcm_file:
+        if not os.fstat(pcm_file.fileno()).st_size:
+            data = b''
+        else:
+            data = mmap.mmap(pcm_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return pydub.AudioSegment(data=data, sample_width=SAMPLE_WIDTH,
+                              frame_rate=frame_rate, channels=channels)
+
+
+def _write_entry(audio_file: str, file_hash: str, frame_rate: int):
+    """Decode the audio file with ffmpeg and save it in the cache.
+
+    The entry is first written in a temporary file and then renamed so that
+    other processes never read half written entries.
+    """
+    import pydub
+
+    LOGGER.debug('decoding audio for the cache: %s', audio_file)
+    segment = (pydub.AudioSegment.from_file(audio_file)
+               .set_frame_rate(frame_rate)
+               .set_sample_width(SAMPLE_WIDTH))
+
+    entry = _entry_name(file_hash, frame_rate, segment.channels)
+    tmp_entry = f'{entry}.{os.getpid()}.tmp'
+    with open(tmp_entry, 'wb') as pcm_file:
+        pcm_file.write(segment.raw_data)
+    os.replace(tmp_entry, entry)
+
+    return entry, segment.channels
+
+
+def pcm_entry(audio_file: str, frame_rate: int):
+    """Get the cache entry of a library file.
+
+    If the audio is not in the cache yet, it gets decoded and saved.
+
+    Arguments:
+        audio_file {str} - path of the audio file to get.
+        frame_rate {int} - the frame rate of the decoded audio.
+
+    Returns:
+        [tuple] - path of the raw 16bit PCM entry and number of channels.
+    """
+    frame_rate = int(frame_rate)
+    file_hash = library.file_hash(audio_file)
+
+    found = _find_entry(file_hash, frame_rate)
+    if found:
+        LOGGER.debug('audio cache hit: %s', os.path.basename(audio_file))
+        return found
+
+    LOGGER.debug('audio cache miss: %s', os.path.basename(audio_file))
+    return _write_entry(audio_file, file_hash, frame_rate)
+
+
+def audio_segment(audio_file: str, frame_rate: int):
+    """Get the decoded audio of a library file.
+
+    Arguments:
+        audio_file {str} - path of the audio file to get.
+        frame_rate {int} - the frame rate of the decoded audio.
+
+    Returns:
+        [AudioSegment] - the decoded audio.
+    """
+    entry, channels = pcm_entry(audio_file, frame_rate)
+    return _read_entry(entry, int(frame_rate), channels)
+
+
+def prune():
+    """Delete the cache entries of audio files that are not in the library.
+
+    Should be called every time the library audio is generated again or
+    deleted, so old entries don't pile up. The encoded clips of the clip
+    store are pruned too.
+    """
+    library_hashes = {entry['sha1']
+                      for entry in library.refresh()['files'].values()}
+
+    for entry in os.listdir(cache_dir()):
+        if entry.split('_')[0] not in library_hashes:
+            LOGGER.debug('deleting audio cache entry: %s', entry)
+            os.remove(os.path.join(cache_dir(), entry))
+
+    clip_store.prune()
@@ -0,0 +1,75 @@
+"""Store of the library clips encoded for each export profile.
+
+The intro and watermark clips are the same in every part, so with the splice
+render mode they are encoded once for each bitrate, sample rate and channels
+of the export settings and then copied frame by frame into every final mp3.
+
+The entries are bare mp3 frames named after the hash of the clip content, so
+a modified clip will never use an old entry:
+
+    include/audio/.mp3_cache/<sha1>_<bitrate>_<sample_rate>_<channels>.mp3
+"""
+import os
+import logging
+
+from podcasttool import util
+from podcasttool import library
+from podcasttool import encoder
+
+LOGGER = logging.getLogger('podcast_tool.clip_store')
+
+
+def store_dir() -> str:
+    """Get the store directory path and create it if it doesnt exists."""
+    path = os.path.join(util.get_path('include/audio'), '.mp3_cache')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _entry_name(file_hash: str, bitrate, sample_rate, channels) -> str:
+    """Get the store file path of an encoded clip."""
+    return os.path.join(
+        store_dir(), f'{file_hash}_{bitrate}_{sample_rate}_{channels}.mp3')
+
+
+def encoded_clip(audio_file: str, bitrate='64k', sample_rate='22050',
+                 channels=1) -> str:
+    """Get the encoded frames of a library clip for an export profile.
+
+    If the clip is not in the store yet, it gets encoded and saved. The entry
+    is first written in a temporary file and then renamed so that other
+    processes never read half written entries.
+
+    Arguments:
+        audio_file {str} - path of the library clip.
+
+    Keyword Arguments:
+        bitrate {str} - mp3 bitrate (default: {'64k'})
+        sample_rate {str} - mp3 sample rate (default: {'22050'})
+        channels {int} - mp3 channels (default: {1})
+
+    Returns:
+        [str] - path of the encoded clip.
+    """
+    entry = _entry_name(library.file_hash(audio_file), bitrate, sample_rate,
+                        channels)
+    if os.path.exists(entry):
+        LOGGER.debug('clip store hit: %s', os.path.basename(audio_file))
+        return entry
+
+    LOGGER.debug('clip store miss: %s', os.path.basename(audio_file))
+    tmp_entry = f'{entry}.{os.getpid()}.tmp'
+    encoder.encode_clip(audio_file, tmp_entry, bitrate, sample_rate, channels)
+    os.replace(tmp_entry, entry)
+    return entry
+
+
+def prune():
+    """Delete the encoded clips that are not in the library anymore."""
+    library_hashes = {entry['sha1']
+                      for entry in library.refresh()['files'].values()}
+
+    for entry in os.listdir(store_dir()):
+        if entry.split('_')[0] not in library_hashes:
+            LOGGER.debug('deleting encoded clip: %s', entry)
+            os.remove(os.path.join(store_dir(), entry))
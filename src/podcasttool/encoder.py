@@ -0,0 +1,530 @@
+"""Render a podcast part with a single ffmpeg process.
+
+The pydub pipeline starts ffmpeg for every library clip to decode and for
+the final export, and the tmp directory pipeline writes every cut as a wave
+file first. Here the whole part is described as one ffmpeg filter graph:
+
+    - each podcast cut is an input of the raw wave, seeked to its time range.
+    - each library clip is an input of its mp3 file.
+    - every input is resampled to the export format and then all of them are
+      joined by the concat filter, in the order of the audio intro.
+
+ffmpeg decodes, resamples, concatenates and encodes the part in one go, so
+nothing is written on disk except the final mp3.
+
+The splice render mode uses encode_clip() and encode_cuts() instead: they
+write bare mp3 frames, without id3 tags or xing header, so the files can be
+joined frame by frame by the mp3 module.
+
+The pydub and numpy render modes merge the part in memory and use
+encode_stream(), which pipes the raw samples into the stdin of ffmpeg and
+reads the mp3 from its stdout, or encode_renditions() when the same part is
+exported with more bitrates and sample rates or as HLS segments and
+playlist.
+"""
+import os
+import glob
+import math
+import wave
+import shutil
+import logging
+import threading
+import contextlib
+import subprocess
+
+LOGGER = logging.getLogger('podcast_tool.encoder')
+
+CHANNEL_LAYOUTS = {1: 'mono', 2: 'stereo'}
+
+# ffmpeg raw formats of each sample width
+PCM_FORMATS = {1: 's8', 2: 's16le', 4: 's32le'}
+# ffmpeg raw formats of the wave frames of each sample width
+WAV_FORMATS = {1: 'u8', 2: 's16le', 3: 's24le', 4: 's32le'}
+# bytes written at once into the ffmpeg stdin
+PIPE_BLOCKSIZE = 1024 * 1024
+
+# HLS output: the playlist and the mpeg-ts segments of this many seconds
+PLAYLIST_EXTENSION = '.m3u8'
+SEGMENT_SECONDS = 10
+
+# mp3 output with only the audio frames
+BARE_MP3 = ['-write_xing', '0', '-id3v2_version', '0', '-write_id3v1', '0',
+            '-f', 'mp3']
+
+
+class EncodeError(Exception):
+    """ffmpeg could not encode the audio."""
+
+
+def _command() -> list:
+    return ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-nostdin']
+
+
+def _mp3_encoding(bitrate, sample_rate, channels) -> list:
+    """Get the ffmpeg arguments of the mp3 encoding of an output."""
+    return ['-c:a', 'libmp3lame', '-b:a', str(bitrate),
+            '-ar', str(sample_rate), '-ac', str(channels)]
+
+
+def _run(command: list, name: str):
+    """Run ffmpeg and raise EncodeError if it fails."""
+    process = subprocess.run(command, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.PIPE)
+    if process.returncode:
+        raise EncodeError(
+            f'ffmpeg failed encoding {os.path.basename(name)}: '
+            f'{process.stderr.decode(errors="replace").strip()}')
+
+
+def _wav_input(wav_file: str, frame_rate: int, start: int, end: int) -> list:
+    """Get the ffmpeg arguments of an input with a cut of the wave."""
+    return ['-ss', f'{start / frame_rate:.6f}',
+            '-t', f'{(end - start) / frame_rate:.6f}',
+            '-i', wav_file]
+
+
+def render_command(wav_file: str, sequence: list, output: str,
+                   bitrate='64k', sample_rate='22050', clip_channels=1,
+                   mono=False, tags=None) -> list:
+    """Create the ffmpeg command that renders a podcast part.
+
+    Arguments:
+        wav_file {str} - path of the raw podcast.
+        sequence {list} - the audio of the part in order. A tuple is a
+                          (start, end) frames cut of the wave, a string is
+                          the path of a library clip.
+        output {str} - path of the final mp3.
+
+    Keyword Arguments:
+        bitrate {str} - mp3 bitrate (default: {'64k'})
+        sample_rate {str} - mp3 sample rate (default: {'22050'})
+        clip_channels {int} - most channels of the library clips. The part
+                              gets the most channels of the wave and the
+                              clips, like the pydub concatenation
+                              (default: {1})
+        mono {bool} - downmix the part to mono (default: {False})
+        tags {dict} - id3 tags of the mp3 (default: {None})
+
+    Returns:
+        [list] - the ffmpeg arguments.
+    """
+    with wave.open(str(wav_file), 'rb') as reader:
+        frame_rate = reader.getframerate()
+        total_frames = reader.getnframes()
+        channels = 1 if mono else max(reader.getnchannels(), clip_channels)
+
+    command = _command()
+    for item in sequence:
+        if isinstance(item, str):
+            command += ['-i', item]
+        else:
+            start, end = item
+            command += _wav_input(str(wav_file), frame_rate, start,
+                                  min(end, total_frames))
+
+    audio_format = (f'aresample={sample_rate},aformat=sample_fmts=s16:'
+                    f'channel_layouts={CHANNEL_LAYOUTS[channels]}')
+    filters = [f'[{index}:a]{audio_format}[a{index}]'
+               for index in range(len(sequence))]
+    filters.append(''.join(f'[a{index}]' for index in range(len(sequence)))
+                   + f'concat=n={len(sequence)}:v=0:a=1[out]')
+
+    command += ['-filter_complex', ';'.join(filters), '-map', '[out]',
+                '-c:a', 'libmp3lame', '-b:a', str(bitrate),
+                '-ar', str(sample_rate), '-id3v2_version', '4']
+    for key, value in (tags or {}).items():
+        command += ['-metadata', f'{key}={value}']
+    command += ['-f', 'mp3', str(output)]
+    return command
+
+
+def render(wav_file: str, sequence: list, output: str, **options) -> str:
+    """Render a podcast part into an mp3 with one ffmpeg process.
+
+    The mp3 is written in a temporary file and renamed when it is complete,
+    so a failed render never leaves a broken part.
+
+    Arguments:
+        wav_file {str} - path of the raw podcast.
+        sequence {list} - the cuts and the clips of the part, see
+                          render_command().
+        output {str} - path of the final mp3.
+        options - keyword arguments passed to render_command().
+
+    Returns:
+        [str] - the path of the mp3.
+    """
+    tmp_output = f'{output}.{os.getpid()}.tmp'
+    command = render_command(wav_file, sequence, tmp_output, **options)
+    LOGGER.debug('rendering %d inputs into: %s', len(sequence), output)
+
+    try:
+        _run(command, output)
+    except EncodeError:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_output)
+        raise
+
+    os.replace(tmp_output, output)
+    return output
+
+
+def encode_clip(audio_file: str, output: str, bitrate='64k',
+                sample_rate='22050', channels=1) -> str:
+    """Encode a library clip into bare mp3 frames.
+
+    Arguments:
+        audio_file {str} - path of the clip.
+        output {str} - path of the encoded clip.
+
+    Keyword Arguments:
+        bitrate {str} - mp3 bitrate (default: {'64k'})
+        sample_rate {str} - mp3 sample rate (default: {'22050'})
+        channels {int} - mp3 channels (default: {1})
+
+    Returns:
+        [str] - the path of the encoded clip.
+    """
+    LOGGER.debug('encoding clip: %s', os.path.basename(audio_file))
+    _run(_command() + ['-i', str(audio_file)]
+         + _mp3_encoding(bitrate, sample_rate, channels)
+         + BARE_MP3 + [str(output)], output)
+    return output
+
+
+def encode_cuts(wav_file: str, ranges: list, outputs: list, bitrate='64k',
+                sample_rate='22050', channels=1) -> list:
+    """Encode the cuts of the raw podcast into bare mp3 frames.
+
+    All the cuts are encoded by the same ffmpeg process, one output each.
+
+    Arguments:
+        wav_file {str} - path of the raw podcast.
+        ranges {list} - list of (start, end) frames of each cut.
+        outputs {list} - path of the encoded file of each cut.
+
+    Keyword Arguments:
+        bitrate {str} - mp3 bitrate (default: {'64k'})
+        sample_rate {str} - mp3 sample rate (default: {'22050'})
+        channels {int} - mp3 channels (default: {1})
+
+    Returns:
+        [list] - the paths of the encoded cuts.
+    """
+    with wave.open(str(wav_file), 'rb') as reader:
+        frame_rate = reader.getframerate()
+        total_frames = reader.getnframes()
+
+    command = _command()
+    for start, end in ranges:
+        command += _wav_input(str(wav_file), frame_rate, start,
+                              min(end, total_frames))
+    for index, output in enumerate(outputs):
+        command += (['-map', f'{index}:a']
+                    + _mp3_encoding(bitrate, sample_rate, channels)
+                    + BARE_MP3 + [str(output)])
+
+    LOGGER.debug('encoding %d cuts of: %s', len(ranges),
+                 os.path.basename(wav_file))
+    _run(command, wav_file)
+    return outputs
+
+
+def _pcm_input(frame_rate: int, channels: int, sample_width: int) -> list:
+    """Get the ffmpeg arguments of raw PCM samples read from the stdin."""
+    return ['-f', PCM_FORMATS[sample_width], '-ar', str(frame_rate),
+            '-ac', str(channels), '-i', 'pipe:0']
+
+
+def resample_wav(wav_file: str, frame_rate: int, block_size=PIPE_BLOCKSIZE,
+                 channels=None):
+    """Stream the frames of a wave file resampled by ffmpeg.
+
+    The ffmpeg resampler low passes the audio before changing its rate, so
+    the frequencies above the new Nyquist don't alias back into the audio.
+    The sample width of the wave is kept.
+
+    Arguments:
+        wav_file {str} - path of the wave file.
+        frame_rate {int} - frame rate of the resampled frames.
+
+    Keyword Arguments:
+        block_size {int} - bytes of each yielded block. The last one can be
+                           shorter (default: {PIPE_BLOCKSIZE})
+        channels {int} - mix the frames to this number of channels, None to
+                         keep the ones of the wave (default: {None})
+
+    Yields:
+        [bytes] - the resampled frames, in the format of the wave file.
+    """
+    with wave.open(str(wav_file), 'rb') as reader:
+        sample_width = reader.getsampwidth()
+    command = _command() + ['-i', str(wav_file), '-ar', str(frame_rate)]
+    if channels:
+        command += ['-ac', str(channels)]
+    command += ['-f', WAV_FORMATS[sample_width], 'pipe:1']
+    process = subprocess.Popen(command, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    try:
+        while True:
+            block = process.stdout.read(block_size)
+            if not block:
+                break
+            yield block
+        error = process.stderr.read()
+        process.wait()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+    if process.returncode:
+        raise EncodeError(
+            f'ffmpeg failed resampling {os.path.basename(wav_file)}: '
+            f'{error.decode(errors="replace").strip()}')
+
+
+def _tagged_mp3(tags) -> list:
+    """Get the ffmpeg arguments of an mp3 output with id3 tags."""
+    command = ['-id3v2_version', '4']
+    for key, value in (tags or {}).items():
+        command += ['-metadata', f'{key}={value}']
+    return command + ['-f', 'mp3']
+
+
+def hls_playlist(mp3_file: str) -> str:
+    """Get the HLS playlist path, or link, of an mp3 path."""
+    return os.path.splitext(mp3_file)[0] + PLAYLIST_EXTENSION
+
+
+def segment_count(duration_ms: int) -> int:
+    """Get about how many HLS segments an audio of duration_ms is split in."""
+    return max(1, math.ceil(duration_ms / 1000 / SEGMENT_SECONDS))
+
+
+def _segment_files(playlist: str) -> list:
+    """Get the segment files of a playlist in the folder, even stale ones.
+
+    The segment numbers have at least 3 digits, more after the 999th.
+    """
+    stem = os.path.splitext(playlist)[0]
+    segments = []
+    for segment in glob.glob(f'{glob.escape(stem)}_[0-9]*.ts'):
+        number = segment[len(stem) + 1:-len('.ts')]
+        # not the segments of another playlist, like stem_1_000.ts
+        if number.isdigit():
+            segments.append((int(number), segment))
+    return [segment for _, segment in sorted(segments)]
+
+
+def hls_segments(playlist: str) -> list:
+    """Get the paths of the segments listed in an HLS playlist."""
+    with open(playlist) as playlist_file:
+        return [os.path.join(os.path.dirname(playlist), line.strip())
+                for line in playlist_file
+                if line.strip() and not line.startswith('#')]
+
+
+def _output_format(output: str, tmp_output: str, tags) -> list:
+    """Get the ffmpeg arguments of the muxer of an mp3 or HLS output."""
+    if not output.endswith(PLAYLIST_EXTENSION):
+        return _tagged_mp3(tags) + [tmp_output]
+    # the segments are listed by name, so they must be next to the playlist
+    segments = os.path.splitext(output)[0] + '_%03d.ts'
+    return ['-f', 'hls', '-hls_time', str(SEGMENT_SECONDS),
+            '-hls_playlist_type', 'vod', '-hls_segment_filename', segments,
+            tmp_output]
+
+
+def _feed(stdin, chunks, errors: list):
+    """Write the PCM chunks into the ffmpeg stdin, then close it."""
+    try:
+        for chunk in chunks:
+            chunk = memoryview(chunk).cast('B')
+            for start in range(0, len(chunk), PIPE_BLOCKSIZE):
+                stdin.write(chunk[start:start + PIPE_BLOCKSIZE])
+    except BrokenPipeError:
+        # ffmpeg exited early, its error is raised by encode_stream()
+        pass
+    except Exception as error:
+        errors.append(error)
+    finally:
+        try:
+            stdin.close()
+        except BrokenPipeError:
+            pass
+
+
+def encode_stream(chunks, output, frame_rate: int, channels: int,
+                  sample_width=2, bitrate='64k', tags=None):
+    """Encode a stream of raw PCM chunks into an mp3 with one ffmpeg process.
+
+    The chunks are written into the ffmpeg stdin by a thread while the mp3
+    comes out of its stdout, so neither the PCM nor the mp3 pass from a
+    temporary file. The mp3 has no xing header, like the splice render mode.
+
+    Arguments:
+        chunks {iterable} - bytes-like chunks of signed little endian
+                            interleaved samples.
+        output {str|file} - path of the final mp3 or a binary file object
+                            where the mp3 is written, like an upload.
+                            A path is written in a temporary file and
+                            renamed when the mp3 is complete.
+        frame_rate {int} - frame rate of the samples, kept by the mp3.
+        channels {int} - number of channels of the samples.
+
+    Keyword Arguments:
+        sample_width {int} - bytes of each sample (default: {2})
+        bitrate {str} - mp3 bitrate (default: {'64k'})
+        tags {dict} - id3 tags of the mp3 (default: {None})
+
+    Returns:
+        [str|file] - the output.
+    """
+    if isinstance(output, (str, os.PathLike)):
+        tmp_output = f'{output}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_output, 'wb') as mp3_file:
+                encode_stream(chunks, mp3_file, frame_rate, channels,
+                              sample_width, bitrate, tags)
+        except BaseException:
+            # ffmpeg may fail before creating it: keep the original error
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_output)
+            raise
+        os.replace(tmp_output, output)
+        return output
+
+    command = (_command() + _pcm_input(frame_rate, channels, sample_width)
+               + ['-c:a', 'libmp3lame', '-b:a', str(bitrate)]
+               + _tagged_mp3(tags) + ['pipe:1'])
+
+    LOGGER.debug('streaming pcm into the encoder: %dHz %d channels',
+                 frame_rate, channels)
+    process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    errors = []
+    feeder = threading.Thread(target=_feed, daemon=True,
+                              args=(process.stdin, chunks, errors))
+    feeder.start()
+    try:
+        shutil.copyfileobj(process.stdout, output, PIPE_BLOCKSIZE)
+        error = process.stderr.read()
+        process.wait()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        feeder.join()
+        process.stdout.close()
+        process.stderr.close()
+
+    if errors:
+        raise errors[0]
+    if process.returncode:
+        raise EncodeError(
+            f'ffmpeg failed encoding {getattr(output, "name", "the mp3")}: '
+            f'{error.decode(errors="replace").strip()}')
+    return output
+
+
+def encode_pcm(data, output, frame_rate: int, channels: int,
+               sample_width=2, bitrate='64k', tags=None):
+    """Encode a buffer of raw PCM samples into an mp3.
+
+    Arguments:
+        data {bytes-like} - signed little endian interleaved samples.
+        output {str|file} - path of the final mp3 or a binary file object.
+        frame_rate {int} - frame rate of the samples.
+        channels {int} - number of channels of the samples.
+
+    Keyword Arguments:
+        see encode_stream().
+
+    Returns:
+        [str|file] - the output.
+    """
+    return encode_stream([data], output, frame_rate, channels, sample_width,
+                         bitrate, tags)
+
+
+def encode_renditions(chunks, outputs: list, frame_rate: int, channels: int,
+                      sample_width=2, tags=None) -> list:
+    """Encode a stream of raw PCM chunks into several mp3 at once.
+
+    The chunks are piped only once: a single ffmpeg process reads them and
+    feeds one mp3 encoder for each rendition, and the encoders run in
+    parallel. Each mp3 is written in a temporary file and renamed when all of
+    them are complete.
+
+    Arguments:
+        chunks {iterable} - bytes-like chunks of signed little endian
+                            interleaved samples.
+        outputs {list} - the (path, bitrate, sample_rate) of each mp3. A
+                         path ending with PLAYLIST_EXTENSION is an HLS
+                         playlist, written with its segments in the same
+                         pass.
+        frame_rate {int} - frame rate of the samples.
+        channels {int} - number of channels of the samples.
+
+    Keyword Arguments:
+        sample_width {int} - bytes of each sample (default: {2})
+        tags {dict} - id3 tags of every mp3 (default: {None})
+
+    Returns:
+        [list] - the paths of the mp3.
+    """
+    tmp_outputs = [f'{output}.{os.getpid()}.tmp' for output, _, _ in outputs]
+    command = _command() + _pcm_input(frame_rate, channels, sample_width)
+    for tmp_output, (output, bitrate, sample_rate) in zip(tmp_outputs,
+                                                          outputs):
+        command += (['-map', '0:a']
+                    + _mp3_encoding(bitrate, sample_rate, channels)
+                    + _output_format(output, tmp_output, tags))
+
+    LOGGER.debug('encoding %d renditions: %dHz %d channels', len(outputs),
+                 frame_rate, channels)
+    process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE)
+    errors = []
+    feeder = threading.Thread(target=_feed, daemon=True,
+                              args=(process.stdin, chunks, errors))
+    feeder.start()
+    try:
+        error = process.stderr.read()
+        process.wait()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        feeder.join()
+        process.stderr.close()
+
+    if errors or process.returncode:
+        for tmp_output, (output, _, _) in zip(tmp_outputs, outputs):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_output)
+            if output.endswith(PLAYLIST_EXTENSION):
+                # the old playlist may list segments just overwritten
+                for stale in _segment_files(output) + [output]:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(stale)
+    if errors:
+        raise errors[0]
+    if process.returncode:
+        raise EncodeError(
+            f'ffmpeg failed encoding {os.path.basename(outputs[0][0])}: '
+            f'{error.decode(errors="replace").strip()}')
+
+    for tmp_output, (output, _, _) in zip(tmp_outputs, outputs):
+        os.replace(tmp_output, output)
+        if output.endswith(PLAYLIST_EXTENSION):
+            # the segments of a longer previous part
+            for stale in set(_segment_files(output)) - set(
+                    hls_segments(output)):
+                os.remove(stale)
+    return [output for output, _, _ in outputs]
@@ -0,0 +1,154 @@
+"""Pool of ftp connections to the podcast server.
+
+Logging in to the server takes longer than uploading a small file, so the
+connections are opened once and then reused by the path check, the directory
+creation and all the uploads. The pool has a maximum number of connections:
+when they are all in use, the next caller waits for one to be released.
+
+Idle connections may be closed by the server, so before reusing a connection
+that has been idle for a while, a NOOP command checks that is still alive.
+"""
+import os
+import time
+import queue
+import ftplib
+import logging
+import threading
+import contextlib
+
+LOGGER = logging.getLogger('podcast_tool.ftp_pool')
+
+
+class FtpPool:
+    """Bounded pool of logged in ftp connections.
+
+    Arguments:
+        host {str} - server host name.
+        user {str} - login user.
+        password {str} - login password.
+
+    Keyword Arguments:
+        port {int} - server port (default: {21})
+        size {int} - maximum number of open connections (default: {4})
+        keep_alive {float} - seconds of idle after which a connection is
+                             checked with NOOP before being reused
+                             (default: {30})
+        timeout {float} - socket timeout in seconds (default: {60})
+    """
+
+    def __init__(self, host, user, password, port=21, size=4,
+                 keep_alive=30, timeout=60):
+        self._host = host
+        self._port = port
+        self._user = user
+        self._password = password
+        self._keep_alive = keep_alive
+        self._timeout = timeout
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.logins = 0
+
+    def _connect(self) -> ftplib.FTP:
+        """Open a new connection and login to the server."""
+        LOGGER.debug('opening ftp connection to: %s', self._host)
+        ftp = ftplib.FTP(timeout=self._timeout)
+        ftp.connect(self._host, self._port)
+        ftp.login(self._user, self._password)
+        self.logins += 1
+        # remember the login directory so the connection can go back to it
+        ftp.home_dir = ftp.pwd()
+        return ftp
+
+    def _is_alive(self, ftp: ftplib.FTP, idle_since: float) -> bool:
+        """Check if an idle connection can still be used."""
+        if time.monotonic() - idle_since < self._keep_alive:
+            return True
+        try:
+            ftp.voidcmd('NOOP')
+        except ftplib.all_errors as error:
+            LOGGER.debug('dropping dead ftp connection: %s', error)
+            return False
+        return True
+
+    def _acquire(self) -> ftplib.FTP:
+        """Get an idle alive connection or open a new one."""
+        while True:
+            try:
+                ftp, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._is_alive(ftp, idle_since):
+                return ftp
+            self._close(ftp)
+
+    def _release(self, ftp: ftplib.FTP):
+        """Put back the connection in the pool from its login directory."""
+        try:
+            ftp.cwd(ftp.home_dir)
+        except ftplib.all_errors:
+            self._close(ftp)
+        else:
+            self._idle.put((ftp, time.monotonic()))
+
+    @staticmethod
+    def _close(ftp: ftplib.FTP):
+        """Close a connection ignoring errors of already dead ones."""
+        try:
+            ftp.quit()
+        except (*ftplib.all_errors, AttributeError):
+            ftp.close()
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection from the pool.
+
+        If an error happens while using it, the connection is closed instead
+        of going back to the pool: after an ftp error or an upload stopped
+        half way its state is unknown.
+
+            with pool.connection() as ftp:
+                ftp.cwd(server_path)
+        """
+        self._slots.acquire()
+        ftp = None
+        try:
+            ftp = self._acquire()
+            yield ftp
+        except Exception:
+            if ftp:
+                self._close(ftp)
+                ftp = None
+            raise
+        finally:
+            if ftp:
+                self._release(ftp)
+            self._slots.release()
+
+    def close(self):
+        """Close all the idle connections."""
+        while True:
+            try:
+                ftp, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close(ftp)
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def default_pool() -> FtpPool:
+    """Get the pool of connections to the podcast server.
+
+    The pool is created the first time it is needed with the credentials
+    from the environment variables.
+    """
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = FtpPool(os.environ['FONDERIE_HOST'],
+                            os.environ['FONDERIE_USER'],
+                            os.environ['FONDERIE_PASSWORD'])
+    return _POOL
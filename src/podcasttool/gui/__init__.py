@@ -1,7 +1,21 @@
+import importlib
+
 from .html_frame import HtmlFrame
-from .audio_frame import AudioExport, AudioIntro
-from .catalog_frame import CatalogFrame
 from .main_frame import MainFrame
 from .select_frame import SelectPodcast
-from .dev_frame import DevFrame
-from . import *
+
+# the frames of the other tabs are imported when the tab is first shown
+_TAB_FRAMES = {
+    'AudioExport': 'audio_frame',
+    'AudioIntro': 'audio_frame',
+    'CatalogFrame': 'catalog_frame',
+    'DevFrame': 'dev_frame',
+}
+
+
+def __getattr__(name):
+    """Import the frames of the other tabs only when they are needed."""
+    if name in _TAB_FRAMES:
+        module = importlib.import_module(f'.{_TAB_FRAMES[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
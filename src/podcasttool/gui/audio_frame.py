@@ -6,6 +6,9 @@ Default export options are:
     Bitrate: 64k.
     Sample Rate: 22050Hz.
     Watermark cuts: auto.
+    Render: pydub.
+    Snap cuts to silence: off.
+    Mono: off.
 """
 import os
 import json
@@ -16,17 +19,19 @@ from tkinter import messagebox
 from tkinter import filedialog
 
 from podcasttool import util
+from podcasttool import cache
+from podcasttool.podcasttools import RENDER_MODES
 
 
 class AudioIntro(tk.Frame):
     """Audio intro modification section of the gui."""
-    _catalog = util.catalog_names()
     _new_audio = []
-    list_len = len(_catalog["intro"])
 
     def __init__(self, parent, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
 
+        self._catalog = util.catalog_copy()
+        self.list_len = len(self._catalog["intro"])
         self.audio_catalog = self._catalog
 
         self._audio_frame = ttk.Frame(self,)
@@ -86,6 +91,7 @@ class AudioIntro(tk.Frame):
             util.generate_audio(text=self.text_entry.get(),
                                 filename=filename, path=path,
                                 lang=self._lang_select.get())
+            cache.prune()
 
     def add_combobox(self):
         """Add new combobox widget if user wants."""
@@ -141,6 +147,7 @@ class AudioIntro(tk.Frame):
             ttk.Label(self._audio_frame, text=msg).grid(column=0, row=index)
             self.update()
             util.generate_audio(text=name, path=path)
+        cache.prune()
 
     def new_intro(self):
         """Check if audio intro was modified."""
@@ -194,7 +201,7 @@ class AudioExport(tk.Frame):
     def __init__(self, parent, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
 
-        self._audio_frame = ttk.Frame(self, width=300, height=100)
+        self._audio_frame = ttk.Frame(self, width=300, height=230)
         self._audio_frame.grid(column=1, row=0, sticky=tk.W)
         self._audio_frame.grid_propagate(False)
 
@@ -220,16 +227,42 @@ class AudioExport(tk.Frame):
         self._sample_rate.grid(column=1, row=3)
         self._sample_rate.current(0)
 
+        self._render = ttk.Combobox(self.export_label, width=7,
+                                    value=RENDER_MODES, state='readonly')
+        self._render.grid(column=1, row=4, pady=2)
+        self._render.current(0)
+
+        self._snap_silence = tk.BooleanVar()
+        ttk.Checkbutton(self.export_label, text='Snap cuts to silence',
+                        variable=self._snap_silence).grid(
+                            column=0, row=5, columnspan=2, sticky=tk.W)
+
+        self._mono = tk.BooleanVar()
+        ttk.Checkbutton(self.export_label, text='Mono',
+                        variable=self._mono).grid(column=0, row=6,
+                                                  columnspan=2, sticky=tk.W)
+
+        # extra bitrate/sample rate exports, e.g. "32k/22050 128k/44100"
+        self._renditions = ttk.Entry(self.export_label, width=14)
+        self._renditions.grid(column=1, row=7, pady=2)
+
+        self._hls = tk.BooleanVar()
+        ttk.Checkbutton(self.export_label, text='HLS segments',
+                        variable=self._hls).grid(column=0, row=8,
+                                                 columnspan=2, sticky=tk.W)
+
         self._labels()
 
     def _labels(self):
         """Generate labels for audio frame."""
-        labels = ["Watermarks", "Bitrate", "Sample rate"]
+        labels = ["Watermarks", "Bitrate", "Sample rate", "Render"]
 
         for i, label in enumerate(labels, 1):
             style = 'label.TLabel' if "Export" in label else ""
             ttk.Label(self.export_label, text=label, style=style).grid(
                 column=0, row=i, sticky=tk.W, padx=2)
+        ttk.Label(self.export_label, text="Renditions").grid(
+            column=0, row=7, sticky=tk.W, padx=2)
 
     @staticmethod
     def _watermarks_list() -> list:
@@ -267,6 +300,35 @@ class AudioExport(tk.Frame):
         """Return sample rate from options without the Hz."""
         return self._sample_rate.get().replace('Hz', '')
 
+    @property
+    def render(self) -> str:
+        """Return the render mode from options."""
+        return self._render.get()
+
+    @property
+    def snap_silence(self) -> bool:
+        """Return True if the cuts are moved to the nearest silence."""
+        return self._snap_silence.get()
+
+    @property
+    def mono(self) -> bool:
+        """Return True if the podcast is downmixed to mono."""
+        return self._mono.get()
+
+    @property
+    def renditions(self) -> list:
+        """Return the (bitrate, sample_rate) of each extra rendition.
+
+        Raises ValueError if a rendition is not written like 32k/22050.
+        """
+        return [util.parse_rendition(rendition)
+                for rendition in self._renditions.get().split()]
+
+    @property
+    def hls(self) -> bool:
+        """Return True if the parts are written as HLS segments."""
+        return self._hls.get()
+
     @property
     def watermark_state(self) -> str:
         """Get watermark_toggle check button state."""
@@ -10,16 +10,18 @@ from tkinter import ttk
 from tkinter import messagebox
 
 from podcasttool import util
+from podcasttool import cache
 
 
 class CatalogFrame(tk.Frame):
     """Catalog page of the gui."""
-    _catalog_list = util.catalog_names()
     _updated_names = {"docenti": [], "corsi": []}
 
     def __init__(self, parent, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
 
+        self._catalog_list = util.catalog_copy()
+
         _catalog_frame = ttk.Frame(self, width=420, height=800)
         _catalog_frame.grid(column=0, row=0, rowspan=2)
 
@@ -132,7 +134,7 @@ class CatalogFrame(tk.Frame):
     def _reset_list(self):
         """When loading catalog, reset modification that have not be saved."""
         self._updated_names = {"docenti": [], "corsi": []}
-        self._catalog_list = util.catalog_names()
+        self._catalog_list = util.catalog_copy()
 
     def _load_catalog(self):
         """Load name list into treeview widget."""
@@ -264,3 +266,4 @@ class CatalogFrame(tk.Frame):
                     column=3, row=index)
                 path = util.get_path("include/audio/new_audio")
                 util.generate_audio(text=name, path=path, lang=lang)
+        cache.prune()
@@ -6,7 +6,7 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 
-from podcasttool import util, open_link
+from podcasttool import util, cache, open_link
 from .html_frame import archive_files
 
 
@@ -104,6 +104,7 @@ class DevFrame(tk.Frame):
             shutil.copy(original_json, new_json)
             new_audio_dir = util.get_path("include/audio/new_audio")
             [os.remove(audio) for audio in new_audio_dir.iterdir()]
+            cache.prune()
             messagebox.showinfo(message="done!")
 
     @property
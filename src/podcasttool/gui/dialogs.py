@@ -0,0 +1,32 @@
+"""Dialogs shared by the gui frames."""
+import sys
+
+from tkinter import messagebox, TkVersion
+
+from podcasttool import util, open_link
+
+
+def check_tk_version():
+    """Exit if the tcl-tk version has known bugs."""
+    if TkVersion <= 8.5:
+        messagebox.showinfo(message=f"your tcl-tk version {TkVersion} has some serious bugs!"
+                            "please update to the last version: 8.6")
+        sys.exit("tk version is old")
+
+
+def open_log(msg, title="Error", icon="warning"):
+    """If fatal error ask user if wants to open log file."""
+    user = messagebox.askyesno(title=title, message=msg, icon=icon)
+    if user:
+        log_path = util.get_path("log") / "errors.log"
+        open_link(log_path)
+
+
+def ask_user(message: str) -> bool:
+    """Ask a yes or no question to the user."""
+    return messagebox.askyesno(title='PodcastTool', message=message)
+
+
+def notify_user(message: str):
+    """Show an information message to the user."""
+    messagebox.showinfo(title='PodcastTool', message=message)
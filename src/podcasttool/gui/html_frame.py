@@ -13,8 +13,6 @@ from functools import partial
 import tkinter as tk
 from tkinter import ttk
 
-import pyperclip
-
 from podcasttool import util
 from podcasttool import open_link
 from podcasttool import OS_SYSTEM
@@ -114,6 +112,8 @@ class HtmlFrame(tk.Frame):
 
     def _copy_html(self):
         """Copy the main page generated after the script is completed."""
+        import pyperclip
+
         with open(last_archive_created()) as html_file:
             pyperclip.copy(html_file.read())
         self.status('Copiato', 'RoyalBlue1')
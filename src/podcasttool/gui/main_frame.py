@@ -11,7 +11,8 @@ import regex
 # from PIL import Image, ImageTk
 
 from podcasttool import util
-from podcasttool import OS_SYSTEM, open_log
+from podcasttool import OS_SYSTEM
+from podcasttool.gui.dialogs import open_log
 
 LOGGER = logging.getLogger('podcast_tool.gui.main_core')
 
@@ -84,6 +85,7 @@ class LogFrame(tk.Frame):
         self._log_frame.grid_propagate(False)
 
         self._log_label = None
+        self._progress_labels = {}
 
         self._label_img = ttk.Label(self._log_frame, name='logo', width=500)
         # self._label_img.place(x=150, y=10)
@@ -127,6 +129,21 @@ class LogFrame(tk.Frame):
                                              sticky=tk.W)
         self.row_increment()
 
+    def display_progress(self, name: str, message: str):
+        """Display a message that gets updated in place, like a progress.
+
+        Arguments:
+            name {str} - name of the message to update.
+            message {str} - the new text of the message.
+        """
+        label = self._progress_labels.get(name)
+        if label is None:
+            label = ttk.Label(self._log_label, style='label.TLabel')
+            label.grid(column=0, row=self.row_number, sticky=tk.W)
+            self.row_increment()
+            self._progress_labels[name] = label
+        label.configure(text=message)
+
 
 class MainFrame(tk.Frame):
     """Main Core of the gui."""
@@ -147,6 +164,7 @@ class MainFrame(tk.Frame):
 
         self.podcast_obj = None
         self.confirm_button = None
+        self.plan_button = None
 
     @property
     def text_widget(self):
@@ -381,6 +399,7 @@ class MainFrame(tk.Frame):
             self.text_widget["state"] = "disabled"
             # self.log_frame.insert_img(get_image("ok"))
             self.confirm_button["state"] = "active"
+            self.plan_button["state"] = "active"
 
     def _refresh_frame(self):
         """Create the refresh button if there are any errors."""
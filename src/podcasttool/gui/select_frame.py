@@ -22,7 +22,7 @@ from datetime import datetime
 
 import regex
 
-from podcasttool import open_log
+from podcasttool.gui.dialogs import open_log
 from podcasttool import OS_SYSTEM
 
 
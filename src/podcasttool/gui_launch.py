@@ -1,9 +1,9 @@
 """GUI interface of PodcastTool."""
 import os
+import sys
 import logging
 import pathlib
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
 
 import tkinter as tk
 from tkinter import (
@@ -12,29 +12,37 @@ from tkinter import (
     filedialog
 )
 
+from podcasttool import gui
 from podcasttool.gui import (
     SelectPodcast,
     HtmlFrame,
-    AudioExport,
-    AudioIntro,
-    CatalogFrame,
     MainFrame,
-    DevFrame,
 )
 
+from podcasttool.gui.dialogs import (
+    open_log,
+    ask_user,
+    notify_user,
+    check_tk_version,
+)
+from podcasttool.jobs import JobRunner, FINAL_EVENTS
+from podcasttool.journal import Journal, journal_path
 from podcasttool import (
     util,
     OS_SYSTEM,
-    open_log,
+    check_dependencies,
     PodcastFile,
-    upload_to_server,
+    format_plan,
     generate_html,
-    check_server_path
+    check_server_paths
 )
 
 
 LOGGER = logging.getLogger('podcast_tool.gui')
 
+# milliseconds between the reads of the job events
+POLL_INTERVAL = 100
+
 
 def _set_directory():
     """Set which folder to open.
@@ -88,31 +96,28 @@ class MainPage(tk.Tk):
         self.clock = ttk.Label(_page_main)
         self.clock.place(x=5, y=0)
 
+        # the other tabs are built when they are selected the first time
         # audio page frame
-        _page_audio = ttk.Frame(window_main, width=1000, height=600)
-        _page_audio.grid(column=0, row=0)
-        _page_audio.grid_propagate(False)
-        window_main.add(_page_audio, text='Audio options')
-        AudioIntro(_page_audio).grid(column=0, row=0)
+        self._page_audio = ttk.Frame(window_main, width=1000, height=600)
+        self._page_audio.grid(column=0, row=0)
+        self._page_audio.grid_propagate(False)
+        window_main.add(self._page_audio, text='Audio options')
 
         # catalogo page frame
-        _page_catalog = ttk.Frame(window_main, width=1000, height=600)
-        _page_catalog.grid(column=0, row=0)
-        _page_catalog.grid_propagate(False)
-        window_main.add(_page_catalog, text='Catalogo Nomi')
+        self._page_catalog = ttk.Frame(window_main, width=1000, height=600)
+        self._page_catalog.grid(column=0, row=0)
+        self._page_catalog.grid_propagate(False)
+        window_main.add(self._page_catalog, text='Catalogo Nomi')
 
-        _page_dev = ttk.Frame(window_main, width=1000, height=600)
-        _page_dev.grid(column=0, row=0)
-        _page_dev.grid_propagate(False)
-        window_main.add(_page_dev, text='Extra')
+        self._page_dev = ttk.Frame(window_main, width=1000, height=600)
+        self._page_dev.grid(column=0, row=0)
+        self._page_dev.grid_propagate(False)
+        window_main.add(self._page_dev, text='Extra')
 
-        CatalogFrame(_page_catalog).grid(column=0, row=0)
-
-        self.dev = DevFrame(_page_dev)
-        self.dev.grid(column=0, row=0)
-
-        self.audio = AudioExport(_page_audio)
-        self.audio.grid(column=1, row=0, sticky=tk.N, padx=5)
+        self._audio = None
+        self._catalog = None
+        self._dev = None
+        window_main.bind('<<NotebookTabChanged>>', self._build_tab)
 
         self.html = HtmlFrame(_page_main)
         self.html.place(x=390, y=0)
@@ -124,20 +129,63 @@ class MainPage(tk.Tk):
 
         window_main.pack()
         self.podcast_obj = None
+        self._runner = None
+        self._parts_progress = {}
 
         self._conferm_btn = ttk.Button(_page_main, text='Conferma e procedi',
                                        state='disable', command=self._run)
         self._conferm_btn.place(x=105, y=65)
 
+        self._plan_btn = ttk.Button(_page_main, text='Anteprima',
+                                    state='disable', command=self._plan)
+        self._plan_btn.place(x=260, y=65)
+
         self._select_btn = ttk.Button(_page_main, text='Seleziona file',
                                       command=self.files_select)
         # self._select_btn.invoke()
         self._select_btn.focus_set()
         self._select_btn.place(x=5, y=65)
 
+        self._progress_bar = ttk.Progressbar(_page_main, length=370,
+                                             mode='determinate')
+        self._progress_bar.place(x=5, y=110)
+
+        self._cancel_btn = ttk.Button(_page_main, text='Annulla',
+                                      state='disable', command=self._cancel)
+        self._cancel_btn.place(x=5, y=140)
+
         self._labels_style()
         self.time()
 
+    def _build_tab(self, event):
+        """Build the content of a tab the first time it is selected."""
+        notebook = event.widget
+        page = notebook.nametowidget(notebook.select())
+        if page is self._page_audio:
+            self.audio
+        elif page is self._page_catalog and self._catalog is None:
+            self._catalog = gui.CatalogFrame(self._page_catalog)
+            self._catalog.grid(column=0, row=0)
+        elif page is self._page_dev:
+            self.dev
+
+    @property
+    def audio(self):
+        """Get the audio options frame, building its tab if needed."""
+        if self._audio is None:
+            gui.AudioIntro(self._page_audio).grid(column=0, row=0)
+            self._audio = gui.AudioExport(self._page_audio)
+            self._audio.grid(column=1, row=0, sticky=tk.N, padx=5)
+        return self._audio
+
+    @property
+    def dev(self):
+        """Get the extra options frame, building its tab if needed."""
+        if self._dev is None:
+            self._dev = gui.DevFrame(self._page_dev)
+            self._dev.grid(column=0, row=0)
+        return self._dev
+
     def time(self):
         """Clock label for the gui."""
         date = datetime.now().strftime("%d/%m %H:%M:%S")
@@ -155,6 +203,7 @@ class MainPage(tk.Tk):
         if open_files:
             self.main_class.podcast_obj = self.podcast_obj
             self.main_class.confirm_button = self._conferm_btn
+            self.main_class.plan_button = self._plan_btn
             self.main_class.insert_text()
             self._select_btn["state"] = "disable"
 
@@ -164,58 +213,170 @@ class MainPage(tk.Tk):
 
         display_msg = self.main_class.log_frame.display_msg
 
+        try:
+            renditions = self.audio.renditions
+        except ValueError as error:
+            messagebox.showerror(title="Renditions", message=str(error))
+            return
+
         if util.DEV_MODE:
             display_msg("dev mode ON")
 
         display_msg("Creazione podcast in corso...")
 
-        with ThreadPoolExecutor() as executor:
-            for file in self.main_class.proccesed_files():
-                self.update()
-
-                display_msg(file)
-
-                file_path = os.path.join(self.podcast_obj.path, file)
-                f1 = executor.submit(PodcastFile, file_path)
-                podcast = f1.result()
-                executor.submit(podcast.generate_podcast,)
-
-            self.update()
-
-        display_msg("Fatto!\n\nCaricamento podcast su server...")
-
-        check_path = list(podcast.files_to_upload())[0]["server_path"]
-        server_path = check_server_path(check_path, self.dev.test_env)
-
-        with ThreadPoolExecutor() as executor:
-            for file in podcast.files_to_upload():
-                self.update()
-                display_msg(os.path.basename(file['path']))
-                executor.submit(upload_to_server, file["path"], server_path)
-
+        files = []
+        for file in self.main_class.proccesed_files():
+            display_msg(file)
+            files.append(os.path.join(self.podcast_obj.path, file))
         self.update()
-        display_msg("Fatto!\n\nPagina html generata")
 
-        generate_html(podcast.html_page, self.dev.test_env)
+        server_paths = check_server_paths(files, self.dev.test_env,
+                                          ask=ask_user, notify=notify_user)
+        journal = self._journal()
 
-        self._conferm_btn["state"] = 'disable'
+        # the html page is planned from the wave headers so it can be
+        # previewed while the podcast is encoding
+        html_pages = PodcastFile.plan_html(
+            files, num_cuts=self.audio.watermark_num, journal=journal,
+            renditions=renditions, hls=self.audio.hls)
+        for archive_name, html_page in html_pages.items():
+            if not journal.done(archive_name, 'html'):
+                generate_html(html_page, self.dev.test_env)
+                journal.record(archive_name, 'html')
 
         self.html.copy_button = "normal"
         self.html.preview_button = "normal"
-        self.html.status('Pronto', 'green')
-
-        messagebox.showinfo(title="Done!", message="Done!", icon="info")
-
-    def _rename_files(self):
-        """Rename the wrong typed podcast names."""
+        display_msg("Pagina html generata\n\nCaricamento podcast su server...")
+
+        # every part and rendition is encoded and then uploaded, with HLS
+        # every planned segment is uploaded too
+        self._progress_bar.configure(
+            maximum=sum((1 + part.get('segment_count', 0)) * 2
+                        for html_page in html_pages.values()
+                        for part in html_page['parts'].values()),
+            value=0)
+        self._parts_progress = {}
+        self._conferm_btn["state"] = 'disable'
+        self._plan_btn["state"] = 'disable'
+        self._cancel_btn["state"] = 'normal'
+
+        # the parts are uploaded while the next ones are still generating.
+        # the work runs in background so the window keeps responding
+        self._runner = JobRunner()
+        self._runner.start(files, server_paths,
+                           journal=journal,
+                           bitrate=self.audio.bitrate,
+                           sample_rate=self.audio.sample_rate,
+                           num_cuts=self.audio.watermark_num,
+                           render=self.audio.render,
+                           snap_silence=self.audio.snap_silence,
+                           mono=self.audio.mono,
+                           renditions=renditions,
+                           hls=self.audio.hls)
+        self.after(POLL_INTERVAL, self._poll_job)
+
+    def _poll_job(self):
+        """Show the events of the running job and check if it has ended."""
+        for event in self._runner.poll():
+            if event.kind in FINAL_EVENTS:
+                self._job_ended(event)
+                return
+            self._show_event(event)
+        self.after(POLL_INTERVAL, self._poll_job)
+
+    def _show_event(self, event):
+        """Update the status of a part and the progress bar."""
+        log_frame = self.main_class.log_frame
+        if event.kind == 'encoded':
+            self._parts_progress[event.name] = 1.0
+            log_frame.display_progress(event.name, f'{event.name} creato')
+        elif event.kind == 'progress':
+            self._parts_progress[event.name] = 1 + event.data.percent / 100
+            log_frame.display_progress(event.name, str(event.data))
+        elif event.kind == 'uploaded':
+            self._parts_progress[event.name] = 2.0
+            log_frame.display_progress(event.name, f'{event.name} caricato')
+        # the planned segments are an estimate
+        self._progress_bar['value'] = min(sum(self._parts_progress.values()),
+                                          self._progress_bar['maximum'])
+
+    def _job_ended(self, event):
+        """Show the result of the job and enable the buttons again."""
+        display_msg = self.main_class.log_frame.display_msg
+        self._cancel_btn["state"] = 'disable'
+        self._plan_btn["state"] = 'normal'
+
+        if event.kind == 'done':
+            self._progress_bar['value'] = self._progress_bar['maximum']
+            display_msg("Fatto!")
+            self.html.status('Pronto', 'green')
+            messagebox.showinfo(title="Done!", message="Done!", icon="info")
+        elif event.kind == 'cancelled':
+            display_msg("Annullato.")
+            self._conferm_btn["state"] = 'normal'
+            self.html.status('Annullato', 'red')
+        else:
+            display_msg(f"Errore: {event.data}")
+            self._conferm_btn["state"] = 'normal'
+            open_log(msg="Errore durante la creazione del podcast."
+                         "\nControllare errors.log?")
+
+    def _cancel(self):
+        """Stop the running job as soon as possible."""
+        if self._runner and self._runner.running:
+            self._cancel_btn["state"] = 'disable'
+            self.main_class.log_frame.display_msg("Annullamento in corso...")
+            self._runner.cancel()
+
+    def _journal(self) -> Journal:
+        """Get the journal of the podcast folder.
+
+        If the previous run of the folder was interrupted, ask to resume it.
+        """
+        journal = Journal(journal_path(self.podcast_obj.path), resume=True)
+        if journal.unfinished() and messagebox.askyesno(
+                title='PodcastTool',
+                message=('Il lavoro precedente non è stato completato.'
+                         '\nVuoi riprenderlo?')):
+            return journal
+        return Journal(journal.path)
+
+    def _plan(self):
+        """Show the plan of every part without generating anything.
+
+        The plan uses the corrected names, but the files are renamed only
+        when the podcast is generated.
+        """
+        display_msg = self.main_class.log_frame.display_msg
+        for path, file in self._corrected_files():
+            podcast = PodcastFile(path, file_name=file)
+            summary = podcast.plan_summary(self.audio.bitrate,
+                                           self.audio.watermark_num,
+                                           self.audio.snap_silence)
+            display_msg(format_plan(summary))
+
+    def _corrected_files(self) -> list:
+        """Get the podcast files with the names corrected by the user.
+
+        Returns:
+            [list] - the path on disk and the corrected file name of each
+                     podcast file.
+        """
         old_names = self.podcast_obj.podcast_list
         new_names = self.main_class.proccesed_files()
+        files = []
         for old, new in zip(old_names, new_names):
-            if old.split("_")[-1:] == new.split("_")[-1:]:
-                if old != new:
-                    old_name = os.path.join(self.podcast_obj.path, old)
-                    new_name = os.path.join(self.podcast_obj.path, new)
-                    os.rename(old_name, new_name)
+            if old.split("_")[-1:] != new.split("_")[-1:]:
+                old = new
+            files.append((os.path.join(self.podcast_obj.path, old), new))
+        return files
+
+    def _rename_files(self):
+        """Rename the wrong typed podcast names."""
+        for old_name, new in self._corrected_files():
+            new_name = os.path.join(self.podcast_obj.path, new)
+            if old_name != new_name:
+                os.rename(old_name, new_name)
 
     @staticmethod
     def _labels_style():
@@ -235,6 +396,14 @@ class MainPage(tk.Tk):
 
 def run():
     """Run gui."""
+    check_tk_version()
+    try:
+        util.load_credentials()
+    except FileNotFoundError as error:
+        messagebox.showerror(message=error)
+        sys.exit()
+    check_dependencies(gui=True)
+
     try:
         app = MainPage()
         app.mainloop()
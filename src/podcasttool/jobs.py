@@ -0,0 +1,112 @@
+"""Run the generation and the upload of a batch in a background thread.
+
+The gui can't wait for a batch inside a Tk callback, because the window
+would stop responding until the end. The JobRunner does the work in its own
+thread and reports what happens as events on a thread safe queue, which the
+gui reads from the Tk main loop:
+
+    runner = JobRunner()
+    runner.start(paths, server_paths, journal=journal)
+    ...
+    for event in runner.poll():
+        print(event.kind, event.name, event.data)
+
+The kinds of event are:
+    encoded - the mp3 of a part is ready. name is the mp3 name.
+    progress - a block of a part has been uploaded. data is the UploadProgress.
+    uploaded - a part is on the server.
+    done - the batch is complete. data is the html page data of the lessons.
+    cancelled - the batch has been stopped by cancel().
+    error - the batch failed. data is the exception.
+
+Only one of done, cancelled and error is sent, as the last event.
+"""
+import queue
+import logging
+import threading
+
+from collections import namedtuple
+
+from podcasttool import podcasttools
+
+LOGGER = logging.getLogger('podcast_tool.jobs')
+
+Event = namedtuple('Event', ['kind', 'name', 'data'])
+
+FINAL_EVENTS = ('done', 'cancelled', 'error')
+
+
+class JobRunner:
+    """Background runner of generate_and_upload()."""
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def _send(self, kind: str, name=None, data=None):
+        self.events.put(Event(kind, name, data))
+
+    def _progress(self, tracker):
+        self._send('progress', tracker.file_name, tracker)
+
+    def _work(self, paths, server_paths, options):
+        try:
+            html_pages = podcasttools.generate_and_upload(
+                paths, server_paths, progress=self._progress,
+                on_event=self._send, cancel=self._cancel, **options)
+        except podcasttools.RunCancelled:
+            LOGGER.info('run cancelled')
+            self._send('cancelled')
+        except BaseException as error:
+            # also SystemExit, that would only end this thread silently
+            LOGGER.critical('run failed: %s', error, exc_info=True)
+            self._send('error', data=error)
+        else:
+            self._send('done', data=html_pages)
+
+    def start(self, paths, server_paths: dict, **options):
+        """Start the batch in a new thread.
+
+        Arguments:
+            paths {iterable} - paths of the raw podcast files.
+            server_paths {dict} - server path of each course path.
+            options - keyword arguments passed to generate_and_upload().
+        """
+        if self.running:
+            raise RuntimeError('the runner is already running a batch')
+
+        self._cancel.clear()
+        self._thread = threading.Thread(
+            target=self._work, args=(list(paths), server_paths, options),
+            name='podcast-job', daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Ask the batch to stop as soon as possible."""
+        LOGGER.debug('cancelling run')
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Check if the batch has been asked to stop."""
+        return self._cancel.is_set()
+
+    @property
+    def running(self) -> bool:
+        """Check if the batch thread is still working."""
+        return bool(self._thread) and self._thread.is_alive()
+
+    def poll(self) -> list:
+        """Get the events sent since the last call, without waiting."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def join(self, timeout=None):
+        """Wait for the batch thread to end."""
+        if self._thread:
+            self._thread.join(timeout)
@@ -0,0 +1,116 @@
+"""Journal of a batch run, used to resume it after a crash.
+
+Every stage completed by a part of the batch is appended as a json line to a
+journal file inside the podcast folder:
+
+    {"time": "...", "part": "Lezione_4_Parte_1_<md5>.mp3", "stage": "encoded"}
+
+The stages are:
+    parsed - the part has been planned from its wave header.
+    encoded - the final mp3 is in the mp3 folder.
+    uploaded - the mp3 is on the server.
+    html - the html page of the lesson has been generated. The part is the
+           lesson archive name.
+
+Each line is written and flushed at once, so a crash can only lose the
+line being written. That broken line is cut from the file when the journal
+is resumed, so the next line doesn't get appended to it.
+"""
+import os
+import json
+import logging
+import threading
+
+from datetime import datetime
+
+LOGGER = logging.getLogger('podcast_tool.journal')
+
+JOURNAL_NAME = '.podcast_journal.jsonl'
+
+STAGES = ('parsed', 'encoded', 'uploaded', 'html')
+
+
+def journal_path(directory: str) -> str:
+    """Get the journal file path of a podcast folder."""
+    return os.path.join(str(directory), JOURNAL_NAME)
+
+
+class Journal:
+    """Append only journal of the stages completed in a batch run.
+
+    Arguments:
+        path {str} - path of the journal file.
+
+    Keyword Arguments:
+        resume {bool} - if True keep the stages of the previous run, otherwise
+                        start a new journal (default: {False})
+    """
+
+    def __init__(self, path: str, resume=False):
+        self._path = str(path)
+        self._lock = threading.Lock()
+        self._stages = {}
+
+        if resume:
+            self._read()
+        elif os.path.exists(self._path):
+            LOGGER.debug('starting a new journal: %s', self._path)
+            os.remove(self._path)
+
+    @property
+    def path(self) -> str:
+        """Return the journal file path."""
+        return self._path
+
+    def _read(self):
+        """Load the stages recorded by the previous run."""
+        try:
+            with open(self._path) as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        LOGGER.warning('skipping broken journal line: %s',
+                                       line)
+                        continue
+                    self._stages.setdefault(entry['part'], set()).add(
+                        entry['stage'])
+        except FileNotFoundError:
+            LOGGER.debug('no journal to resume: %s', self._path)
+            return
+        self._truncate_tail()
+
+    def _truncate_tail(self):
+        """Cut the last line if a crash left it without its newline."""
+        with open(self._path, 'rb+') as journal_file:
+            data = journal_file.read()
+            if data and not data.endswith(b'\n'):
+                LOGGER.warning('cutting broken journal tail: %s',
+                               data[data.rfind(b'\n') + 1:])
+                journal_file.truncate(data.rfind(b'\n') + 1)
+
+    def record(self, part: str, stage: str):
+        """Append a completed stage of a part to the journal."""
+        if stage not in STAGES:
+            raise ValueError(f'unknown journal stage: {stage}')
+
+        line = json.dumps({'time': datetime.now().isoformat(),
+                           'part': part, 'stage': stage})
+        with self._lock:
+            with open(self._path, 'a') as journal_file:
+                journal_file.write(line + '\n')
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            self._stages.setdefault(part, set()).add(stage)
+        LOGGER.debug('journal: %s %s', part, stage)
+
+    def done(self, part: str, stage: str) -> bool:
+        """Check if a part has completed a stage."""
+        with self._lock:
+            return stage in self._stages.get(part, ())
+
+    def unfinished(self) -> bool:
+        """Check if the journal has parts that were not uploaded."""
+        with self._lock:
+            return any('parsed' in stages and 'uploaded' not in stages
+                       for stages in self._stages.values())
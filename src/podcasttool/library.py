@@ -0,0 +1,230 @@
+"""Persistent index of the audio library.
+
+The intro and watermark clips are searched by file name for every podcast
+part. Instead of walking `include/audio` each time, the library is described
+by a manifest saved inside it:
+
+    include/audio/.library/manifest.json
+
+Each mp3 of the library has an entry with its directory, size, modification
+time, sha1 hash, duration in ms, sample rate and channels. The manifest is
+updated incrementally: only the directories whose modification time changed
+are scanned again, and a file is hashed again only if its size or
+modification time changed. The clips generated by the app are added with
+add() as soon as they are saved.
+"""
+import os
+import json
+import logging
+import threading
+
+from tinytag import TinyTag, TinyTagException
+
+from podcasttool import util
+
+LOGGER = logging.getLogger('podcast_tool.library')
+
+MANIFEST_DIR = '.library'
+
+_LOCK = threading.RLock()
+_INDEX = None
+
+
+def library_dir() -> str:
+    """Get the audio library path."""
+    return str(util.get_path('include/audio'))
+
+
+def manifest_path() -> str:
+    """Get the manifest file path.
+
+    The manifest is inside a hidden directory so saving it doesn't change the
+    modification time of the library directory.
+    """
+    path = os.path.join(library_dir(), MANIFEST_DIR)
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, 'manifest.json')
+
+
+def _empty_manifest() -> dict:
+    return {'directories': {}, 'files': {}}
+
+
+def _load_manifest() -> dict:
+    """Read the manifest from disk or create an empty one."""
+    try:
+        with open(manifest_path()) as json_file:
+            return json.load(json_file)
+    except (FileNotFoundError, ValueError):
+        LOGGER.debug('audio library manifest not found or invalid')
+        return _empty_manifest()
+
+
+def _save_manifest(manifest: dict):
+    """Write the manifest in a temporary file and then rename it."""
+    path = manifest_path()
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as json_file:
+        json.dump(manifest, json_file, indent=True)
+    os.replace(tmp_path, path)
+
+
+def _scan_file(file_path: str, stat: os.stat_result) -> dict:
+    """Create the manifest entry of an audio file."""
+    LOGGER.debug('indexing audio file: %s', file_path)
+    entry = {
+        'path': os.path.relpath(os.path.dirname(file_path), library_dir()),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'sha1': util.file_hash(file_path),
+        'duration': None,
+        'sample_rate': None,
+        'channels': None,
+    }
+    try:
+        tag = TinyTag.get(file_path)
+    except (TinyTagException, OSError) as error:
+        LOGGER.warning('could not read audio info of %s: %s', file_path, error)
+    else:
+        if tag.duration is not None:
+            entry['duration'] = round(tag.duration * 1000)
+        entry['sample_rate'] = tag.samplerate
+        entry['channels'] = tag.channels
+    return entry
+
+
+def _is_current(entry: dict, stat: os.stat_result) -> bool:
+    return entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns
+
+
+def _scan_directory(manifest: dict, directory: str) -> list:
+    """Update the entries of the mp3 files inside a directory.
+
+    Returns:
+        [list] - the sub directories found.
+    """
+    relative = os.path.relpath(directory, library_dir())
+    files = manifest['files']
+    found = set()
+    sub_directories = []
+
+    with os.scandir(directory) as items:
+        for item in items:
+            if item.name.startswith('.'):
+                continue
+            if item.is_dir():
+                sub_directories.append(item.path)
+            elif item.name.endswith('mp3'):
+                found.add(item.name)
+                stat = item.stat()
+                entry = files.get(item.name)
+                if (not entry or entry['path'] != relative
+                        or not _is_current(entry, stat)):
+                    files[item.name] = _scan_file(item.path, stat)
+
+    for name in [name for name, entry in files.items()
+                 if entry['path'] == relative and name not in found]:
+        LOGGER.debug('removing audio file from library index: %s', name)
+        del files[name]
+
+    return sub_directories
+
+
+def refresh(full=False) -> dict:
+    """Update the manifest with the changes in the library.
+
+    Keyword Arguments:
+        full {bool} - if True check every directory, also the unchanged ones.
+                      Needed only if a file has been overwritten from outside
+                      the app. (default: {False})
+
+    Returns:
+        [dict] - the updated manifest.
+    """
+    global _INDEX
+    with _LOCK:
+        manifest = _INDEX or _load_manifest()
+        directories = manifest['directories']
+        changed = False
+
+        seen = set()
+        pending = [library_dir()]
+        while pending:
+            directory = pending.pop()
+            relative = os.path.relpath(directory, library_dir())
+            seen.add(relative)
+            mtime = os.stat(directory).st_mtime_ns
+            if full or directories.get(relative) != mtime:
+                pending.extend(_scan_directory(manifest, directory))
+                directories[relative] = mtime
+                changed = True
+            else:
+                # the directory is unchanged but its sub directories may not
+                pending.extend(os.path.join(library_dir(), known)
+                               for known in directories
+                               if known != '.'
+                               and (os.path.dirname(known) or '.') == relative)
+
+        for relative in set(directories) - seen:
+            LOGGER.debug('directory removed from library: %s', relative)
+            del directories[relative]
+            for name in [name for name, entry in manifest['files'].items()
+                         if entry['path'] == relative]:
+                del manifest['files'][name]
+            changed = True
+
+        if changed:
+            _save_manifest(manifest)
+        _INDEX = manifest
+        return manifest
+
+
+def index() -> dict:
+    """Get the entries of the library, with the file names as key.
+
+    The first call of each process checks the library for changes, the
+    next ones don't touch the filesystem.
+    """
+    with _LOCK:
+        manifest = _INDEX or refresh()
+        return manifest['files']
+
+
+def add(file_path: str):
+    """Add or update an audio file that has just been saved in the library.
+
+    Arguments:
+        file_path {str} - path of the audio file.
+    """
+    file_path = str(file_path)
+    with _LOCK:
+        manifest = _INDEX or refresh()
+        directory = os.path.dirname(file_path)
+        name = os.path.basename(file_path)
+        manifest['files'][name] = _scan_file(file_path, os.stat(file_path))
+        manifest['directories'][
+            os.path.relpath(directory, library_dir())] = \
+            os.stat(directory).st_mtime_ns
+        _save_manifest(manifest)
+
+
+def find(name: str):
+    """Get the full path of a library file from its name or None."""
+    entry = index().get(name)
+    if not entry:
+        return None
+    return os.path.normpath(os.path.join(library_dir(), entry['path'], name))
+
+
+def file_hash(file_path: str) -> str:
+    """Get the sha1 hash of an audio file.
+
+    If the file is in the library and has not changed, the hash comes from the
+    manifest, otherwise the file is hashed.
+    """
+    file_path = str(file_path)
+    entry = index().get(os.path.basename(file_path))
+    if entry and find(os.path.basename(file_path)) == os.path.normpath(
+            file_path) and _is_current(entry, os.stat(file_path)):
+        return entry['sha1']
+    return util.file_hash(file_path)
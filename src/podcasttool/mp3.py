@@ -0,0 +1,185 @@
+"""Join mp3 files at the frame level, without decoding them.
+
+An mp3 is a sequence of frames, each one with a 4 bytes header that tells
+its length. If the files have the same sample rate and channels, their
+frames can be written one after the other to get a single playable mp3:
+
+    [id3 tag][frames of file 1][frames of file 2]...
+
+The id3 tags and the xing/info frame of each file are dropped and one new
+id3 tag is written at the start. Only MPEG layer III is supported.
+
+Each file keeps the encoder delay and padding of its own encode, so every
+join adds a few milliseconds of silence.
+"""
+import os
+import logging
+
+LOGGER = logging.getLogger('podcast_tool.mp3')
+
+# kbps of each bitrate index of layer III, for MPEG 1 and for MPEG 2/2.5
+BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# sample rates of each version bits value
+SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG 1
+    2: (22050, 24000, 16000),  # MPEG 2
+    0: (11025, 12000, 8000),  # MPEG 2.5
+}
+
+ID3_FRAMES = {'album': 'TALB', 'artist': 'TPE1', 'title': 'TIT2'}
+
+
+def _frame_header(data, offset: int):
+    """Parse the frame header at offset.
+
+    Returns:
+        [tuple] - frame length, sample rate and channels or None if there is
+                  no valid layer III header.
+    """
+    if offset + 4 > len(data):
+        return None
+    byte1, byte2, byte3, byte4 = data[offset:offset + 4]
+    version = (byte2 >> 3) & 3
+    if byte1 != 0xFF or (byte2 & 0xE0) != 0xE0 or version == 1:
+        return None
+    if (byte2 >> 1) & 3 != 1:
+        return None
+
+    bitrate_index = byte3 >> 4
+    rate_index = (byte3 >> 2) & 3
+    if bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    bitrate = BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    padding = (byte3 >> 1) & 1
+    # MPEG 1 frames have 1152 samples, MPEG 2 and 2.5 have 576
+    samples = 144 if version == 3 else 72
+    channels = 1 if byte4 >> 6 == 3 else 2
+    return samples * bitrate // sample_rate + padding, sample_rate, channels
+
+
+def _id3_size(data) -> int:
+    """Get the size of the id3v2 tag at the start of data or 0."""
+    if data[:3] != b'ID3' or len(data) < 10:
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = size << 7 | byte & 0x7F
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _is_info_frame(data, offset: int, version_mpeg1: bool,
+                   channels: int) -> bool:
+    """Check if the frame at offset is a xing/info/vbri frame."""
+    if version_mpeg1:
+        side_info = 32 if channels == 2 else 17
+    else:
+        side_info = 17 if channels == 2 else 9
+    tag = data[offset + 4 + side_info:offset + 8 + side_info]
+    return (tag in (b'Xing', b'Info')
+            or data[offset + 36:offset + 40] == b'VBRI')
+
+
+def frames(data):
+    """Find the audio frames of an mp3.
+
+    The id3v2 tag and the xing/info frame are skipped. The search stops at
+    the first byte that is not a valid frame, like an id3v1 tag.
+
+    Arguments:
+        data {bytes} - the content of the mp3.
+
+    Yields:
+        [tuple] - offset, length, sample rate and channels of each frame.
+    """
+    offset = _id3_size(data)
+    first = True
+    while True:
+        header = _frame_header(data, offset)
+        if header is None:
+            break
+        length, sample_rate, channels = header
+        if offset + length > len(data):
+            LOGGER.debug('truncated mp3 frame at: %d', offset)
+            break
+
+        mpeg1 = sample_rate in SAMPLE_RATES[3]
+        if not (first and _is_info_frame(data, offset, mpeg1, channels)):
+            yield offset, length, sample_rate, channels
+        first = False
+        offset += length
+
+
+def id3_tag(tags: dict) -> bytes:
+    """Create an id3v2.4 tag with the text frames of tags.
+
+    Arguments:
+        tags {dict} - the album, artist and title of the mp3.
+
+    Returns:
+        [bytes] - the tag.
+    """
+    def syncsafe(size):
+        return bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+
+    body = b''
+    for key, value in tags.items():
+        text = b'\x03' + str(value).encode('utf-8')
+        body += (ID3_FRAMES[key].encode('ascii') + syncsafe(len(text))
+                 + b'\x00\x00' + text)
+    return b'ID3\x04\x00\x00' + syncsafe(len(body)) + body
+
+
+def concatenate(mp3_files: list, output: str, tags=None) -> int:
+    """Join mp3 files into a single mp3 frame by frame.
+
+    Arguments:
+        mp3_files {list} - paths of the mp3 to join, in order.
+        output {str} - path of the joined mp3.
+
+    Keyword Arguments:
+        tags {dict} - id3 tags of the joined mp3 (default: {None})
+
+    Raises:
+        ValueError - if the files have different sample rate or channels.
+
+    Returns:
+        [int] - the number of frames written.
+    """
+    audio_format = None
+    count = 0
+    tmp_output = f'{output}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_output, 'wb') as joined:
+            if tags:
+                joined.write(id3_tag(tags))
+
+            for mp3_file in mp3_files:
+                with open(mp3_file, 'rb') as mp3:
+                    data = mp3.read()
+                view = memoryview(data)
+
+                for offset, length, *file_format in frames(data):
+                    if audio_format is None:
+                        audio_format = file_format
+                    elif file_format != audio_format:
+                        raise ValueError(
+                            f'{os.path.basename(mp3_file)} is {file_format}, '
+                            f'expected sample rate and channels '
+                            f'{audio_format}')
+                    joined.write(view[offset:offset + length])
+                    count += 1
+    except ValueError:
+        os.remove(tmp_output)
+        raise
+
+    os.replace(tmp_output, output)
+    LOGGER.debug('joined %d mp3 files, %d frames: %s', len(mp3_files), count,
+                 output)
+    return count
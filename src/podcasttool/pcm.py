@@ -0,0 +1,265 @@
+"""PCM audio held in numpy arrays, an alternative to pydub for the merge.
+
+pydub keeps the audio in immutable bytes, so every slice and concatenation
+copies it. Here the audio is a numpy array of (frames, channels) samples,
+often a view over a memory mapped file:
+
+    - read_wav() and from_cache() map the frames of a wave file or of a
+      decoded audio cache entry without reading them. 24 bit frames are
+      the exception: they are widened to 32 bit in memory.
+    - read_converted() reads the cuts of a wave resampled on the fly, one
+      at a time.
+    - slicing a PcmAudio returns a view, nothing is copied.
+    - stream_pieces() converts the pieces to the part format one at a time,
+      so the merged part is never held in memory as a whole.
+
+The conversions follow the pydub ones sample by sample, so the merged PCM is
+byte identical to the pydub merge.
+
+Needs numpy, which is optional: import this module only for the numpy
+render mode.
+"""
+import os
+import wave
+import logging
+
+import numpy
+
+from podcasttool import audio
+
+LOGGER = logging.getLogger('podcast_tool.pcm')
+
+SAMPLE_TYPES = {1: numpy.int8, 2: numpy.dtype('<i2'), 4: numpy.dtype('<i4')}
+
+
+class PcmAudio:
+    """Audio frames held in a numpy array.
+
+    Arguments:
+        samples {numpy.ndarray} - signed samples with shape (frames,
+                                  channels).
+        frame_rate {int} - frame rate of the audio.
+    """
+
+    def __init__(self, samples, frame_rate: int):
+        self.samples = samples
+        self.frame_rate = int(frame_rate)
+
+    @property
+    def channels(self) -> int:
+        """Get the number of channels."""
+        return self.samples.shape[1]
+
+    @property
+    def sample_width(self) -> int:
+        """Get the bytes of each sample."""
+        return self.samples.dtype.itemsize
+
+    @property
+    def frame_count(self) -> int:
+        """Get the number of frames."""
+        return self.samples.shape[0]
+
+    @property
+    def raw_data(self) -> memoryview:
+        """Get the interleaved little endian samples."""
+        return memoryview(numpy.ascontiguousarray(self.samples)).cast('B')
+
+    def __getitem__(self, frames: slice):
+        """Get a view of a range of frames."""
+        return PcmAudio(self.samples[frames], self.frame_rate)
+
+    def _from_bytes(self, data: bytes, frame_rate=None, channels=None,
+                    sample_width=None):
+        """Create a new audio from raw samples like the ones of audioop."""
+        channels = channels or self.channels
+        samples = numpy.frombuffer(
+            data, SAMPLE_TYPES[sample_width or self.sample_width])
+        return PcmAudio(samples.reshape(-1, channels),
+                        frame_rate or self.frame_rate)
+
+    def set_channels(self, channels: int):
+        """Get the audio with a different number of channels.
+
+        Only mono to stereo and stereo to mono are supported, like pydub.
+        """
+        if channels == self.channels:
+            return self
+        if channels == 2 and self.channels == 1:
+            return PcmAudio(numpy.repeat(self.samples, 2, axis=1),
+                            self.frame_rate)
+        if channels == 1 and self.channels == 2:
+            mono = (self.samples[:, 0] * 0.5 + self.samples[:, 1] * 0.5)
+            return PcmAudio(
+                numpy.floor(mono).astype(self.samples.dtype)[:, None],
+                self.frame_rate)
+        raise ValueError(f'cannot convert {self.channels} channels to '
+                         f'{channels}')
+
+    def set_frame_rate(self, frame_rate: int):
+        """Get the audio resampled, with the same resampler of pydub."""
+        if frame_rate == self.frame_rate:
+            return self
+        data, _ = _audioop().ratecv(self.raw_data, self.sample_width,
+                                    self.channels, self.frame_rate,
+                                    frame_rate, None)
+        return self._from_bytes(data, frame_rate=frame_rate)
+
+    def set_sample_width(self, sample_width: int):
+        """Get the audio with a different sample width."""
+        if sample_width == self.sample_width:
+            return self
+        data = _audioop().lin2lin(self.raw_data, self.sample_width,
+                                  sample_width)
+        return self._from_bytes(data, sample_width=sample_width)
+
+    def apply_gain(self, volume_db: float):
+        """Get the audio with the volume changed by volume_db decibel.
+
+        The samples are clipped and rounded down, like pydub.
+        """
+        info = numpy.iinfo(self.samples.dtype)
+        gained = numpy.clip(self.samples * 10 ** (volume_db / 20),
+                            info.min, info.max)
+        return PcmAudio(numpy.floor(gained).astype(self.samples.dtype),
+                        self.frame_rate)
+
+
+def read_wav(wav_file: str) -> PcmAudio:
+    """Map the frames of a wave file.
+
+    16 and 32 bit frames are not read until they are used. 8 bit frames are
+    unsigned, so they are converted to signed like pydub. 24 bit frames are
+    read and widened to 32 bit like pydub, which keeps the 24 bit value in
+    the highest bytes.
+
+    Arguments:
+        wav_file {str} - path of the wave file.
+
+    Returns:
+        [PcmAudio] - the audio of the file.
+    """
+    wav_file = str(wav_file)
+    with wave.open(wav_file, 'rb') as reader:
+        params = reader.getparams()
+    if params.sampwidth not in (1, 2, 3, 4):
+        raise ValueError(f'unsupported sample width: {params.sampwidth}')
+    if not params.nframes:
+        # empty files can't be mapped
+        data = numpy.zeros(0, numpy.uint8)
+    else:
+        data = numpy.memmap(wav_file, numpy.uint8, mode='r',
+                            offset=audio.data_offset(wav_file),
+                            shape=(params.nframes * params.nchannels
+                                   * params.sampwidth,))
+    return PcmAudio(_frames(data, params.sampwidth, params.nchannels),
+                    params.framerate)
+
+
+def read_converted(wav_file: str, ranges: list, frame_rate: int,
+                   mono=False):
+    """Read the cuts of a wave file converted on the fly.
+
+    Like audio.read_converted(), the converted wave is never written and
+    only the cut being merged is in memory.
+
+    Arguments:
+        wav_file {str} - path of the wave file.
+        ranges {list} - list of (start, end) frames of each cut, in the
+                        frames of the converted audio.
+        frame_rate {int} - frame rate of the converted audio.
+
+    Keyword Arguments:
+        mono {bool} - downmix a stereo wave to mono (default: {False})
+
+    Yields:
+        [PcmAudio] - the audio of each cut.
+    """
+    with wave.open(str(wav_file), 'rb') as reader:
+        params = reader.getparams()
+    channels = 1 if mono and params.nchannels == 2 else params.nchannels
+
+    blocks = audio.convert_blocks(wav_file, frame_rate, mono)
+    for data in audio.read_cuts(blocks, ranges, channels * params.sampwidth):
+        yield PcmAudio(_frames(numpy.frombuffer(data, numpy.uint8),
+                               params.sampwidth, channels), frame_rate)
+
+
+def _frames(data, sample_width: int, channels: int):
+    """Get the signed samples of the raw frames of a wave.
+
+    Arguments:
+        data {numpy.ndarray} - the frames as bytes.
+        sample_width {int} - bytes of each sample.
+        channels {int} - number of channels.
+
+    Returns:
+        [numpy.ndarray] - the samples with shape (frames, channels), a view
+                          of data except for 8 and 24 bit frames.
+    """
+    if sample_width == 3:
+        return _widen_24bit(data.reshape(-1, channels, 3))
+    if sample_width == 1:
+        # 8bit wave are unsigned
+        return (data ^ 0x80).view(numpy.int8).reshape(-1, channels)
+    return data.view(SAMPLE_TYPES[sample_width]).reshape(-1, channels)
+
+
+def _audioop():
+    """Import audioop, the resampler of pydub.
+
+    Python 3.13 removed it from the standard library: the audioop-lts
+    package installs it back with the same name.
+    """
+    try:
+        import audioop
+    except ImportError:
+        raise ImportError('audioop not found, on Python 3.13 and later '
+                          'install audioop-lts') from None
+    return audioop
+
+
+def _widen_24bit(samples):
+    """Convert 24 bit samples, as (frames, channels, 3) bytes, to 32 bit.
+
+    Like pydub, the low byte is 0xff for the negative samples.
+    """
+    widened = numpy.empty(samples.shape[:2] + (4,), numpy.uint8)
+    widened[..., 1:] = samples
+    widened[..., 0] = numpy.where(samples[..., 2] > 0x7f, 0xff, 0)
+    return widened.view(SAMPLE_TYPES[4])[..., 0]
+
+
+def from_cache(entry: str, frame_rate: int, channels: int) -> PcmAudio:
+    """Map a raw 16bit entry of the decoded audio cache."""
+    if not os.path.getsize(entry):
+        # empty files can't be mapped
+        samples = numpy.zeros(0, SAMPLE_TYPES[2])
+    else:
+        samples = numpy.memmap(entry, SAMPLE_TYPES[2], mode='r')
+    return PcmAudio(samples.reshape(-1, channels), frame_rate)
+
+
+def stream_pieces(pieces, channels: int, frame_rate: int,
+                  sample_width: int):
+    """Convert audio pieces to the same format one at a time.
+
+    Like audio.stream_segments(), each piece is converted only when the next
+    chunk is asked, so it can go straight into the encoder, and its raw data
+    is the same of the pydub conversion.
+
+    Arguments:
+        pieces {iterable} - the PcmAudio to stream.
+        channels {int} - channels of the streamed audio.
+        frame_rate {int} - frame rate of the streamed audio.
+        sample_width {int} - bytes of each sample of the streamed audio.
+
+    Yields:
+        [memoryview] - the raw data of each piece.
+    """
+    LOGGER.debug('streaming pieces: %dHz %d channels %d bytes',
+                 frame_rate, channels, sample_width)
+    for piece in pieces:
+        yield (piece.set_channels(channels)
+               .set_frame_rate(frame_rate)
+               .set_sample_width(sample_width).raw_data)
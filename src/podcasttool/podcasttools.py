@@ -10,33 +10,86 @@ The name of the file is always formatted like this:
 """
 import os
 import sys
+import copy
+import json
 import math
+import time
 import wave
 import ftplib
 import shutil
 import hashlib
 import pathlib
 import logging
+import threading
 
-from datetime import datetime
-from tkinter import messagebox
+from datetime import datetime, timedelta
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    wait
+)
 
-import pydub
 import regex
-import yattag
 
 from podcasttool import util
+from podcasttool import audio
+from podcasttool import cache
+from podcasttool import mp3
+from podcasttool import encoder
+from podcasttool import silence
+from podcasttool import clip_store
+from podcasttool import library
+from podcasttool import ftp_pool
 
 LOGGER = logging.getLogger('podcast_tool.generate_podcast')
 
+UPLOAD_BLOCKSIZE = 64 * 1024
+UPLOAD_RETRIES = 3
+UPLOAD_WORKERS = 4
+# pydub: decode the audio with pydub and export the merged part.
+# ffmpeg: render the whole part with a single ffmpeg filter graph.
+# splice: encode only the podcast cuts and join them frame by frame with the
+#         library clips encoded once for each export profile.
+# numpy: merge the part in numpy arrays and pipe it into the encoder, needs
+#        numpy.
+RENDER_MODES = ('pydub', 'ffmpeg', 'splice', 'numpy')
+# seconds between the checks of a cancel request while the parts are encoding
+CANCEL_POLL = 0.2
+# HLS player of the browsers that can't play the playlists natively: only
+# Safari can. hls.js is served by the course server, like the flash audio
+# player, from the FONDERIE_HLS_PLUGIN url. FONDERIE_HLS_PLUGIN_SRI is the
+# optional subresource integrity hash of that exact file.
+HLS_PLAYER = """
+document.querySelectorAll('audio.virgil_hls').forEach(function (audio) {
+    if (!audio.canPlayType('application/vnd.apple.mpegurl')
+            && Hls.isSupported()) {
+        var hls = new Hls();
+        hls.loadSource(audio.getAttribute('src'));
+        hls.attachMedia(audio);
+    }
+});
+"""
+
 
-def check_server_path(server_path: str, test_env=False):
+class RunCancelled(Exception):
+    """The run has been cancelled before all the parts were done."""
+
+
+def check_server_path(server_path: str, test_env=False, pool=None,
+                      ask=None, notify=None):
     """Check if path on server exists otherwise ask user to create new.
 
     Arguments:
 
         server_path (str) path on the server to check
         test_env (bool)   if True, upload to test path
+        pool (FtpPool)    connections pool to use, if None use the default
+        ask (callable)    called with a question, returns True if the user
+                          wants to create the missing path. if None the path
+                          is not created
+        notify (callable) called with the message for the user when the app
+                          can't go on. if None the message is only logged
     """
     test_server_path = os.environ['FONDERIE_VIRGILTEST']
 
@@ -46,65 +99,154 @@ def check_server_path(server_path: str, test_env=False):
     server_path = server_path.replace("https://", "")
     LOGGER.debug("server path: %s", server_path)
 
-    with ftplib.FTP(os.environ['FONDERIE_HOST'],
-                    os.environ['FONDERIE_USER'],
-                    os.environ['FONDERIE_PASSWORD']) as ftp:
+    pool = pool or ftp_pool.default_pool()
+    with pool.connection() as ftp:
         try:
             ftp.cwd(server_path)
         except ftplib.error_perm as ftp_error:
             LOGGER.critical("error ftp connessione: %s", ftp_error)
 
-            user_prompt = messagebox.askyesno(
-                title='PodcastTool',
-                message=(f'Cartella {os.path.basename(server_path)} '
-                         'non esiste sul server\nVuoi crearla?'))
+            user_prompt = ask and ask(
+                f'Cartella {os.path.basename(server_path)} '
+                'non esiste sul server\nVuoi crearla?')
             if user_prompt:
                 LOGGER.debug('creating directory: %s', server_path)
                 ftp.mkd(server_path)
             else:
-                messagebox.showinfo(title='PodcastTool',
-                                    message=('Impossibile procedere.'
-                                             '\nCreare la cartella'
-                                             '\nmanualmente e riprovare'))
+                message = ('Impossibile procedere.'
+                           '\nCreare la cartella'
+                           '\nmanualmente e riprovare')
+                LOGGER.critical(message)
+                if notify:
+                    notify(message)
                 sys.exit('Exit App')
     return server_path
 
 
-def upload_to_server(uploading_file: str, server_path: str):
+class UploadProgress:
+    """Progress of a file upload, passed to the upload progress callback.
+
+    Arguments:
+        file_name {str} - name of the file that is uploading.
+        total {int} - size of the file in bytes.
+        offset {int} - bytes already on the server when the upload started.
+    """
+
+    def __init__(self, file_name: str, total: int, offset=0):
+        self.file_name = file_name
+        self.total = total
+        self.sent = offset
+        self._offset = offset
+        self._start = time.monotonic()
+
+    def update(self, block_size: int):
+        """Add the size of the block just sent."""
+        self.sent += block_size
+
+    @property
+    def percent(self) -> float:
+        """Get the percentage of the file on the server."""
+        return self.sent / self.total * 100 if self.total else 100.0
+
+    @property
+    def rate(self) -> float:
+        """Get the upload speed in bytes/sec of the current session."""
+        elapsed = time.monotonic() - self._start
+        return (self.sent - self._offset) / elapsed if elapsed else 0.0
+
+    @property
+    def eta(self) -> float:
+        """Get the seconds left to complete the upload."""
+        return (self.total - self.sent) / self.rate if self.rate else 0.0
+
+    def __str__(self):
+        eta = timedelta(seconds=round(self.eta))
+        return (f'{self.file_name} {self.percent:.0f}% '
+                f'{self.rate / 1024 / 1024:.2f}MB/s ETA {eta}')
+
+
+def _remote_size(ftp, file_name: str) -> int:
+    """Get the size of a file on the server or 0 if it doesnt exists."""
+    ftp.voidcmd('TYPE I')
+    try:
+        return ftp.size(file_name) or 0
+    except ftplib.error_perm:
+        return 0
+
+
+def upload_to_server(uploading_file: str, server_path: str, pool=None,
+                     blocksize=UPLOAD_BLOCKSIZE, progress=None, resume=False,
+                     retries=UPLOAD_RETRIES):
     """Upload podcast file to server.
 
+    If the connection drops during the upload, the upload restarts from the
+    bytes already on the server instead of from zero.
+
     Arguments:
 
         str uploading_file path of the file to upload
         str server_path    path on the server where to upload the file
+        FtpPool pool       connections pool to use, if None use the default
+        int blocksize      bytes sent at each block
+        callable progress  called after each block with an UploadProgress
+        bool resume        if True, resume also a partial file left on the
+                           server by a previous run
+        int retries        how many times to resume a dropped upload
     """
-    with ftplib.FTP(os.environ['FONDERIE_HOST'],
-                    os.environ['FONDERIE_USER'],
-                    os.environ['FONDERIE_PASSWORD']) as ftp:
-        ftp.cwd(server_path)
-        with open(uploading_file, 'rb') as upload:
-            LOGGER.debug('uploading file on server: %s', uploading_file)
-            # if user is me then app will NOT upload to server
-            if not util.DEV_MODE:
-                file_name = os.path.basename(uploading_file)
-                status = ftp.storbinary(f'STOR {file_name}', upload)
-                status_sub = regex.sub(
-                    r'226|-|\(measured here\)|\n', '', str(status))
-                LOGGER.info(status_sub)
-                LOGGER.debug('status: %s', status_sub)
-                LOGGER.debug('uploaded file to server: %s', file_name)
-            else:
-                LOGGER.info('FAKE UPLOAD: %s in %s', uploading_file, ftp.pwd())
+    pool = pool or ftp_pool.default_pool()
+    file_name = os.path.basename(uploading_file)
+    total = os.path.getsize(uploading_file)
 
+    for attempt in range(retries + 1):
+        try:
+            with pool.connection() as ftp:
+                ftp.cwd(server_path)
+                LOGGER.debug('uploading file on server: %s', uploading_file)
+                # if user is me then app will NOT upload to server
+                if util.DEV_MODE:
+                    LOGGER.info('FAKE UPLOAD: %s in %s',
+                                uploading_file, ftp.pwd())
+                    return
+
+                offset = 0
+                if resume or attempt:
+                    offset = _remote_size(ftp, file_name)
+                    if offset == total:
+                        LOGGER.info('file already on server: %s', file_name)
+                        return
+                    if offset > total:
+                        offset = 0
+                LOGGER.debug('upload offset: %d/%d', offset, total)
+
+                tracker = UploadProgress(file_name, total, offset)
+
+                def callback(block):
+                    tracker.update(len(block))
+                    if progress:
+                        progress(tracker)
+
+                with open(uploading_file, 'rb') as upload:
+                    upload.seek(offset)
+                    status = ftp.storbinary(f'STOR {file_name}', upload,
+                                            blocksize, callback,
+                                            rest=offset or None)
+        except (OSError, EOFError, ftplib.error_temp) as error:
+            if attempt == retries:
+                raise
+            LOGGER.warning('upload of %s interrupted: %s. resuming...',
+                           file_name, error)
+        else:
+            break
 
-class PodcastFile:
-    """Construct method for the PodcastFile class.
+    status_sub = regex.sub(r'226|-|\(measured here\)|\n', '', str(status))
+    LOGGER.info(status_sub)
+    LOGGER.debug('status: %s', status_sub)
+    LOGGER.debug('uploaded file to server: %s', file_name)
 
-        Arguments:
 
-            raw_podcast {string} -- full path like string of the podcast file.
-    """
-    _html_page = {
+def _empty_html_page() -> dict:
+    """Create the html page data structure of a podcast."""
+    return {
         "archive_name": "",
         "registration_date": "",
         "course_name": "",
@@ -113,10 +255,77 @@ class PodcastFile:
         "parts": {}
     }
 
-    def __init__(self, raw_podcast: str):
+
+class LessonPage:
+    """Collect the html page data of all the parts of a lesson.
+
+    Every PodcastFile has only the data of its own part. The parts can be
+    added from different threads, or from the results of worker processes,
+    and the lesson page is then produced once with all of them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._html_page = _empty_html_page()
+
+    def add_part(self, html_page: dict):
+        """Merge the html page data of a podcast part.
+
+        Arguments:
+            html_page {dict} - the html page data of a PodcastFile.
+        """
+        with self._lock:
+            for key, value in html_page.items():
+                if key != "parts" and value:
+                    self._html_page[key] = value
+
+            for part, part_info in html_page["parts"].items():
+                self._html_page["parts"].setdefault(part, {}).update(part_info)
+
+    @property
+    def html_page(self) -> dict:
+        """Get a copy of the lesson html page data with all the parts."""
+        with self._lock:
+            return copy.deepcopy(self._html_page)
+
+    def files_to_upload(self):
+        """Return the information of all the parts of the lesson."""
+        return self.html_page["parts"].values()
+
+
+def _generate_part(raw_podcast: str, options: dict) -> dict:
+    """Generate a single podcast part inside a worker process.
+
+    Arguments:
+        raw_podcast {str} - path of the raw podcast file.
+        options {dict} - keyword arguments for generate_podcast().
+
+    Returns:
+        [dict] - the html page data of the generated part.
+    """
+    podcast = PodcastFile(raw_podcast)
+    podcast.generate_podcast(**options)
+    return podcast.html_page
+
+
+class PodcastFile:
+    """Construct method for the PodcastFile class.
+
+        Arguments:
+
+            raw_podcast {string} -- full path like string of the podcast file.
+
+        Keyword Arguments:
+
+            file_name {string} -- the podcast file name, when it is not the
+                                  name on disk yet, e.g. a typo corrected by
+                                  the user (default: {None})
+    """
+    def __init__(self, raw_podcast: str, file_name=None):
         LOGGER.debug('Initialize PodcastFile class ->')
 
-        self.__name, _ = os.path.splitext(os.path.basename(raw_podcast))
+        self.__name, _ = os.path.splitext(
+            os.path.basename(file_name or raw_podcast))
         self._check_valid_file(self.__name + ".wav")
 
         # podcast names have always this structure:
@@ -132,6 +341,8 @@ class PodcastFile:
 
         self._course_path = None
         self._audio_intro = None
+        self._planned_duration_ms = 0
+        self._html_page = _empty_html_page()
 
     def __iter__(self):
         """Return all elements of the podcast file.
@@ -175,14 +386,7 @@ class PodcastFile:
             {int} - return in ms of the lenght audio
 
         """
-        try:
-            with wave.open(self.__abspath, 'rb') as wave_file:
-                nframe = wave_file.getnframes()
-                rframe = wave_file.getframerate()
-        except Exception as error:
-            LOGGER.critical('%s - probably not a wave file!', error)
-            # TODO: need to show the message to user
-            sys.exit()
+        nframe, rframe = self._wave_header()
 
         # amount in seconds
         total_float_seconds = nframe / rframe
@@ -192,6 +396,27 @@ class PodcastFile:
         LOGGER.debug("total_float_seconds %f", total_float_seconds)
         return total_ms
 
+    def _wave_header(self):
+        """Read the number of frames and the frame rate from the wave header.
+
+        Returns:
+            {tuple} - number of frames and frame rate of the audio.
+        """
+        try:
+            with wave.open(self.abspath, 'rb') as wave_file:
+                nframe = wave_file.getnframes()
+                rframe = wave_file.getframerate()
+        except Exception as error:
+            LOGGER.critical('%s - probably not a wave file!', error)
+            # TODO: need to show the message to user
+            sys.exit()
+        return nframe, rframe
+
+    @property
+    def frame_rate(self):
+        """Get the frame rate of the raw podcast from the wave header."""
+        return self._wave_header()[1]
+
     @staticmethod
     def _check_valid_file(filename):
         """If calling this class by CLI then needs to check whetever the file
@@ -228,9 +453,10 @@ class PodcastFile:
 
     @property
     def html_page(self) -> dict:
-        """Get the podcast html information from class dictionary data.
+        """Get the podcast html information of this podcast part.
 
         The html informations is needed for generating the podcast page.
+        The parts of a lesson are collected together by a LessonPage.
         If need parts is better to call files_to_upload().
         Structure of the dict:
             "archive_name": "",
@@ -286,6 +512,9 @@ class PodcastFile:
     @property
     def course_path(self):
         """Get the parent folder of the podcast course."""
+        if self._course_path is None:
+            # the course path is found together with the course name
+            self.course_name
         LOGGER.debug("course path: %s", self._course_path)
         return os.path.join(os.environ['FONDERIE_PODCAST'], self._course_path)
 
@@ -362,6 +591,11 @@ class PodcastFile:
         LOGGER.debug('formatted part: \"%sª\"', part)
         return part + 'ª'
 
+    @property
+    def part_key(self):
+        """Get the part name used as key in the html page parts."""
+        return ' '.join(self._splitted_name[-2:]).title()
+
     @property
     def hash_name(self):
         """Create a hash name.
@@ -396,12 +630,77 @@ class PodcastFile:
         Argument:
             update_dict [dict] - a dictionary to add in class data dictionary.
         """
-        part = ' '.join(self._splitted_name[-2:]).title()
+        part = self.part_key
         if self.html_page['parts'].get(part):
             self.html_page['parts'][part].update(update_dict)
         else:
             self.html_page['parts'].update({part: update_dict})
 
+    def rendition_name(self, bitrate, sample_rate) -> str:
+        """Get the upload name of an extra rendition of the part.
+
+        It is the hash name with the bitrate and the sample rate, e.g.
+        Lezione_4_Parte_1_<md5>_128k_44100.mp3.
+        """
+        name, extension = os.path.splitext(self.hash_name)
+        return f'{name}_{bitrate}_{sample_rate}{extension}'
+
+    def output_names(self, renditions=(), hls=False) -> list:
+        """Get the upload names of the part and of its extra renditions.
+
+        They are the names the journal records every stage of the part
+        under: the HLS playlists with hls.
+
+        Keyword Arguments:
+            renditions {iterable} - the (bitrate, sample_rate) of each extra
+                                    rendition (default: {()})
+            hls {bool} - the names of the HLS playlists (default: {False})
+
+        Returns:
+            [list] - the name of the part, then the renditions.
+        """
+        names = [self.hash_name] + [self.rendition_name(*rendition)
+                                    for rendition in renditions]
+        if hls:
+            names = [encoder.hls_playlist(name) for name in names]
+        return names
+
+    def rendition_key(self, bitrate, sample_rate) -> str:
+        """Get the html page parts key of an extra rendition of the part."""
+        return f'{self.part_key} {bitrate} {sample_rate}Hz'
+
+    def add_renditions(self, renditions):
+        """Add the html page data of the extra renditions of the part.
+
+        Every rendition is a part of its own in the html page, with the same
+        duration of the part, so it gets its own link and its own upload.
+
+        Arguments:
+            renditions {iterable} - the (bitrate, sample_rate) of each extra
+                                    rendition.
+        """
+        duration = self.html_page['parts'].get(self.part_key, {}).get(
+            'duration')
+        for bitrate, sample_rate in renditions:
+            self.html_page['parts'][self.rendition_key(
+                bitrate, sample_rate)] = {
+                    "duration": duration,
+                    "server_path": self.course_path,
+                    "link": os.path.join(
+                        self.course_path,
+                        self.rendition_name(bitrate, sample_rate))}
+
+    def use_playlists(self):
+        """Point the links of the part and its renditions at HLS playlists.
+
+        Every part gets also the planned number of its segments, used to
+        show the upload progress before the segments are written.
+        """
+        segment_count = encoder.segment_count(self._planned_duration_ms)
+        for part in self.html_page['parts'].values():
+            part['link'] = encoder.hls_playlist(part['link'])
+            part['segment_count'] = segment_count
+
     def set_audio_intro(self):
         """Set the intro audio from the list in the catalog_names json file."""
         self.audio_intro = util.catalog_names()["intro"]
@@ -427,11 +726,11 @@ class PodcastFile:
             "$VAR{part_number}": self.part_number,
         }
         new_intro = []
-        for audio in value:
-            if audio in const_dict:
-                new_intro.append(const_dict[audio])
+        for audio_file in value:
+            if audio_file in const_dict:
+                new_intro.append(const_dict[audio_file])
             else:
-                new_intro.append(audio)
+                new_intro.append(audio_file)
 
         self._audio_intro = new_intro
 
@@ -456,103 +755,790 @@ class PodcastFile:
 
         return tmp_dir_path
 
-    def generate_podcast(self, bitrate='64k', sample_rate='22050',
-                         num_cuts=None):
-        """Generate final file to be uploaded to the server.
+    @classmethod
+    def generate_many(cls, paths, workers=None, on_part=None, cancel=None,
+                      **options) -> dict:
+        """Generate many podcast parts in parallel with a pool of processes.
+
+        Each part is generated in its own process so the audio work is not
+        limited by the GIL. The parts can be from different lessons.
+
+        Arguments:
+            paths {iterable} - paths of the raw podcast files.
 
         Keyword Arguments:
+            workers {int} - number of processes. if None uses the number of
+                            cpu (default: {None})
+            on_part {callable} - called with the html page data of each part
+                                 as soon as it is generated (default: {None})
+            cancel {threading.Event} - when set, the parts not started yet
+                                       are dropped and RunCancelled is raised.
+                                       The parts already encoding finish in
+                                       background (default: {None})
+            options - keyword arguments passed to generate_podcast().
 
-            bitrate {str} - - specify bitrate(default: {'64k'})
-            sample_rate {str} - - specify sample rate(default: {'22050'})
-            num_cuts {str} - - how many cuts in audio(default: {None})
+        Returns:
+            [dict] - html page data of each lesson, with the archive name as
+                     key. Parts of the same lesson are merged together.
+        """
+        lessons = {}
+        executor = ProcessPoolExecutor(max_workers=workers)
+        pending = {executor.submit(_generate_part, str(path), options)
+                   for path in sorted(paths)}
+        try:
+            while pending:
+                done, pending = wait(pending,
+                                     timeout=CANCEL_POLL if cancel else None,
+                                     return_when=FIRST_COMPLETED)
+                if cancel and cancel.is_set():
+                    raise RunCancelled('podcast generation cancelled')
+
+                for future in done:
+                    part_page = future.result()
+                    LOGGER.debug('generated part: %s', part_page['parts'])
+
+                    lesson = lessons.setdefault(part_page['archive_name'],
+                                                LessonPage())
+                    lesson.add_part(part_page)
+
+                    if on_part:
+                        on_part(part_page)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=not (cancel and cancel.is_set()))
+
+        return {name: lesson.html_page for name, lesson in lessons.items()}
+
+    @classmethod
+    def plan_html(cls, paths, num_cuts=None, journal=None,
+                  renditions=None, hls=False) -> dict:
+        """Get the html page data of the podcasts without generating them.
+
+        Arguments:
+            paths {iterable} - paths of the raw podcast files.
+
+        Keyword Arguments:
+            num_cuts {int} - how many cuts in audio (default: {None})
+            journal {Journal} - journal where to record the parsed parts,
+                                under their output names (default: {None})
+            renditions {iterable} - (bitrate, sample_rate) of each extra
+                                    rendition of the parts (default: {None})
+            hls {bool} - link the HLS playlists instead of the mp3
+                         (default: {False})
+
+        Returns:
+            [dict] - html page data of each lesson, with the archive name as
+                     key, like generate_many().
+        """
+        lessons = {}
+        for path in sorted(paths):
+            podcast = cls(str(path))
+            podcast.plan(num_cuts)
+            podcast.add_renditions(renditions or ())
+            for name in podcast.output_names(renditions or (), hls):
+                if journal and not journal.done(name, 'parsed'):
+                    journal.record(name, 'parsed')
+            if hls:
+                podcast.use_playlists()
+            lesson = lessons.setdefault(podcast.html_page['archive_name'],
+                                        LessonPage())
+            lesson.add_part(podcast.html_page)
+        return {name: lesson.html_page for name, lesson in lessons.items()}
+
+    def plan(self, num_cuts=None, snap_silence=False) -> list:
+        """Plan the podcast without decoding any audio.
+
+        Set the audio intro with the podcast cuts and the watermarks, and the
+        html page data of the part. The cuts are calculated from the wave
+        header and the duration of the final part from the cuts and the
+        duration of the library audio in the manifest.
+
+        Keyword Arguments:
+            num_cuts {int} - how many cuts in audio (default: {None})
+            snap_silence {bool} - move the cuts to the nearest silence. The
+                                  frames are read but the total duration
+                                  doesn't change (default: {False})
+
+        Returns:
+            [list] - the frame range of each podcast cut.
         """
-        tmp_dir = self._mkdir_tmp()
         self.set_audio_intro()
 
-        def _split_raw_podcast():
-            watermark = util.catalog_names()["watermark"]
-            LOGGER.debug("watermark audio: %s", watermark)
+        watermark = util.catalog_names()["watermark"]
+        LOGGER.debug("watermark audio: %s", watermark)
+
+        # the podcast is never loaded in memory: the cuts are calculated
+        # from the wave header.
+        podcast_length = len(self)
+        cuts = num_cuts or util.calculate_cuts(podcast_length)
+        LOGGER.debug("splitting podcast in: [%s] parts", cuts)
+
+        cut_each = math.ceil(podcast_length / cuts)
+        ranges = audio.cut_ranges(podcast_length, self.frame_rate, cut_each)
+        if snap_silence:
+            ranges = silence.snap_cuts(self.abspath, ranges)
+
+        for _ in ranges:
+            self._audio_intro.append("podcast_segment")
+            self._audio_intro.append(watermark)
+
+        duration = self._planned_duration(ranges)
+        self._planned_duration_ms = duration
+        self.add_html_parts({"duration": util.audio_duration(duration)})
+        # the hash name sets the link of the part
+        LOGGER.debug("planned part: %s", self.hash_name)
+        return ranges
+
+    def plan_summary(self, bitrate='64k', num_cuts=None,
+                     snap_silence=False) -> dict:
+        """Get the plan of the final part for a dry run.
+
+        Nothing is decoded: the plan comes from the wave header, the catalog
+        and the library manifest.
+
+        Keyword Arguments:
+            bitrate {str} - bitrate of the final mp3 (default: {'64k'})
+            num_cuts {int} - how many cuts in audio (default: {None})
+            snap_silence {bool} - move the cuts to the nearest silence
+                                  (default: {False})
+
+        Returns:
+            [dict] - cuts, cut offsets in ms, intro sequence, upload name,
+                     server path, duration and predicted size in bytes.
+        """
+        ranges = self.plan(num_cuts, snap_silence)
+        duration = self._planned_duration(ranges)
+        kbps = int(regex.match(r'\d+', str(bitrate)).group())
+        return {
+            "name": self.name,
+            "cuts": len(ranges),
+            "offsets": [round(start * 1000 / self.frame_rate)
+                        for start, _ in ranges],
+            "intro": list(self.audio_intro),
+            "hash_name": self.hash_name,
+            "server_path": self.course_path,
+            "duration": util.audio_duration(duration),
+            "size": duration * kbps // 8,
+        }
+
+    def _planned_duration(self, ranges) -> int:
+        """Get the duration in ms of the final part from the planned audio.
+
+        Library audio that is missing from the manifest is skipped, like it
+        is skipped when merging.
+        """
+        cuts = iter(ranges)
+        manifest = library.index()
+        duration = 0.0
+        for clip in self._audio_intro:
+            if clip == "podcast_segment":
+                start, end = next(cuts)
+                duration += (end - start) * 1000 / self.frame_rate
+                continue
+
+            entry = manifest.get(clip.replace(' ', '_') + '.mp3')
+            if entry and entry['duration']:
+                duration += entry['duration']
+        return round(duration)
+
+    def _fits_in_memory(self) -> bool:
+        """Check if there is enough free memory to generate the podcast.
+
+        The in memory pipeline streams the part a cut at a time, but a cut
+        and its converted copies can be as large as the whole wave with a
+        single cut, so it needs a few times the size of the wave. The page
+        cache that can be reclaimed counts as available, see
+        util.available_memory(). If the available memory is unknown it
+        assumes there is enough.
+        """
+        needed = os.path.getsize(self.abspath) * 3
+        available = util.available_memory()
+        LOGGER.debug("memory needed: %s available: %s", needed, available)
+        return available is None or available > needed
+
+    @staticmethod
+    def _record_path(mp3_file: str) -> str:
+        """Get the path of the record saved next to a generated mp3."""
+        directory, name = os.path.split(mp3_file)
+        return os.path.join(directory, f'.{name}.json')
+
+    def _read_output_record(self, mp3_file: str) -> dict:
+        """Read the record of a generated mp3 or None if it doesnt exists."""
+        if not os.path.exists(mp3_file):
+            return None
+        try:
+            with open(self._record_path(mp3_file)) as json_file:
+                return json.load(json_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_output_record(self, mp3_file: str, record: dict):
+        """Save the record of a generated mp3."""
+        with open(self._record_path(mp3_file), 'w') as json_file:
+            json.dump(record, json_file, indent=True)
 
-            podcast = pydub.AudioSegment.from_wav(self.abspath)
-            cuts = (util.calculate_cuts(len(podcast))
-                    if not num_cuts else num_cuts)
-            LOGGER.debug("splitting podcast in: [%s] parts", cuts)
+    def _wav_hash(self, previous: dict) -> str:
+        """Get the hash of the raw podcast content.
 
-            cut_each = math.ceil(len(podcast) / cuts)
-            podcast_parts = podcast[::cut_each]
+        The wave is hashed in blocks, without decoding it. If the file has
+        not changed since the previous record, its hash is reused.
+        """
+        stat = os.stat(self.abspath)
+        if (previous and previous['wav']['size'] == stat.st_size
+                and previous['wav']['mtime'] == stat.st_mtime_ns):
+            return previous['wav']['sha1']
+        return util.file_hash(self.abspath)
+
+    def _output_record(self, ranges, bitrate, sample_rate, render='pydub',
+                       mono=False, previous=None, part_rate=None) -> dict:
+        """Create the record that identifies the content of the final mp3.
+
+        The key is the hash of everything that goes in the mp3: the raw
+        podcast, the intro sequence with the watermarks, the library audio
+        and the export settings with the render mode. If any of them
+        changes, so does the key. part_rate is the frame rate the part was
+        assembled at, when it is not the sample rate of the mp3.
+        """
+        stat = os.stat(self.abspath)
+        wav_hash = self._wav_hash(previous)
+
+        manifest = library.index()
+        clips = [manifest.get(clip.replace(' ', '_') + '.mp3', {}).get('sha1')
+                 for clip in self._audio_intro]
+        content = [wav_hash, self._audio_intro, clips,
+                   [list(cut) for cut in ranges],
+                   str(bitrate), str(sample_rate), render, mono]
+        if part_rate and int(part_rate) != int(sample_rate):
+            content.append(int(part_rate))
+        content = json.dumps(content)
+        return {
+            'key': hashlib.sha1(content.encode('utf-8')).hexdigest(),
+            'wav': {'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                    'sha1': wav_hash},
+        }
 
-            n_parts = len(self._audio_intro)
-            for part in podcast_parts:
-                export_name = f"{tmp_dir}/{n_parts}-podcast-segment.wav"
-                part.export(export_name, parameters=["-ar", sample_rate],
-                            format="wav", bitrate=bitrate)
+    def generate_podcast(self, bitrate='64k', sample_rate='22050',
+                         num_cuts=None, in_memory=None, render='pydub',
+                         snap_silence=False, mono=False, renditions=None,
+                         hls=False):
+        """Generate final file to be uploaded to the server.
 
-                self._audio_intro.append("podcast_segment")
-                self._audio_intro.append(watermark)
+        The raw podcast is converted to the export sample rate, and to mono
+        if asked, in a single streaming pass, so the later stages work on
+        audio that is already in the final format.
+
+        By default the podcast is cut while it is converted and the cuts and
+        the library audio go straight to the merge in memory: nothing is
+        written on disk but the mp3. If there is not enough memory, the
+        converted podcast and its segments are written in a temporary
+        directory and read back instead. Either way the merged audio is
+        piped into the mp3 encoder, a segment at a time, without writing it
+        in a temporary file.
+        With the ffmpeg render mode the whole part is rendered by a single
+        ffmpeg process instead, see the encoder module. With the splice
+        render mode only the podcast cuts are encoded and the library clips
+        come already encoded from the clip store. With the numpy render mode
+        the part is merged in numpy arrays of the podcast cuts and of the
+        decoded audio cache, see the pcm module.
+
+        With renditions, the part is also exported with other bitrates and
+        sample rates in the same pass: it is assembled once, at the highest
+        sample rate, and then a single ffmpeg process encodes all the mp3
+        in parallel. Every rendition is a part of its own in the html page,
+        see add_renditions().
+
+        With hls, every mp3 is written instead as short mpeg-ts segments and
+        an HLS playlist, by the same encoder, and the html page links the
+        playlists so the players can start and seek without downloading the
+        whole part. Only the pydub and numpy render modes assemble the part,
+        so only they make renditions and HLS.
+
+        If the mp3 was already generated from the same audio and settings, it
+        is reused without encoding it again.
 
-                n_parts += 2
+        Keyword Arguments:
+
+            bitrate {str} - - specify bitrate(default: {'64k'})
+            sample_rate {str} - - specify sample rate(default: {'22050'})
+            num_cuts {str} - - how many cuts in audio(default: {None})
+            in_memory {bool} - - keep the segments in memory instead of the
+                                 temporary directory. if None then check
+                                 the free memory(default: {None})
+            render {str} - - one of RENDER_MODES(default: {'pydub'})
+            snap_silence {bool} - - move the cuts to the nearest
+                                    silence(default: {False})
+            mono {bool} - - downmix the podcast to mono(default: {False})
+            renditions {iterable} - - (bitrate, sample_rate) of each extra
+                                      rendition of the part(default: {None})
+            hls {bool} - - write HLS segments and playlist instead of the
+                           mp3(default: {False})
+        """
+        if render not in RENDER_MODES:
+            raise ValueError(f'unknown render mode: {render}')
+        renditions = [(str(extra_bitrate), str(extra_rate))
+                      for extra_bitrate, extra_rate in renditions or ()]
+        if (renditions or hls) and render not in ('pydub', 'numpy'):
+            raise ValueError(f'the {render} render mode makes only one mp3, '
+                             'without renditions or HLS')
+
+        ranges = self.plan(num_cuts, snap_silence)
+        self.add_renditions(renditions)
+        # the frame rate the part is assembled at: each encoder resamples it
+        # to the sample rate of its own rendition
+        part_rate = max(int(rate) for _, rate in
+                        [(bitrate, sample_rate)] + renditions)
+        tmp_dir = None
+
+        def _split_raw_podcast(wav_file, ranges):
+            """Stream the podcast cuts into the tmp folder."""
+            export_names = [f"{tmp_dir}/{index}-podcast-segment.wav"
+                            for index, item in enumerate(self._audio_intro)
+                            if item == "podcast_segment"]
+            audio.split_wav(wav_file, ranges, export_names)
+            if wav_file != self.abspath:
+                os.remove(wav_file)
+
+        def _library_audio(src_file):
+            """Get the decoded library audio in the export format."""
+            segment = cache.audio_segment(src_file, part_rate)
+            return segment.set_channels(1) if mono else segment
 
         def _copy_audio_intro():
             """Copy the opening theme files from the audio library."""
             LOGGER.debug("Copying the audio intro files from the library")
-            library = util.audio_library()
-            for index, audio in enumerate(self._audio_intro):
+            for index, clip in enumerate(self._audio_intro):
 
                 pad_fill = str(index).zfill(2)
-                item_name = audio.replace(' ', '_') + '.mp3'
+                item_name = clip.replace(' ', '_') + '.mp3'
 
-                if item_name in library.keys():
-                    src_file = os.path.join(library.get(item_name), item_name)
+                src_file = library.find(item_name)
+                if src_file:
                     dst_name = f'{pad_fill}_{item_name}'
 
                     shutil.copy2(src_file, f'{tmp_dir}/{dst_name}')
 
-        def _merge_audio():
-            """Merge all the mp3 files from tmp folder."""
+        def _part_format(ranges):
+            """Get the audio format of the merged part before reading it.
+
+            It is the common format of the converted podcast and of the
+            decoded library audio, like audio.common_format() would find.
+
+            Returns:
+                [tuple] - the channels, frame rate and sample width.
+            """
+            with wave.open(self.abspath, 'rb') as wave_file:
+                channels = wave_file.getnchannels()
+                sample_width = wave_file.getsampwidth()
+            if sample_width == 3:
+                # pydub and the pcm module widen 24 bit audio to 32 bit
+                sample_width = 4
+            sequence, clip_channels = _library_sequence(ranges)
+            if any(isinstance(item, str) for item in sequence):
+                channels = max(channels, clip_channels)
+                sample_width = max(sample_width, cache.SAMPLE_WIDTH)
+            return 1 if mono else channels, part_rate, sample_width
+
+        def _merge_audio(segments, part_format):
+            """Stream all the audio segments into the final mp3 file."""
             LOGGER.info("merging all the audio files into the final file")
-            # see pydub documentation of what is empty()
-            podcast_segment = pydub.AudioSegment.empty()
-            for sound in _create_audiosegment():
-                podcast_segment += sound
-
-            podcast_duration = util.audio_duration(len(podcast_segment))
-            self.add_html_parts({"duration": podcast_duration})
-
-            podcast_mp3_path = os.path.join(_mp3_path(), self.hash_name)
-            podcast = podcast_segment.export(podcast_mp3_path,
-                                             format="mp3",
-                                             bitrate=bitrate,
-                                             parameters=["-ar", sample_rate],
-                                             # need more ide tags?
-                                             tags={"album":
-                                                   f"{self.course_name}",
-                                                   "artist":
-                                                   f"{self.teacher_name}"})
-            shutil.rmtree(tmp_dir)
-            self.add_html_parts({"path": podcast.name})
-            LOGGER.debug('Final Podcast File: %s', podcast.name)
+            channels, frame_rate, sample_width = part_format
+            chunks = audio.stream_segments(segments, channels, frame_rate,
+                                           sample_width)
+
+            # the audio is already at the export sample rate
+            _encode(chunks, frame_rate, channels, sample_width)
+            if tmp_dir:
+                shutil.rmtree(tmp_dir)
+            _done()
 
         def _create_audiosegment():
             """Create pydub audio segment from all the mp3 files in tmp dir."""
+            import pydub
+
             path = pathlib.Path(tmp_dir).iterdir()
             LOGGER.debug('combining audio files in folder: %s', tmp_dir)
             for item in sorted(path):
                 if regex.search(r'(\.mp3|\.wav)$', str(item)):
                     LOGGER.debug('merging audio: %s', os.path.basename(item))
-                    yield pydub.AudioSegment.from_file(str(item))
+                    if item.suffix == '.mp3':
+                        yield _library_audio(str(item))
+                    else:
+                        yield pydub.AudioSegment.from_file(str(item))
+
+        def _load_audiosegment(podcast_parts):
+            """Create pydub audio segment without passing from the tmp dir.
+
+            The podcast cuts come from podcast_parts, in order, and the
+            library audio comes from the decoded audio cache.
+            """
+            LOGGER.debug("loading the audio intro files from the library")
+            decoded = {}
+            for clip in self._audio_intro:
+                if clip == "podcast_segment":
+                    yield next(podcast_parts)
+                    continue
+
+                item_name = clip.replace(' ', '_') + '.mp3'
+                src_file = library.find(item_name)
+                if not src_file:
+                    continue
+
+                if item_name not in decoded:
+                    LOGGER.debug('merging audio: %s', item_name)
+                    decoded[item_name] = _library_audio(src_file)
+                yield decoded[item_name]
+
+        def _library_sequence(ranges):
+            """Get the podcast cuts and the library clips paths in order.
+
+            Returns:
+                [tuple] - the sequence and the most channels of the clips.
+            """
+            manifest = library.index()
+            cuts = iter(ranges)
+            sequence = []
+            clip_channels = 1
+            for clip in self._audio_intro:
+                if clip == "podcast_segment":
+                    sequence.append(next(cuts))
+                    continue
+
+                item_name = clip.replace(' ', '_') + '.mp3'
+                src_file = library.find(item_name)
+                if src_file:
+                    sequence.append(src_file)
+                    clip_channels = max(clip_channels,
+                                        manifest[item_name]['channels'] or 1)
+            return sequence, clip_channels
+
+        def _tags() -> dict:
+            return {"album": f"{self.course_name}",
+                    "artist": f"{self.teacher_name}"}
+
+        def _render_audio(ranges):
+            """Render the final mp3 file with a single ffmpeg process."""
+            LOGGER.info("rendering the final file with ffmpeg")
+            sequence, clip_channels = _library_sequence(ranges)
+            encoder.render(self.abspath, sequence, podcast_mp3_path,
+                           bitrate=bitrate, sample_rate=sample_rate,
+                           clip_channels=clip_channels, mono=mono,
+                           tags=_tags())
+            _done()
+
+        def _splice_audio(ranges):
+            """Encode the podcast cuts and join them with the encoded clips."""
+            LOGGER.info("splicing the final file with the encoded clips")
+            sequence, clip_channels = _library_sequence(ranges)
+            with wave.open(self.abspath, 'rb') as wave_file:
+                channels = max(wave_file.getnchannels(), clip_channels)
+            if mono:
+                channels = 1
+            profile = dict(bitrate=bitrate, sample_rate=sample_rate,
+                           channels=channels)
+
+            cut_files = [f"{tmp_dir}/{index}-podcast-segment.mp3"
+                         for index in range(len(ranges))]
+            encoder.encode_cuts(self.abspath, ranges, cut_files, **profile)
+
+            cut_files = iter(cut_files)
+            mp3_files = [next(cut_files) if isinstance(item, tuple)
+                         else clip_store.encoded_clip(item, **profile)
+                         for item in sequence]
+            mp3.concatenate(mp3_files, podcast_mp3_path, tags=_tags())
+            shutil.rmtree(tmp_dir)
+            _done()
+
+        def _assemble_audio(podcast_cuts, part_format):
+            """Stream the part from numpy arrays into the encoder.
+
+            The podcast cuts come from podcast_cuts, in order, and the
+            library audio is mapped from the decoded audio cache, so only
+            the piece being converted is in memory.
+            """
+            from podcasttool import pcm
+
+            LOGGER.info("assembling the final file with numpy")
+            channels, frame_rate, sample_width = part_format
+
+            def pieces():
+                decoded = {}
+                for clip in self._audio_intro:
+                    if clip == "podcast_segment":
+                        yield next(podcast_cuts)
+                        continue
+
+                    item_name = clip.replace(' ', '_') + '.mp3'
+                    src_file = library.find(item_name)
+                    if not src_file:
+                        continue
+
+                    if item_name not in decoded:
+                        entry, clip_channels = cache.pcm_entry(src_file,
+                                                               part_rate)
+                        clip_audio = pcm.from_cache(entry, part_rate,
+                                                    clip_channels)
+                        decoded[item_name] = (clip_audio.set_channels(1)
+                                              if mono else clip_audio)
+                    yield decoded[item_name]
+
+            chunks = pcm.stream_pieces(pieces(), channels, frame_rate,
+                                       sample_width)
+            _encode(chunks, frame_rate, channels, sample_width)
+            if tmp_dir:
+                # the memory map of the converted podcast was closed with
+                # the exhausted generator
+                shutil.rmtree(tmp_dir)
+            _done()
+
+        def _encode(chunks, frame_rate, channels, sample_width):
+            """Pipe the assembled part into the encoder of each rendition."""
+            if not renditions and not hls:
+                encoder.encode_stream(chunks, podcast_mp3_path, frame_rate,
+                                      channels, sample_width, bitrate,
+                                      tags=_tags())
+            else:
+                encoder.encode_renditions(chunks, outputs, frame_rate,
+                                          channels, sample_width,
+                                          tags=_tags())
+
+        def _add_paths():
+            for (mp3_file, *_), key in zip(outputs,
+                                           [self.part_key] + part_keys):
+                self.html_page['parts'][key]["path"] = mp3_file
+                if hls:
+                    self.html_page['parts'][key]["segments"] = \
+                        encoder.hls_segments(mp3_file)
+            if hls:
+                self.use_playlists()
+
+        def _done():
+            for (mp3_file, *_), record in zip(outputs, output_records):
+                self._write_output_record(mp3_file, record)
+            _add_paths()
+            LOGGER.debug('Final Podcast File: %s', podcast_mp3_path)
 
         def _mp3_path() -> str:
             """Get the mp3 folder path."""
             mp3_path = pathlib.Path(self.abspath).parent / 'mp3'
             if not mp3_path.exists():
                 LOGGER.debug("mp3 folder not found...creating one.")
-                os.mkdir(mp3_path)
+                # the parts of a pool can create it at the same time
+                os.makedirs(mp3_path, exist_ok=True)
             LOGGER.debug("mp3 folder path: %s", mp3_path)
             return mp3_path
 
-        _split_raw_podcast()
-        _copy_audio_intro()
-        _merge_audio()
+        podcast_mp3_path = os.path.join(_mp3_path(), self.hash_name)
+        outputs = [(podcast_mp3_path, bitrate, sample_rate)] + [
+            (os.path.join(_mp3_path(), self.rendition_name(*rendition)),
+             *rendition) for rendition in renditions]
+        part_keys = [self.rendition_key(*rendition)
+                     for rendition in renditions]
+        if hls:
+            outputs = [(encoder.hls_playlist(mp3_file), *rendition)
+                       for mp3_file, *rendition in outputs]
+            podcast_mp3_path = outputs[0][0]
+
+        previous_records = [self._read_output_record(mp3_file)
+                            for mp3_file, _, _ in outputs]
+        output_records = [
+            self._output_record(ranges, output_bitrate, output_rate, render,
+                                mono, previous, part_rate)
+            for (_, output_bitrate, output_rate), previous
+            in zip(outputs, previous_records)]
+        if all(previous and previous['key'] == record['key']
+               for previous, record in zip(previous_records,
+                                           output_records)):
+            LOGGER.info('podcast already generated: %s', podcast_mp3_path)
+            _add_paths()
+            return
+
+        if render == 'ffmpeg':
+            _render_audio(ranges)
+            return
+        if render == 'splice':
+            tmp_dir = self._mkdir_tmp()
+            _splice_audio(ranges)
+            return
+
+        if in_memory is None:
+            in_memory = self._fits_in_memory()
+        LOGGER.debug("in memory pipeline: %s", in_memory)
+
+        part_format = _part_format(ranges)
+        ranges = audio.scale_ranges(ranges, self.frame_rate, part_rate)
+        if in_memory:
+            # the cuts are read while the raw podcast is converted
+            if render == 'numpy':
+                from podcasttool import pcm
+                _assemble_audio(pcm.read_converted(self.abspath, ranges,
+                                                   part_rate, mono),
+                                part_format)
+            else:
+                _merge_audio(_load_audiosegment(audio.read_converted(
+                    self.abspath, ranges, part_rate, mono)), part_format)
+            return
+
+        tmp_dir = self._mkdir_tmp()
+        wav_file = audio.convert_wav(self.abspath, f"{tmp_dir}/converted.wav",
+                                     part_rate, mono)
+        if render == 'numpy':
+            from podcasttool import pcm
+            podcast = pcm.read_wav(wav_file)
+            _assemble_audio((podcast[start:end] for start, end in ranges),
+                            part_format)
+        else:
+            _split_raw_podcast(wav_file, ranges)
+            _copy_audio_intro()
+            _merge_audio(_create_audiosegment(), part_format)
+
+
+def check_server_paths(paths, test_env=False, pool=None, ask=None,
+                       notify=None) -> dict:
+    """Check the server path of every podcast before generating them.
+
+    Arguments:
+        paths {iterable} - paths of the raw podcast files.
+
+    Keyword Arguments:
+        test_env {bool} - if True, upload to test path (default: {False})
+        pool {FtpPool} - connections pool to use (default: {None})
+        ask {callable} - question callback of check_server_path()
+                         (default: {None})
+        notify {callable} - message callback of check_server_path()
+                            (default: {None})
+
+    Returns:
+        [dict] - the checked server path of each course path.
+    """
+    server_paths = {}
+    for path in paths:
+        course_path = PodcastFile(str(path)).course_path
+        if course_path not in server_paths:
+            server_paths[course_path] = check_server_path(
+                course_path, test_env, pool, ask, notify)
+    return server_paths
+
+
+def _upload_part(uploading_file: str, server_path: str, progress, resume,
+                 journal, cancel=None, segments=()):
+    """Upload a part and record it in the journal once it is uploaded.
+
+    The HLS segments of a playlist are uploaded before the playlist, so it
+    never lists a missing segment. The segments already uploaded by an
+    interrupted run are skipped.
+    """
+    for upload in list(segments) + [uploading_file]:
+        name = os.path.basename(upload)
+        if cancel and cancel.is_set():
+            raise RunCancelled(f'upload cancelled: {upload}')
+        if (upload != uploading_file and journal
+                and journal.done(name, 'uploaded')):
+            continue
+        upload_to_server(upload, server_path, progress=progress,
+                         resume=resume)
+        if journal:
+            journal.record(name, 'uploaded')
+
+
+def generate_and_upload(paths, server_paths: dict, workers=None,
+                        uploaders=UPLOAD_WORKERS, progress=None, journal=None,
+                        on_event=None, cancel=None, **options) -> dict:
+    """Generate the podcast parts and upload each one as soon as it is ready.
+
+    The parts are generated by a pool of processes and every finished mp3 goes
+    straight to a pool of upload threads, so the uploads run while the next
+    parts are still encoding.
+
+    Arguments:
+        paths {iterable} - paths of the raw podcast files.
+        server_paths {dict} - server path of each course path, as returned by
+                              check_server_paths().
+
+    Keyword Arguments:
+        workers {int} - number of encoding processes (default: {None})
+        uploaders {int} - number of upload threads (default: {4})
+        progress {callable} - upload progress callback (default: {None})
+        journal {Journal} - journal where to record the encoded and uploaded
+                            parts. The parts already uploaded are skipped
+                            (default: {None})
+        on_event {callable} - called with the stage ('encoded' or 'uploaded')
+                              and the mp3 name of each part when it completes
+                              the stage. Called from the worker threads
+                              (default: {None})
+        cancel {threading.Event} - when set, the encoding and the uploads stop
+                                   as soon as possible and RunCancelled is
+                                   raised (default: {None})
+        options - keyword arguments passed to generate_podcast().
+
+    Returns:
+        [dict] - html page data of each lesson, with the archive name as key.
+    """
+    on_event = on_event or (lambda stage, name: None)
+
+    if journal:
+        remaining = []
+        for path in paths:
+            podcast = PodcastFile(str(path))
+            names = podcast.output_names(options.get('renditions') or (),
+                                         options.get('hls'))
+            if all(journal.done(name, 'uploaded') for name in names):
+                for name in names:
+                    on_event('uploaded', name)
+            else:
+                remaining.append(path)
+        paths = remaining
+
+    def upload_progress(tracker):
+        if cancel and cancel.is_set():
+            # stops storbinary() in the middle of the file
+            raise RunCancelled(f'upload cancelled: {tracker.file_name}')
+        if progress:
+            progress(tracker)
+
+    def upload_and_notify(uploading_file, *args):
+        _upload_part(uploading_file, *args)
+        on_event('uploaded', os.path.basename(uploading_file))
+
+    uploads = []
+    with ThreadPoolExecutor(max_workers=uploaders) as executor:
+
+        def upload_part(part_page):
+            for part in part_page['parts'].values():
+                LOGGER.debug('queueing upload: %s', part['path'])
+                name = os.path.basename(part['path'])
+                # the upload may have been interrupted by the previous run
+                resume = bool(journal) and journal.done(name, 'encoded')
+                if journal:
+                    journal.record(name, 'encoded')
+                on_event('encoded', name)
+
+                uploads.append(executor.submit(
+                    upload_and_notify, part['path'],
+                    server_paths[part['server_path']], upload_progress,
+                    resume, journal, cancel, part.get('segments', ())))
+
+        html_pages = PodcastFile.generate_many(
+            paths, workers=workers, on_part=upload_part, cancel=cancel,
+            **options)
+
+        for upload in uploads:
+            upload.result()
+
+    return html_pages
+
+
+def format_plan(summary: dict) -> str:
+    """Format the plan of a part, as returned by plan_summary(), as text."""
+    offsets = ', '.join(f'{offset / 1000:.3f}s'
+                        for offset in summary['offsets'])
+    intro = ', '.join(summary['intro'])
+    return (f"{summary['name']}\n"
+            f"  cuts: {summary['cuts']} at {offsets}\n"
+            f"  intro: {intro}\n"
+            f"  upload: {summary['server_path']}/{summary['hash_name']}\n"
+            f"  duration: {summary['duration']} "
+            f"size: {summary['size'] / 1024 / 1024:.1f}MB")
 
 
 def generate_html(html_data, test_env=False):
@@ -564,6 +1550,8 @@ def generate_html(html_data, test_env=False):
         test_env - [bool] - if True then changes path on html file to test path
 
     """
+    import yattag
+
     LOGGER.debug('generating html page info from dict: %s', html_data)
     doc, tag, text = yattag.Doc().tagtext()
     doc.stag('hr')
@@ -595,6 +1583,13 @@ def generate_html(html_data, test_env=False):
                 with tag('p'):
                     text(f'{part_num} | Durata {part_info["duration"]}')
 
+                if part_info['link'].endswith(encoder.PLAYLIST_EXTENSION):
+                    # the segments are streamed, there is no file to download
+                    with tag('audio', 'controls', preload='none',
+                             klass='virgil_hls', src=part_info['link']):
+                        pass
+                    continue
+
                 with tag('object', id="audioplayer1",
                          width="290", height="24",
                          data=os.environ['FONDERIE_AUDIO_PLUGIN'],
@@ -605,6 +1600,17 @@ def generate_html(html_data, test_env=False):
                     with tag('button', klass='virgil_button'):
                         text('Download')
 
+        if any(part_info['link'].endswith(encoder.PLAYLIST_EXTENSION)
+               for part_info in html_data['parts'].values()):
+            integrity = os.environ.get('FONDERIE_HLS_PLUGIN_SRI')
+            script = {'integrity': integrity,
+                      'crossorigin': 'anonymous'} if integrity else {}
+            with tag('script', src=os.environ['FONDERIE_HLS_PLUGIN'],
+                     **script):
+                pass
+            with tag('script'):
+                doc.asis(HLS_PLAYER)
+
     def test_path(text):
         """Substitute the current path with the test path."""
         sub_path = regex.compile(
@@ -0,0 +1,156 @@
+"""Move the podcast cuts to the nearest silence.
+
+The podcast is cut at fixed offsets, which often land in the middle of a
+word. snap_cuts() moves every cut to the nearest silence within a tolerance.
+
+The wave is never decoded: its frames are memory mapped with numpy and the
+RMS energy of each window of WINDOW_MS is computed in a single pass, a block
+of windows at a time so the memory used stays the same for any length. A
+window is silent when its energy is SILENCE_RATIO times (-20dB) below the
+median energy of the recording, so the threshold follows the recording
+level.
+
+Time budget: the analysis is bound by the read of the wave. A 3 hours
+44.1kHz 16bit stereo recording (1.9GB) must be analysed in less than
+TIME_BUDGET seconds with the file in the page cache, see
+`benchmarks/bench_silence.py`. pydub `detect_silence()` needs minutes for
+the same file.
+
+numpy is optional: without it the cuts are not moved.
+"""
+import wave
+import logging
+
+from podcasttool import audio
+
+LOGGER = logging.getLogger('podcast_tool.silence')
+
+WINDOW_MS = 50
+TOLERANCE_MS = 5000
+SILENCE_RATIO = 0.1
+# windows analysed at once
+BLOCK_WINDOWS = 2048
+# seconds to analyse a 3 hours 44.1kHz stereo recording
+TIME_BUDGET = 10
+
+# 24 bit samples are mapped as bytes and joined by _to_float()
+SAMPLE_TYPES = {1: 'u1', 2: '<i2', 3: 'u1', 4: '<i4'}
+
+
+def window_rms(wav_file: str, window_ms=WINDOW_MS):
+    """Calculate the RMS energy of each window of a wave file.
+
+    Arguments:
+        wav_file {str} - path of the wave file.
+
+    Keyword Arguments:
+        window_ms {int} - length of each window (default: {WINDOW_MS})
+
+    Returns:
+        [tuple] - numpy array with the RMS of each window and the frames of
+                  a window.
+    """
+    import numpy
+
+    wav_file = str(wav_file)
+    with wave.open(wav_file, 'rb') as reader:
+        params = reader.getparams()
+    if params.sampwidth not in SAMPLE_TYPES:
+        raise ValueError(f'unsupported sample width: {params.sampwidth}')
+
+    window = max(1, params.framerate * window_ms // 1000)
+    windows = params.nframes // window
+    if not windows:
+        return numpy.zeros(0, numpy.float32), window
+
+    sample_type = numpy.dtype(SAMPLE_TYPES[params.sampwidth])
+    # items of the mapped type in each sample: 3 for the 24 bit bytes
+    items = params.sampwidth // sample_type.itemsize
+    pcm = numpy.memmap(wav_file, dtype=sample_type, mode='r',
+                       offset=audio.data_offset(wav_file),
+                       shape=(windows, window * params.nchannels * items))
+
+    energy = numpy.empty(windows, numpy.float32)
+    for start in range(0, windows, BLOCK_WINDOWS):
+        block = _to_float(pcm[start:start + BLOCK_WINDOWS], params.sampwidth)
+        energy[start:start + BLOCK_WINDOWS] = numpy.einsum('ij,ij->i',
+                                                           block, block)
+    return numpy.sqrt(energy / (window * params.nchannels)), window
+
+
+def _to_float(block, sample_width: int):
+    """Convert a block of mapped samples to float32."""
+    import numpy
+
+    if sample_width == 3:
+        # join the 3 little endian bytes and extend the sign
+        data = block.reshape(len(block), -1, 3).astype(numpy.int32)
+        samples = data[..., 0] | data[..., 1] << 8 | data[..., 2] << 16
+        samples -= (samples & 0x800000) << 1
+        return samples.astype(numpy.float32)
+    block = block.astype(numpy.float32)
+    if sample_width == 1:
+        # 8bit wave are unsigned
+        block -= 128
+    return block
+
+
+def snap_cuts(wav_file: str, ranges: list, tolerance_ms=TOLERANCE_MS,
+              window_ms=WINDOW_MS) -> list:
+    """Move each cut between two ranges to the nearest silence.
+
+    A cut without silence within the tolerance stays where it is. The first
+    start and the last end never move.
+
+    Arguments:
+        wav_file {str} - path of the raw podcast.
+        ranges {list} - list of (start, end) frames of each cut, as returned
+                        by audio.cut_ranges().
+
+    Keyword Arguments:
+        tolerance_ms {int} - how far a cut can move (default: {TOLERANCE_MS})
+        window_ms {int} - length of the analysis windows (default:
+                          {WINDOW_MS})
+
+    Returns:
+        [list] - the new (start, end) frames of each cut.
+    """
+    ranges = list(ranges)
+    if len(ranges) < 2:
+        return ranges
+    try:
+        import numpy
+    except ImportError:
+        LOGGER.warning('numpy is not installed: cuts not moved to silence')
+        return ranges
+
+    rms, window = window_rms(wav_file, window_ms)
+    if not len(rms):
+        return ranges
+
+    with wave.open(str(wav_file), 'rb') as reader:
+        frame_rate = reader.getframerate()
+    tolerance = max(1, tolerance_ms * frame_rate // 1000 // window)
+    silent = numpy.flatnonzero(rms <= numpy.median(rms) * SILENCE_RATIO)
+
+    cuts = []
+    previous = ranges[0][0]
+    limits = [start for start, _ in ranges[2:]] + [ranges[-1][1]]
+    for (start, _), limit in zip(ranges[1:], limits):
+        cut = start
+        center = start // window
+        # the silent windows inside the tolerance
+        near = silent[numpy.searchsorted(silent, center - tolerance):
+                      numpy.searchsorted(silent, center + tolerance,
+                                         side='right')]
+        # a cut can't pass the previous cut or the next planned one
+        candidates = near * window + window // 2
+        candidates = candidates[(candidates > previous) &
+                                (candidates < limit)]
+        if len(candidates):
+            cut = int(candidates[numpy.argmin(numpy.abs(candidates - start))])
+        LOGGER.debug('cut at frame %d moved to %d', start, cut)
+        cuts.append(cut)
+        previous = cut
+
+    return list(zip([ranges[0][0]] + cuts, cuts + [ranges[-1][1]]))
@@ -1,32 +1,43 @@
 """Reusable utility functions."""
 import os
 import sys
+import copy
 import json
 import time
+import types
 import pathlib
 import logging
+import hashlib
 import datetime
+import threading
 import subprocess
 
-from tkinter import messagebox
-
 import regex
-import gtts
 from dotenv import load_dotenv
 
 LOGGER = logging.getLogger('podcast_tool.utlity')
 
 ENV_FILE = os.path.join(os.path.dirname(__file__), ".env")
-try:
+
+
+def load_credentials():
+    """Load the server credentials from the .env file.
+
+    Raises:
+        FileNotFoundError: if the .env file is missing.
+    """
     if not os.path.exists(ENV_FILE):
         raise FileNotFoundError("credentials missing! contanct admin")
-except FileNotFoundError as error:
-    messagebox.showerror(message=error)
-    sys.exit()
-else:
     load_dotenv(ENV_FILE, verbose=True)
 
 
+try:
+    load_credentials()
+except FileNotFoundError as error:
+    # the gui and the cli tell the user when they start
+    LOGGER.critical(error)
+
+
 def profile(func):
     """Write to log the profiling of a function."""
     # SortKey class is not present on the linux version
@@ -87,10 +98,16 @@ def generate_audio(text, path, filename="", lang='it'):
     else:
         filename = filename.replace(" ", "_")
 
+    # gtts takes long to import and is needed only to generate new audio
+    import gtts
+
     path = get_path(path)
     speak = gtts.gTTS(text=name, lang=lang)
     speak.save(f'{path}/{filename}.mp3')
 
+    from podcasttool import library
+    library.add(f'{path}/{filename}.mp3')
+
 
 def get_path(directory: str) -> str:
     """Search for the path in main working directory.
@@ -107,20 +124,96 @@ def get_path(directory: str) -> str:
     raise FileNotFoundError(f"Directory not found: {new_path}")
 
 
+def file_hash(file_path: str, block_size=1024 * 1024) -> str:
+    """Get the sha1 hash of a file content.
+
+    The file is read in blocks so big files are never loaded in memory.
+
+    Arguments:
+        file_path {str} - path of the file to hash.
+
+    Returns:
+        [str] - the hexadecimal hash of the file content.
+    """
+    sha = hashlib.sha1()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
 def audio_library():
     """Create a dictionary with all the files from the library.
 
+    The files come from the library manifest, so the library directory is
+    not walked each time.
+
     Returns:
         [dict] - - dictionary with key files names and values paths.
 
     """
-    library_path = get_path('include/audio')
-    library_dict = {}
-    for dirpath, _, filenames in os.walk(library_path):
-        for filename in filenames:
-            if filename.endswith('mp3'):
-                library_dict[filename] = dirpath
-    return library_dict
+    from podcasttool import library
+
+    library_path = library.library_dir()
+    return {name: os.path.normpath(os.path.join(library_path, entry['path']))
+            for name, entry in library.index().items()}
+
+
+def _meminfo_available():
+    """Get MemAvailable from /proc/meminfo on Linux, in bytes.
+
+    Unlike MemFree it counts the page cache the kernel can reclaim.
+    """
+    with open('/proc/meminfo') as meminfo:
+        for line in meminfo:
+            if line.startswith('MemAvailable:'):
+                return int(line.split()[1]) * 1024
+    return None
+
+
+def _vm_stat_available():
+    """Get the free and reclaimable memory from vm_stat on macOS, in bytes."""
+    output = subprocess.run(['vm_stat'], stdout=subprocess.PIPE,
+                            check=True).stdout.decode()
+    page_size = int(regex.search(r'page size of (\d+) bytes',
+                                 output).group(1))
+    pages = {key.strip(): int(value.strip(' .'))
+             for key, value in regex.findall(r'^(Pages [^:]+):(.+)$', output,
+                                             flags=regex.M)}
+    reclaimable = ('Pages free', 'Pages inactive', 'Pages speculative',
+                   'Pages purgeable')
+    return sum(pages.get(key, 0) for key in reclaimable) * page_size
+
+
+def available_memory():
+    """Get the memory the system can give without swapping.
+
+    The free memory plus the cache that can be reclaimed: MemAvailable on
+    Linux, the free, inactive, speculative and purgeable pages of vm_stat on
+    macOS, the free pages elsewhere.
+
+    Returns:
+        [int] - available memory in bytes or None if the system can't tell.
+    """
+    if sys.platform.startswith('linux'):
+        readers = [_meminfo_available]
+    elif sys.platform == 'darwin':
+        readers = [_vm_stat_available]
+    else:
+        readers = []
+    readers.append(lambda: (os.sysconf('SC_AVPHYS_PAGES')
+                            * os.sysconf('SC_PAGE_SIZE')))
+
+    for reader in readers:
+        try:
+            available = reader()
+        except (ValueError, OSError, AttributeError,
+                subprocess.CalledProcessError):
+            continue
+        if available is not None:
+            return available
+    LOGGER.debug('could not get free memory of the system')
+    return None
 
 
 def audio_duration(file_length: int) -> str:
@@ -162,6 +255,21 @@ def calculate_cuts(ms_time: int) -> int:
     return 4
 
 
+def parse_rendition(text: str) -> tuple:
+    """Parse a rendition written like bitrate/sample rate, e.g. 32k/22050.
+
+    Returns:
+        [tuple] - the bitrate and the sample rate of the rendition.
+
+    Raises:
+        ValueError - if the text is not a rendition.
+    """
+    match = regex.match(r'\s*(\d+k)\s*/\s*(\d+)(?:Hz)?\s*$', text)
+    if not match:
+        raise ValueError(f'not a bitrate/sample rate rendition: {text}')
+    return match.group(1), match.group(2)
+
+
 def catalog_file():
     """Return catalog file path.
 
@@ -170,31 +278,108 @@ def catalog_file():
     return os.path.join(os.path.dirname(__file__), 'catalog_names.json')
 
 
-def catalog_names(value="") -> dict:
-    """Return catalog names dictionary.
+def _read_only(value):
+    """Convert the json data in read only views: dict and list become
+    mappingproxy and tuple."""
+    if isinstance(value, dict):
+        return types.MappingProxyType(
+            {key: _read_only(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_read_only(item) for item in value)
+    return value
+
+
+class CatalogStore:
+    """Parsed json catalog shared by the whole app.
+
+    The file is parsed only the first time and then again only when its
+    modification time or size changes, so the catalog can be read for every
+    podcast and every line of text without parsing the json each time.
+
+    Arguments:
+        path {str} - path of the json catalog file.
+
+    Attributes:
+        hits {int} - how many times the parsed catalog has been reused.
+        misses {int} - how many times the file has been parsed.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._data = None
+        self._view = None
+        self.hits = 0
+        self.misses = 0
+
+    def _file_stamp(self) -> tuple:
+        """Get modification time and size of the catalog file."""
+        stat = os.stat(self._path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        """Parse the file again if it has changed since the last time."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            self.hits += 1
+            return
+
+        self.misses += 1
+        with open(self._path) as json_file:
+            LOGGER.debug('parsing json file: %s', json_file)
+            self._data = json.load(json_file)
+        self._view = _read_only(self._data)
+        self._stamp = stamp
+
+    def view(self):
+        """Get a read only view of the catalog."""
+        with self._lock:
+            self._load()
+            return self._view
+
+    def copy(self) -> dict:
+        """Get a modifiable copy of the catalog."""
+        with self._lock:
+            self._load()
+            return copy.deepcopy(self._data)
+
+
+CATALOG = CatalogStore(catalog_file())
+
+
+def catalog_names(value=""):
+    """Return catalog names read only dictionary.
+
+    The catalog is shared, so the returned mapping can't be modified. Use
+    catalog_copy() to modify the catalog.
 
     Keyword Arguments:
         value {str} -- can grab directly its value is passed (default: {""})
 
     Returns:
-        dict -- catalog of names
+        mappingproxy -- catalog of names
     """
     try:
-        with open(catalog_file()) as json_file:
-            LOGGER.debug('parsing json file: %s', json_file)
-            json_data = json.load(json_file)
-
+        json_data = CATALOG.view()
     except FileNotFoundError:
         LOGGER.critical('No json catalog file found', exc_info=True)
         sys.exit()
 
-    else:
-        if value:
-            return json_data[value]
-
+    if value:
+        return json_data[value]
     return json_data
 
 
+def catalog_copy() -> dict:
+    """Return a modifiable copy of the catalog names dictionary."""
+    try:
+        return CATALOG.copy()
+    except FileNotFoundError:
+        LOGGER.critical('No json catalog file found', exc_info=True)
+        sys.exit()
+
+
 def convert_month_name():
     """Convert month number value to italian month name.
 
@@ -0,0 +1,22 @@
+import shutil
+import pathlib
+
+import pytest
+
+SAMPLE_WAV = next(pathlib.Path(__file__).parent.glob('*wav'))
+
+
+@pytest.fixture
+def raw_podcast(tmp_path):
+    """Copy the sample podcast into a folder of tmp_path.
+
+    The fixture is a function of the folder and of the file name, so a test
+    can generate the same podcast in more folders.
+    """
+    def copy(folder='', name=SAMPLE_WAV.name):
+        folder = tmp_path / folder
+        folder.mkdir(parents=True, exist_ok=True)
+        shutil.copy(SAMPLE_WAV, folder / name)
+        return str(folder / name)
+
+    return copy
@@ -0,0 +1,174 @@
+"""Minimal FTP server used as a local stand-in of the podcast server.
+
+It implements only the commands used by ftplib for login, directories and
+binary uploads. Files are saved inside a local root directory.
+
+    with FtpStandIn(tmp_dir, login_delay=0.05) as server:
+        ftplib.FTP().connect('127.0.0.1', server.port)
+"""
+import os
+import socket
+import threading
+import posixpath
+import socketserver
+
+
+class _FtpHandler(socketserver.StreamRequestHandler):
+    """Handle the control connection of one ftp client."""
+
+    def setup(self):
+        super().setup()
+        self.cwd = '/'
+        self.rest = 0
+        self.data_socket = None
+
+    def reply(self, message):
+        self.wfile.write(f'{message}\r\n'.encode())
+
+    def handle(self):
+        self.reply('220 podcast stand-in ready')
+        for line in self.rfile:
+            command, _, argument = line.decode().rstrip('\r\n').partition(' ')
+            method = getattr(self, f'ftp_{command.upper()}', None)
+            if method is None:
+                self.reply('502 command not implemented')
+            elif method(argument) is False:
+                break
+
+    def _path(self, path):
+        """Return the virtual path and the real path on disk."""
+        virtual = posixpath.normpath(posixpath.join(self.cwd, path))
+        return virtual, os.path.join(self.server.root, virtual.lstrip('/'))
+
+    def ftp_USER(self, _):
+        self.reply('331 password required')
+
+    def ftp_PASS(self, _):
+        self.server.wait(self.server.login_delay)
+        with self.server.lock:
+            self.server.logins += 1
+        self.reply('230 logged in')
+
+    def ftp_NOOP(self, _):
+        self.server.wait(self.server.command_delay)
+        self.reply('200 ok')
+
+    def ftp_TYPE(self, _):
+        self.reply('200 type set')
+
+    def ftp_PWD(self, _):
+        self.reply(f'257 "{self.cwd}"')
+
+    def ftp_CWD(self, path):
+        self.server.wait(self.server.command_delay)
+        virtual, real = self._path(path)
+        if os.path.isdir(real):
+            self.cwd = virtual
+            self.reply('250 directory changed')
+        else:
+            self.reply('550 no such directory')
+
+    def ftp_MKD(self, path):
+        virtual, real = self._path(path)
+        os.makedirs(real, exist_ok=True)
+        self.reply(f'257 "{virtual}" created')
+
+    def ftp_SIZE(self, path):
+        _, real = self._path(path)
+        if os.path.isfile(real):
+            self.reply(f'213 {os.path.getsize(real)}')
+        else:
+            self.reply('550 no such file')
+
+    def ftp_REST(self, offset):
+        self.rest = int(offset)
+        self.reply(f'350 restarting at {self.rest}')
+
+    def ftp_PASV(self, _):
+        self.data_socket = socket.socket()
+        self.data_socket.bind(('127.0.0.1', 0))
+        self.data_socket.listen(1)
+        port = self.data_socket.getsockname()[1]
+        self.reply(f'227 Entering Passive Mode (127,0,0,1,'
+                   f'{port >> 8},{port & 0xFF})')
+
+    def ftp_STOR(self, path):
+        _, real = self._path(path)
+        rest, self.rest = self.rest, 0
+        self.reply('150 opening data connection')
+
+        connection, _ = self.data_socket.accept()
+        self.data_socket.close()
+
+        received = 0
+        with connection, open(real, 'r+b' if rest else 'wb') as file:
+            file.seek(rest)
+            file.truncate()
+            while True:
+                data = connection.recv(65536)
+                if not data:
+                    break
+
+                fail_after = self.server.fail_after
+                if (fail_after is not None
+                        and received + len(data) > fail_after):
+                    # simulate a connection dropped in the middle of a file
+                    file.write(data[:fail_after - received])
+                    self.server.fail_after = None
+                    self.reply('426 connection closed; transfer aborted')
+                    return False
+
+                file.write(data)
+                received += len(data)
+
+        self.reply('226 transfer complete')
+        return None
+
+    def ftp_QUIT(self, _):
+        self.reply('221 bye')
+        return False
+
+
+class FtpStandIn(socketserver.ThreadingTCPServer):
+    """Threaded ftp server listening on a free local port.
+
+    Arguments:
+        root {str} - local directory used as the server root.
+
+    Keyword Arguments:
+        login_delay {float} - seconds to wait before accepting a login, to
+                              simulate the network latency (default: 0)
+        command_delay {float} - seconds to wait on CWD and NOOP (default: 0)
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, root, login_delay=0.0, command_delay=0.0):
+        super().__init__(('127.0.0.1', 0), _FtpHandler)
+        self.root = str(root)
+        self.login_delay = login_delay
+        self.command_delay = command_delay
+        self.logins = 0
+        # bytes after which the next upload is interrupted
+        self.fail_after = None
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @property
+    def port(self):
+        """Return the port where the server is listening."""
+        return self.server_address[1]
+
+    def wait(self, seconds):
+        """Wait some seconds unless the server is stopping."""
+        if seconds:
+            self._stop.wait(seconds)
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self.shutdown()
+        self.server_close()
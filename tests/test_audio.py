@@ -0,0 +1,155 @@
+import math
+import wave
+import struct
+
+import pydub
+
+from src.podcasttool import audio
+
+
+def _write_wave(path, nframes, frame_rate=44100):
+    with wave.open(str(path), 'wb') as wave_file:
+        wave_file.setnchannels(2)
+        wave_file.setsampwidth(2)
+        wave_file.setframerate(frame_rate)
+        wave_file.writeframes(bytes(range(256)) * (nframes * 4 // 256)
+                              + bytes(nframes * 4 % 256))
+
+
+def test_cut_ranges():
+    total_ms = 10_000
+    cut_each = math.ceil(total_ms / 3)
+    ranges = audio.cut_ranges(total_ms, 44100, cut_each)
+    assert len(ranges) == 3
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == 441000
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+
+
+def test_split_wav(tmp_path):
+    wav_file = tmp_path / 'podcast.wav'
+    _write_wave(wav_file, 44100)
+
+    ranges = audio.cut_ranges(1000, 44100, 334)
+    export_names = [tmp_path / f'{i}.wav' for i in range(len(ranges))]
+    audio.split_wav(wav_file, ranges, export_names, block_frames=1000)
+
+    with wave.open(str(wav_file), 'rb') as original:
+        data = original.readframes(original.getnframes())
+
+    splitted = b''
+    for name in export_names:
+        with wave.open(str(name), 'rb') as part:
+            splitted += part.readframes(part.getnframes())
+    assert splitted == data
+
+
+def test_stream_segments():
+    segments = [
+        pydub.AudioSegment(data=bytes(range(200)) * 10, sample_width=2,
+                           frame_rate=22050, channels=1),
+        pydub.AudioSegment(data=bytes(range(100)) * 40, sample_width=2,
+                           frame_rate=22050, channels=2),
+        pydub.AudioSegment(data=bytes(8000), sample_width=2,
+                           frame_rate=44100, channels=2),
+    ]
+    merged = pydub.AudioSegment.empty()
+    for segment in segments:
+        merged += segment
+
+    # the format and the length of the `+=` merge, a segment at a time
+    audio_format = audio.common_format(segments)
+    assert audio_format == (merged.channels, merged.frame_rate,
+                            merged.sample_width)
+    chunks = list(audio.stream_segments(iter(segments), *audio_format))
+    assert len(chunks) == len(segments)
+    streamed = pydub.AudioSegment(data=b''.join(chunks), sample_width=2,
+                                  frame_rate=44100, channels=2)
+    assert len(streamed) == len(merged)
+    # a segment already in the common format is streamed as it is
+    assert chunks[-1] == segments[-1].raw_data
+
+
+def test_convert_wav(tmp_path):
+    wav_file = tmp_path / 'podcast.wav'
+    _write_wave(wav_file, 44100)
+
+    assert audio.convert_wav(wav_file, tmp_path / 'same.wav', 44100) \
+        == wav_file
+    assert not (tmp_path / 'same.wav').exists()
+
+    # streaming in small blocks gives the same audio as one block
+    streamed = audio.convert_wav(wav_file, tmp_path / 'streamed.wav', 22050,
+                                 mono=True, block_frames=1000)
+    whole = audio.convert_wav(wav_file, tmp_path / 'whole.wav', 22050,
+                              mono=True, block_frames=44100)
+    with wave.open(str(streamed), 'rb') as converted, \
+            wave.open(str(whole), 'rb') as reference:
+        assert converted.getframerate() == 22050
+        assert converted.getnchannels() == 1
+        assert abs(converted.getnframes() - 22050) <= 1
+        assert converted.readframes(22050) == reference.readframes(22050)
+
+
+def test_convert_wav_downmix(tmp_path):
+    wav_file = tmp_path / 'stereo.wav'
+    with wave.open(str(wav_file), 'wb') as wave_file:
+        wave_file.setnchannels(2)
+        wave_file.setsampwidth(2)
+        wave_file.setframerate(22050)
+        wave_file.writeframes(struct.pack('<2h', 1000, 3000) * 22050)
+
+    converted = audio.convert_wav(wav_file, tmp_path / 'mono.wav', 22050,
+                                  mono=True)
+    with wave.open(str(converted), 'rb') as reader:
+        assert reader.getnchannels() == 1
+        assert reader.getnframes() == 22050
+        frames = reader.readframes(reader.getnframes())
+    # the channels are averaged
+    samples = struct.unpack(f'<{len(frames) // 2}h', frames)
+    assert {abs(sample - 2000) <= 1 for sample in samples} == {True}
+
+
+def test_read_converted(tmp_path):
+    wav_file = tmp_path / 'podcast.wav'
+    _write_wave(wav_file, 44100)
+    ranges = audio.cut_ranges(1000, 22050, 334)
+
+    converted = audio.convert_wav(wav_file, tmp_path / 'converted.wav',
+                                  22050, mono=True)
+    expected = [segment.raw_data
+                for segment in audio.read_wav(converted, ranges)]
+    # the same cuts without writing the converted wave
+    cuts = list(audio.read_converted(wav_file, ranges, 22050, mono=True))
+    assert [cut.raw_data for cut in cuts] == expected
+    assert {(cut.frame_rate, cut.channels) for cut in cuts} == {(22050, 1)}
+
+
+def test_convert_wav_stopband(tmp_path):
+    wav_file = tmp_path / 'tone.wav'
+    # 15kHz is above the 11025Hz Nyquist of 22050Hz
+    tone = [int(16000 * math.sin(2 * math.pi * 15000 * frame / 44100))
+            for frame in range(44100)]
+    with wave.open(str(wav_file), 'wb') as wave_file:
+        wave_file.setnchannels(1)
+        wave_file.setsampwidth(2)
+        wave_file.setframerate(44100)
+        wave_file.writeframes(struct.pack(f'<{len(tone)}h', *tone))
+
+    converted = audio.convert_wav(wav_file, tmp_path / 'converted.wav', 22050)
+    with wave.open(str(converted), 'rb') as reader:
+        frames = reader.readframes(reader.getnframes())
+    samples = struct.unpack(f'<{len(frames) // 2}h', frames)
+    # skip the filter ramp at the edges
+    steady = samples[1000:-1000]
+    rms = math.sqrt(sum(sample ** 2 for sample in steady) / len(steady))
+    # the tone would alias to 7050Hz, it must be filtered out instead
+    assert rms < 16000 / math.sqrt(2) / 100
+
+
+def test_scale_ranges():
+    ranges = audio.cut_ranges(1000, 44100, 334)
+    scaled = audio.scale_ranges(ranges, 44100, 22050)
+    assert scaled[0] == (0, ranges[0][1] // 2)
+    assert scaled[-1][1] == 22050
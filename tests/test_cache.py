@@ -0,0 +1,93 @@
+import os
+
+import pydub
+import pydub.generators
+import pytest
+
+from src.podcasttool import cache, util
+
+
+@pytest.fixture
+def audio_dir(tmp_path, monkeypatch):
+    # patch the modules the cache imports, not the ``src.`` copies
+    library, clip_store = cache.library, cache.clip_store
+    monkeypatch.setattr(library, 'library_dir', lambda: str(tmp_path))
+    monkeypatch.setattr(library, '_INDEX', None)
+    cache_path = tmp_path / '.pcm_cache'
+    cache_path.mkdir()
+    monkeypatch.setattr(cache, 'cache_dir', lambda: str(cache_path))
+    store_path = tmp_path / '.mp3_cache'
+    store_path.mkdir()
+    monkeypatch.setattr(clip_store, 'store_dir', lambda: str(store_path))
+    return tmp_path
+
+
+def _export(path, ms_time=500, frequency=440):
+    pydub.generators.Sine(frequency, sample_rate=22050).to_audio_segment(
+        ms_time).export(str(path), format='mp3')
+
+
+def _decodes(monkeypatch):
+    decoded = []
+    from_file = pydub.AudioSegment.from_file
+
+    def count_decodes(file, *args, **kwargs):
+        decoded.append(os.path.basename(file))
+        return from_file(file, *args, **kwargs)
+
+    monkeypatch.setattr(pydub.AudioSegment, 'from_file', count_decodes)
+    return decoded
+
+
+def test_cache_entry_key(audio_dir, monkeypatch):
+    clip = audio_dir / 'Intro.mp3'
+    _export(clip)
+    decoded = _decodes(monkeypatch)
+
+    entry, channels = cache.pcm_entry(str(clip), 22050)
+    file_hash = util.file_hash(str(clip))
+    assert os.path.basename(entry) == f'{file_hash}_22050_1.pcm'
+    assert channels == 1
+    assert cache.pcm_entry(str(clip), '22050') == (entry, channels)
+    assert decoded == ['Intro.mp3']
+
+    # every sample rate has its own entry
+    other_entry, _ = cache.pcm_entry(str(clip), 44100)
+    assert other_entry != entry
+    assert other_entry.endswith('_44100_1.pcm')
+    assert len(decoded) == 2
+
+    segment = cache.audio_segment(str(clip), 44100)
+    assert segment.frame_rate == 44100
+    with open(other_entry, 'rb') as pcm_file:
+        assert bytes(segment.raw_data) == pcm_file.read()
+    assert len(decoded) == 2
+
+
+def test_cache_regenerated_on_change(audio_dir, monkeypatch):
+    clip = audio_dir / 'Intro.mp3'
+    _export(clip)
+    old_entry, _ = cache.pcm_entry(str(clip), 22050)
+
+    _export(clip, ms_time=800, frequency=880)
+    os.utime(clip, ns=(0, os.stat(clip).st_mtime_ns + 10 ** 9))
+    decoded = _decodes(monkeypatch)
+    new_entry, _ = cache.pcm_entry(str(clip), 22050)
+
+    assert decoded == ['Intro.mp3']
+    assert new_entry != old_entry
+    assert abs(len(cache.audio_segment(str(clip), 22050)) - 800) < 100
+
+
+def test_cache_prune(audio_dir):
+    kept, removed = audio_dir / 'Intro.mp3', audio_dir / 'Old.mp3'
+    _export(kept)
+    _export(removed, frequency=880)
+    kept_entry, _ = cache.pcm_entry(str(kept), 22050)
+    removed_entry, _ = cache.pcm_entry(str(removed), 22050)
+
+    os.remove(removed)
+    cache.prune()
+
+    assert os.path.exists(kept_entry)
+    assert not os.path.exists(removed_entry)
@@ -0,0 +1,148 @@
+import io
+import os
+import pathlib
+import subprocess
+
+import pytest
+from tinytag import TinyTag
+
+from src.podcasttool import PodcastFile, encoder
+
+dir_file = os.path.dirname(__file__)
+test_file = ''.join([str(i) for i in pathlib.Path(dir_file).glob('*wav')])
+
+
+def test_render_command():
+    command = encoder.render_command(
+        test_file, [(0, 100), 'intro.mp3', (100, 200), 'watermark.mp3'],
+        'out.mp3', bitrate='32k', sample_rate='16000', clip_channels=2,
+        tags={'album': 'course'})
+
+    assert command[0] == 'ffmpeg'
+    assert command.count('-i') == 4
+    assert command[command.index('-filter_complex') + 1].endswith(
+        '[a0][a1][a2][a3]concat=n=4:v=0:a=1[out]')
+    assert 'channel_layouts=stereo' in command[
+        command.index('-filter_complex') + 1]
+    assert command[command.index('-b:a') + 1] == '32k'
+    assert command[command.index('-ar') + 1] == '16000'
+    assert 'album=course' in command
+    assert command[-1] == 'out.mp3'
+
+
+def _render(raw_podcast, render, monkeypatch):
+    spawns = []
+    popen = subprocess.Popen.__init__
+
+    def count_spawns(self, *args, **kwargs):
+        spawns.append(args[0])
+        popen(self, *args, **kwargs)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(subprocess.Popen, '__init__', count_spawns)
+        podcast = PodcastFile(raw_podcast)
+        podcast.generate_podcast(num_cuts=2, in_memory=False, render=render)
+    return podcast.html_page["parts"]["Parte 1"]["path"], spawns
+
+
+def test_render_single_process(raw_podcast, monkeypatch):
+    ffmpeg_mp3, spawns = _render(raw_podcast('ffmpeg'), 'ffmpeg', monkeypatch)
+    pydub_mp3, _ = _render(raw_podcast('pydub'), 'pydub', monkeypatch)
+
+    assert len(spawns) == 1
+    assert not [name for name in os.listdir(os.path.dirname(ffmpeg_mp3))
+                if name.endswith('.tmp')]
+
+    rendered, merged = TinyTag.get(ffmpeg_mp3), TinyTag.get(pydub_mp3)
+    assert abs(rendered.duration - merged.duration) < 0.1
+    assert rendered.samplerate == merged.samplerate
+    assert rendered.channels == merged.channels
+    assert rendered.artist == merged.artist
+
+
+def test_render_splice(raw_podcast, monkeypatch):
+    splice_mp3, _ = _render(raw_podcast('splice'), 'splice', monkeypatch)
+    # the clips are encoded only the first time
+    _, spawns = _render(raw_podcast('splice/again'), 'splice', monkeypatch)
+    pydub_mp3, _ = _render(raw_podcast('pydub'), 'pydub', monkeypatch)
+
+    assert len(spawns) == 1
+    spliced, merged = TinyTag.get(splice_mp3), TinyTag.get(pydub_mp3)
+    # every join adds the encoder delay of its piece
+    assert 0 <= spliced.duration - merged.duration < 2
+    assert spliced.samplerate == merged.samplerate
+    assert spliced.artist == merged.artist
+
+
+def _tone_chunks(seconds, frame_rate=8000):
+    for second in range(seconds):
+        yield bytes(range(250)) * (frame_rate * 2 // 250)
+
+
+def test_encode_stream(tmp_path):
+    upload = io.BytesIO()
+    encoder.encode_stream(_tone_chunks(3), upload, 8000, 1,
+                          tags={'artist': 'teacher'})
+    mp3_file = tmp_path / 'stream.mp3'
+    mp3_file.write_bytes(upload.getvalue())
+
+    tag = TinyTag.get(str(mp3_file))
+    # plus the encoder delay and padding, there is no xing header
+    assert 0 <= tag.duration - 3 < 0.25
+    assert tag.artist == 'teacher'
+
+
+def test_encode_stream_error(tmp_path):
+    def broken_chunks():
+        yield from _tone_chunks(1)
+        raise OSError('cannot read the audio')
+
+    output = tmp_path / 'broken.mp3'
+    with pytest.raises(OSError):
+        encoder.encode_stream(broken_chunks(), str(output), 8000, 1)
+    assert not list(tmp_path.iterdir())
+
+    # the tmp file was never created: the original error is raised
+    missing = tmp_path / 'missing' / 'broken.mp3'
+    with pytest.raises(FileNotFoundError) as error:
+        encoder.encode_stream(_tone_chunks(1), str(missing), 8000, 1)
+    assert error.value.__context__ is None
+
+
+def test_render_renditions(raw_podcast, monkeypatch):
+    raw_podcast = raw_podcast()
+    encoders = []
+    popen = subprocess.Popen.__init__
+
+    def count_encoders(self, *args, **kwargs):
+        if 'pipe:0' in args[0]:
+            encoders.append(args[0])
+        popen(self, *args, **kwargs)
+
+    monkeypatch.setattr(subprocess.Popen, '__init__', count_encoders)
+    podcast = PodcastFile(raw_podcast)
+    podcast.generate_podcast(num_cuts=2, render='numpy',
+                             renditions=[('32k', '16000'), ('96k', '44100')])
+
+    assert len(encoders) == 1
+    parts = list(podcast.files_to_upload())
+    assert len(parts) == 3
+    assert len({part['link'] for part in parts}) == 3
+
+    rendition = podcast.html_page['parts']['Parte 1 96k 44100Hz']
+    assert rendition['path'].endswith('_96k_44100.mp3')
+    assert rendition['link'].endswith(os.path.basename(rendition['path']))
+    tags = [TinyTag.get(part['path']) for part in parts]
+    assert sorted(tag.samplerate for tag in tags) == [16000, 22050, 44100]
+    assert len({round(tag.duration) for tag in tags}) == 1
+
+    # all the renditions are reused the next time
+    podcast = PodcastFile(raw_podcast)
+    podcast.generate_podcast(num_cuts=2, render='numpy',
+                             renditions=[('32k', '16000'), ('96k', '44100')])
+    assert len(encoders) == 1
+    assert len(list(podcast.files_to_upload())) == 3
+
+    with pytest.raises(ValueError):
+        podcast.generate_podcast(num_cuts=2, render='ffmpeg',
+                                 renditions=[('32k', '16000')])
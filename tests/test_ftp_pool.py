@@ -0,0 +1,60 @@
+import io
+import ftplib
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.podcasttool.ftp_pool import FtpPool
+from tests.ftp_server import FtpStandIn
+
+
+@pytest.fixture
+def server(tmp_path):
+    with FtpStandIn(tmp_path) as ftp_server:
+        yield ftp_server
+
+
+def test_pool_reuse_connections(server, tmp_path):
+    pool = FtpPool('127.0.0.1', 'user', 'password', port=server.port, size=2)
+
+    def upload(number):
+        with pool.connection() as ftp:
+            ftp.storbinary(f'STOR part_{number}.mp3', io.BytesIO(b'podcast'))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(upload, range(20)))
+    pool.close()
+
+    assert server.logins <= 2
+    assert len(list(tmp_path.glob('*.mp3'))) == 20
+
+
+def test_pool_restore_login_directory(server, tmp_path):
+    (tmp_path / 'podcast').mkdir()
+    pool = FtpPool('127.0.0.1', 'user', 'password', port=server.port, size=1)
+
+    with pool.connection() as ftp:
+        ftp.cwd('podcast')
+    with pool.connection() as ftp:
+        assert ftp.pwd() == '/'
+    pool.close()
+
+
+def test_pool_drop_dead_connection(server):
+    pool = FtpPool('127.0.0.1', 'user', 'password', port=server.port,
+                   size=1, keep_alive=0)
+
+    with pool.connection() as ftp:
+        dead_connection = ftp
+    dead_connection.sock.shutdown(socket.SHUT_RDWR)
+
+    with pool.connection() as ftp:
+        assert ftp is not dead_connection
+        assert ftp.voidcmd('NOOP').startswith('200')
+    assert server.logins == 2
+
+    with pytest.raises(ftplib.error_perm):
+        with pool.connection() as ftp:
+            ftp.cwd('missing')
+    pool.close()
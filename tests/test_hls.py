@@ -0,0 +1,122 @@
+import os
+import pathlib
+import threading
+import functools
+import urllib.request
+
+from urllib.parse import urljoin
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from tinytag import TinyTag
+
+from src.podcasttool import PodcastFile, encoder, podcasttools
+
+dir_file = os.path.dirname(__file__)
+test_file = ''.join([str(i) for i in pathlib.Path(dir_file).glob('*wav')])
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def static_server():
+    servers = []
+
+    def serve(directory):
+        handler = functools.partial(QuietHandler, directory=directory)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}/'
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _generate(raw_podcast, **options):
+    podcast = PodcastFile(raw_podcast)
+    podcast.generate_podcast(num_cuts=2, **options)
+    return podcast.html_page["parts"]["Parte 1"]
+
+
+def test_hls_playlist(raw_podcast, static_server):
+    part = _generate(raw_podcast('hls'), hls=True)
+    mp3_part = _generate(raw_podcast('mp3'))
+
+    assert part['link'].endswith(encoder.PLAYLIST_EXTENSION)
+    assert part['path'].endswith(encoder.PLAYLIST_EXTENSION)
+    assert len(part['segments']) > 1
+    assert not [name for name in os.listdir(os.path.dirname(part['path']))
+                if name.endswith('.tmp')]
+
+    base_url = static_server(os.path.dirname(part['path']))
+    playlist_url = urljoin(base_url, os.path.basename(part['path']))
+    with urllib.request.urlopen(playlist_url) as response:
+        playlist = response.read().decode().splitlines()
+
+    assert playlist[0] == '#EXTM3U'
+    assert playlist[-1] == '#EXT-X-ENDLIST'
+    durations = [float(line.split(':')[1].rstrip(','))
+                 for line in playlist if line.startswith('#EXTINF')]
+    segments = [line for line in playlist if not line.startswith('#')]
+    assert len(segments) == len(part['segments'])
+    assert max(durations) <= encoder.SEGMENT_SECONDS + 1
+
+    for segment, segment_file in zip(segments, part['segments']):
+        segment_url = urljoin(playlist_url, segment)
+        with urllib.request.urlopen(segment_url) as response:
+            data = response.read()
+        # mpeg-ts packets
+        assert data[0] == 0x47 and len(data) % 188 == 0
+        assert data == pathlib.Path(segment_file).read_bytes()
+
+    assert abs(sum(durations) - TinyTag.get(mp3_part['path']).duration) < 0.5
+
+
+def test_hls_html_page(tmp_path, monkeypatch):
+    html_pages = PodcastFile.plan_html([test_file], num_cuts=2, hls=True,
+                                       renditions=[('128k', '44100')])
+    parts = list(html_pages.values())[0]['parts']
+    assert len(parts) == 2
+    assert all(part['link'].endswith(encoder.PLAYLIST_EXTENSION)
+               for part in parts.values())
+    assert all(part['segment_count'] >= 1 for part in parts.values())
+
+    monkeypatch.setattr(podcasttools.util, 'get_path', lambda name: tmp_path)
+    monkeypatch.setenv('FONDERIE_HLS_PLUGIN', '/js/hls.min.js')
+    monkeypatch.setenv('FONDERIE_HLS_PLUGIN_SRI', 'sha384-hash')
+    podcasttools.generate_html(list(html_pages.values())[0])
+    page = next(tmp_path.glob('*.html')).read_text()
+    # hls.js plays the playlists outside of Safari
+    assert page.count('class="virgil_hls"') == 2
+    assert ('<script src="/js/hls.min.js" integrity="sha384-hash" '
+            'crossorigin="anonymous">') in page
+    assert 'hls.attachMedia(audio)' in page
+
+
+def test_segment_files(tmp_path):
+    for name in ('part_1000.ts', 'part_000.ts', 'part_999.ts',
+                 'part_1_000.ts', 'part_1.m3u8', 'part.m3u8'):
+        (tmp_path / name).touch()
+
+    segments = encoder._segment_files(str(tmp_path / 'part.m3u8'))
+    assert [os.path.basename(segment) for segment in segments] == [
+        'part_000.ts', 'part_999.ts', 'part_1000.ts']
+    assert encoder.segment_count(10_001) == 2
+
+
+def test_upload_segments_first(tmp_path, monkeypatch):
+    uploaded = []
+
+    def upload_to_server(uploading_file, server_path, **kwargs):
+        uploaded.append(os.path.basename(uploading_file))
+
+    monkeypatch.setattr(podcasttools, 'upload_to_server', upload_to_server)
+    podcasttools._upload_part('part.m3u8', '/', None, False, None,
+                              segments=['part_000.ts', 'part_001.ts'])
+    assert uploaded == ['part_000.ts', 'part_001.ts', 'part.m3u8']
@@ -0,0 +1,87 @@
+import os
+import time
+
+import pytest
+
+from src.podcasttool import jobs
+from src.podcasttool.ftp_pool import FtpPool
+from tests.ftp_server import FtpStandIn
+
+# the module used by the runner
+podcasttools = jobs.podcasttools
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    root = tmp_path / 'server'
+    root.mkdir()
+    monkeypatch.setattr(podcasttools.util, 'DEV_MODE', None)
+    with FtpStandIn(root) as server:
+        ftp_pool = FtpPool('127.0.0.1', 'user', 'password', port=server.port)
+        monkeypatch.setattr(podcasttools.ftp_pool, 'default_pool',
+                            lambda: ftp_pool)
+        ftp_pool.root = server.root
+        yield ftp_pool
+        ftp_pool.close()
+
+
+def _fake_generate(monkeypatch, part):
+    def generate_many(paths, workers=None, on_part=None, cancel=None,
+                      **options):
+        on_part({'parts': {part.name: {'path': str(part),
+                                       'server_path': 'course'}}})
+        return {'lesson': {}}
+
+    monkeypatch.setattr(podcasttools.PodcastFile, 'generate_many',
+                        generate_many)
+
+
+def _events_until_end(runner):
+    events = []
+    deadline = time.monotonic() + 10
+    while not events or events[-1].kind not in jobs.FINAL_EVENTS:
+        assert time.monotonic() < deadline
+        events.extend(runner.poll())
+        time.sleep(0.01)
+    return events
+
+
+def test_job_runner_events(pool, tmp_path, monkeypatch):
+    part = tmp_path / 'Lezione_1_Parte_1.mp3'
+    part.write_bytes(os.urandom(256 * 1024))
+    _fake_generate(monkeypatch, part)
+
+    runner = jobs.JobRunner()
+    runner.start([str(part)], {'course': '/'})
+    events = _events_until_end(runner)
+    runner.join()
+
+    kinds = [event.kind for event in events]
+    assert kinds[0] == 'encoded'
+    assert kinds[-2:] == ['uploaded', 'done']
+    assert all(kind == 'progress' for kind in kinds[1:-2])
+    assert events[-3].data.percent == 100
+    assert events[-1].data == {'lesson': {}}
+    assert not runner.running
+
+
+def test_job_runner_cancel(pool, tmp_path, monkeypatch):
+    part = tmp_path / 'Lezione_1_Parte_1.mp3'
+    part.write_bytes(os.urandom(8 * 1024 * 1024))
+    _fake_generate(monkeypatch, part)
+
+    class CancelOnUpload(jobs.JobRunner):
+        def _progress(self, tracker):
+            super()._progress(tracker)
+            self.cancel()
+
+    runner = CancelOnUpload()
+    runner.start([str(part)], {'course': '/'})
+    events = _events_until_end(runner)
+    runner.join()
+
+    assert runner.cancelled
+    assert events[-1].kind == 'cancelled'
+    assert 'uploaded' not in [event.kind for event in events]
+    uploaded = os.path.join(pool.root, part.name)
+    assert os.path.getsize(uploaded) < part.stat().st_size
@@ -0,0 +1,30 @@
+from src.podcasttool.journal import Journal
+
+
+def test_journal_resume(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path)
+    journal.record('Lezione_1_Parte_1.mp3', 'parsed')
+    journal.record('Lezione_1_Parte_1.mp3', 'encoded')
+    journal.record('Lezione_1_Parte_2.mp3', 'parsed')
+    journal.record('Lezione_1_Parte_2.mp3', 'uploaded')
+
+    # a line broken by a crash
+    with open(path, 'a') as journal_file:
+        journal_file.write('{"part": "Lezione_1_Par')
+
+    resumed = Journal(path, resume=True)
+    assert resumed.done('Lezione_1_Parte_1.mp3', 'encoded')
+    assert not resumed.done('Lezione_1_Parte_1.mp3', 'uploaded')
+    assert resumed.done('Lezione_1_Parte_2.mp3', 'uploaded')
+    assert resumed.unfinished()
+
+    # the next line is not glued to the broken one
+    resumed.record('Lezione_1_Parte_1.mp3', 'uploaded')
+    resumed = Journal(path, resume=True)
+    assert resumed.done('Lezione_1_Parte_1.mp3', 'uploaded')
+    assert resumed.done('Lezione_1_Parte_2.mp3', 'uploaded')
+
+    new_run = Journal(path)
+    assert not new_run.done('Lezione_1_Parte_2.mp3', 'uploaded')
+    assert not path.exists()
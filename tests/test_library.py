@@ -0,0 +1,52 @@
+import os
+
+import pydub
+import pytest
+
+from src.podcasttool import library
+
+
+@pytest.fixture
+def audio_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(library, 'library_dir', lambda: str(tmp_path))
+    monkeypatch.setattr(library, '_INDEX', None)
+    (tmp_path / 'corsi').mkdir()
+    _export(tmp_path / 'corsi' / 'Corso_Uno.mp3')
+    return tmp_path
+
+
+def _export(path, ms_time=500):
+    pydub.AudioSegment.silent(ms_time, frame_rate=22050).export(
+        str(path), format='mp3')
+
+
+def test_library_index(audio_dir):
+    entry = library.index()['Corso_Uno.mp3']
+    assert entry['path'] == 'corsi'
+    assert entry['sample_rate'] == 22050
+    assert entry['channels'] == 1
+    assert abs(entry['duration'] - 500) < 100
+    assert library.find('Corso_Uno.mp3') == str(
+        audio_dir / 'corsi' / 'Corso_Uno.mp3')
+
+
+def test_library_incremental(audio_dir, monkeypatch):
+    library.refresh()
+
+    scanned = []
+    scan_file = library._scan_file
+    monkeypatch.setattr(library, '_scan_file',
+                        lambda path, stat: scanned.append(path)
+                        or scan_file(path, stat))
+    monkeypatch.setattr(library, '_INDEX', None)
+    library.refresh()
+    assert scanned == []
+
+    (audio_dir / 'new_audio').mkdir()
+    _export(audio_dir / 'new_audio' / 'Nuovo.mp3')
+    library.refresh()
+    assert scanned == [str(audio_dir / 'new_audio' / 'Nuovo.mp3')]
+
+    os.remove(audio_dir / 'corsi' / 'Corso_Uno.mp3')
+    library.refresh()
+    assert set(library.index()) == {'Nuovo.mp3'}
@@ -3,8 +3,13 @@ import sys
 import json
 import regex
 import pathlib
+import threading
 
-from src.podcasttool import PodcastFile
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from src.podcasttool import PodcastFile, LessonPage, podcasttools
 
 dir_file = os.path.dirname(__file__)
 file_path = ''.join([str(i) for i in pathlib.Path(dir_file).glob('*wav')])
@@ -65,5 +70,124 @@ def test_part_number():
     assert isinstance(file.part_number, str)
 
 
+def test_html_page_per_instance():
+    other_file = PodcastFile(test_file.replace('Parte_1', 'Parte_2'))
+    other_file.add_html_parts({"duration": "1h"})
+    assert file.html_page is not other_file.html_page
+    assert "Parte 2" not in file.html_page["parts"]
+
+
+def test_lesson_page():
+    lesson = LessonPage()
+
+    def add_part(number):
+        lesson.add_part({"archive_name": "SEC6_Lezione_4", "lesson": "N.4",
+                         "parts": {f"Parte {number}": {"duration": "1h"}}})
+
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(add_part, range(1, 51)))
+
+    html_page = lesson.html_page
+    assert html_page["archive_name"] == "SEC6_Lezione_4"
+    assert len(html_page["parts"]) == 50
+    assert len(list(lesson.files_to_upload())) == 50
+
+
+def test_plan_html():
+    html_pages = PodcastFile.plan_html([test_file], num_cuts=2)
+    assert len(html_pages) == 1
+
+    html_page = list(html_pages.values())[0]
+    part = html_page["parts"]["Parte 1"]
+    assert regex.match(r'\d+h \d\dm \d\ds$', part["duration"])
+    assert part["link"].endswith('.mp3')
+    assert "path" not in part
+
+
+def test_plan_summary():
+    summary = PodcastFile(test_file).plan_summary('64k', num_cuts=3)
+    assert summary["cuts"] == 3
+    assert summary["offsets"][0] == 0
+    assert summary["offsets"] == sorted(summary["offsets"])
+    assert summary["intro"].count("podcast_segment") == 3
+    assert summary["hash_name"].endswith('.mp3')
+    assert summary["size"] > 0
+
+
+def test_plan_corrected_name():
+    corrected = os.path.basename(test_file).replace('Parte_1', 'Parte_2')
+    summary = PodcastFile(test_file, file_name=corrected).plan_summary(
+        num_cuts=2)
+    assert summary["name"] == os.path.splitext(corrected)[0]
+    assert summary["hash_name"].startswith('Lezione_4_Parte_2_')
+    assert summary["cuts"] == 2
+
+
+def test_reuse_generated_part(raw_podcast, monkeypatch):
+    raw_podcast = raw_podcast()
+    podcast = PodcastFile(raw_podcast)
+    podcast.generate_podcast(num_cuts=2, in_memory=True)
+    mp3_file = podcast.html_page["parts"]["Parte 1"]["path"]
+
+    def stream_segments(segments, *audio_format):
+        raise AssertionError("the part should not be generated again")
+
+    monkeypatch.setattr(podcasttools.audio, 'stream_segments',
+                        stream_segments)
+    podcast = PodcastFile(raw_podcast)
+    podcast.generate_podcast(num_cuts=2, in_memory=True)
+    assert podcast.html_page["parts"]["Parte 1"]["path"] == mp3_file
+
+    with pytest.raises(AssertionError):
+        PodcastFile(raw_podcast).generate_podcast(num_cuts=3, in_memory=True)
+
+
+def test_in_memory_same_as_tmp_folder(raw_podcast, monkeypatch):
+    def no_tmp_dir(podcast):
+        raise AssertionError('the in memory pipeline made a tmp folder')
+
+    mp3_files = []
+    for in_memory in (True, False):
+        podcast = PodcastFile(raw_podcast(str(in_memory)))
+        with monkeypatch.context() as patch:
+            if in_memory:
+                patch.setattr(PodcastFile, '_mkdir_tmp', no_tmp_dir)
+            podcast.generate_podcast(num_cuts=2, in_memory=in_memory)
+        mp3_files.append(podcast.html_page["parts"]["Parte 1"]["path"])
+        assert not [name for name in os.listdir(podcast.directory)
+                    if name.startswith('.tmp_')]
+
+    in_memory_mp3, tmp_folder_mp3 = (pathlib.Path(mp3_file).read_bytes()
+                                     for mp3_file in mp3_files)
+    assert in_memory_mp3 == tmp_folder_mp3
+
+
+def test_generate_many_pool(raw_podcast):
+    raw_podcasts = [
+        raw_podcast(name=os.path.basename(test_file).replace(
+            'Lezione_4_Parte_1', name))
+        for name in ('Lezione_4_Parte_1', 'Lezione_4_Parte_2',
+                     'Lezione_5_Parte_1')]
+
+    parts = []
+    html_pages = PodcastFile.generate_many(
+        raw_podcasts, workers=2, on_part=parts.append, num_cuts=2)
+
+    assert len(parts) == 3
+    assert len(html_pages) == 2
+    lesson = [page for page in html_pages.values() if page["lesson"] == "N.4"]
+    assert sorted(lesson[0]["parts"]) == ["Parte 1", "Parte 2"]
+    assert all(os.path.exists(part["path"])
+               for page in html_pages.values()
+               for part in page["parts"].values())
+
+    # the third part waits for a free worker, so it is always dropped
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(podcasttools.RunCancelled):
+        PodcastFile.generate_many(raw_podcasts, workers=2, cancel=cancel,
+                                  num_cuts=3)
+
+
 if __name__ == '__main__':
     test_podcast_nome_docente()
@@ -0,0 +1,62 @@
+import os
+import wave
+import pathlib
+import subprocess
+
+import pytest
+from tinytag import TinyTag
+
+from src.podcasttool import encoder, mp3
+
+dir_file = os.path.dirname(__file__)
+test_file = ''.join([str(i) for i in pathlib.Path(dir_file).glob('*wav')])
+
+
+@pytest.fixture
+def cuts(tmp_path):
+    with wave.open(test_file, 'rb') as wave_file:
+        second = wave_file.getframerate()
+    outputs = [str(tmp_path / f'{index}.mp3') for index in range(2)]
+    return encoder.encode_cuts(test_file, [(0, second), (second, 2 * second)],
+                               outputs, bitrate='32k', sample_rate='22050',
+                               channels=1)
+
+
+def test_frames(cuts):
+    data = open(cuts[0], 'rb').read()
+    assert data[:3] != b'ID3'
+
+    frames = list(mp3.frames(data))
+    assert frames[0][0] == 0
+    assert {frame[2:] for frame in frames} == {(22050, 1)}
+    assert sum(frame[1] for frame in frames) == len(data)
+
+    tagged = mp3.id3_tag({'album': 'course'}) + data
+    assert list(mp3.frames(tagged))[0][0] == len(tagged) - len(data)
+
+
+def test_concatenate(cuts, tmp_path):
+    output = str(tmp_path / 'joined.mp3')
+    count = mp3.concatenate(cuts, output, tags={'album': 'course',
+                                                'artist': 'teacher'})
+
+    assert count == sum(len(list(mp3.frames(open(cut, 'rb').read())))
+                        for cut in cuts)
+    tag = TinyTag.get(output)
+    assert tag.album == 'course'
+    assert tag.artist == 'teacher'
+    # each cut is one second, plus the encoder delay and padding
+    assert 2 <= tag.duration < 2.3
+    subprocess.run(['ffmpeg', '-v', 'error', '-i', output, '-f', 'null', '-'],
+                   check=True)
+
+
+def test_concatenate_different_format(cuts, tmp_path):
+    stereo = str(tmp_path / 'stereo.mp3')
+    encoder.encode_cuts(test_file, [(0, 1000)], [stereo], bitrate='32k',
+                        sample_rate='22050', channels=2)
+    output = str(tmp_path / 'joined.mp3')
+
+    with pytest.raises(ValueError):
+        mp3.concatenate([cuts[0], stereo], output)
+    assert not os.path.exists(output)
@@ -0,0 +1,114 @@
+import wave
+
+import pydub
+import pytest
+
+from src.podcasttool import PodcastFile, audio, encoder
+
+numpy = pytest.importorskip('numpy')
+
+from src.podcasttool import pcm  # noqa: E402
+
+
+def _write_wave(path, seconds, frame_rate, channels, sample_width):
+    random = numpy.random.default_rng(sample_width)
+    data = random.integers(0, 256, seconds * frame_rate * channels
+                           * sample_width, dtype=numpy.uint8).tobytes()
+    with wave.open(str(path), 'wb') as wave_file:
+        wave_file.setnchannels(channels)
+        wave_file.setsampwidth(sample_width)
+        wave_file.setframerate(frame_rate)
+        wave_file.writeframes(data)
+    return path
+
+
+def test_stream_like_pydub(tmp_path):
+    waves = [_write_wave(tmp_path / '8bit.wav', 1, 8000, 1, 1),
+             _write_wave(tmp_path / '16bit.wav', 1, 11025, 2, 2),
+             _write_wave(tmp_path / '24bit.wav', 1, 8000, 2, 3),
+             _write_wave(tmp_path / '32bit.wav', 1, 8000, 1, 4)]
+    ranges = [(100, 3000), (0, 5000)]
+
+    segments, pieces = [], []
+    for wav_file in waves:
+        segments += audio.read_wav(wav_file, ranges)
+        pieces += [pcm.read_wav(wav_file)[start:end]
+                   for start, end in ranges]
+
+    audio_format = audio.common_format(segments)
+    assert audio_format == (2, 11025, 4)
+    merged = audio.stream_segments(segments, *audio_format)
+    assembled = pcm.stream_pieces(pieces, *audio_format)
+
+    assert b''.join(assembled) == b''.join(merged)
+
+
+def test_conversions_like_pydub(tmp_path):
+    wav_file = _write_wave(tmp_path / 'stereo.wav', 1, 8000, 2, 2)
+    segment = next(audio.read_wav(wav_file, [(0, 8000)]))
+    samples = pcm.read_wav(wav_file)
+
+    assert (bytes(samples.set_channels(1).raw_data)
+            == segment.set_channels(1).raw_data)
+    assert (bytes(samples.set_channels(1).set_channels(2).raw_data)
+            == segment.set_channels(1).set_channels(2).raw_data)
+    for volume in (-6, 3.5, 20):
+        assert (bytes(samples.apply_gain(volume).raw_data)
+                == segment.apply_gain(volume).raw_data)
+
+
+def test_slices_are_views(tmp_path):
+    wav_file = _write_wave(tmp_path / 'podcast.wav', 1, 8000, 2, 2)
+    samples = pcm.read_wav(wav_file)
+    cut = samples[1000:2000]
+
+    assert isinstance(samples.samples, numpy.memmap)
+    assert numpy.shares_memory(cut.samples, samples.samples)
+    assert cut.frame_count == 1000
+
+
+def test_from_cache(tmp_path):
+    entry = tmp_path / 'entry.pcm'
+    entry.write_bytes(bytes(range(256)) * 4)
+    segment = pydub.AudioSegment(data=entry.read_bytes(), sample_width=2,
+                                 frame_rate=8000, channels=2)
+
+    clip = pcm.from_cache(str(entry), 8000, 2)
+    assert clip.frame_count == 256
+    assert bytes(clip.raw_data) == segment.raw_data
+
+    empty = tmp_path / 'empty.pcm'
+    empty.touch()
+    assert pcm.from_cache(str(empty), 8000, 1).frame_count == 0
+
+
+def test_encode_pcm(tmp_path):
+    output = tmp_path / 'tone.mp3'
+    tone = (numpy.sin(numpy.arange(8000) / 5) * 8000).astype('<i2')
+    encoder.encode_pcm(tone.tobytes(), str(output), 8000, 1,
+                       tags={'artist': 'teacher'})
+
+    assert output.exists()
+    assert not list(tmp_path.glob('*.tmp'))
+    with pytest.raises(encoder.EncodeError):
+        encoder.encode_pcm(tone.tobytes(), str(tmp_path / 'bad.mp3'), 8000,
+                           1, bitrate='not a bitrate')
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def _generate(raw_podcast, render, in_memory=True):
+    podcast = PodcastFile(raw_podcast)
+    podcast.generate_podcast(num_cuts=2, in_memory=in_memory, render=render)
+    return podcast.html_page["parts"]["Parte 1"]["path"]
+
+
+def test_render_numpy(raw_podcast):
+    numpy_mp3 = _generate(raw_podcast('numpy'), 'numpy')
+    mapped_mp3 = _generate(raw_podcast('mapped'), 'numpy', in_memory=False)
+    pydub_mp3 = _generate(raw_podcast('pydub'), 'pydub')
+
+    # the same samples go into the same encoder
+    with open(numpy_mp3, 'rb') as assembled, open(pydub_mp3, 'rb') as merged:
+        assert assembled.read() == merged.read()
+    with open(mapped_mp3, 'rb') as mapped, open(pydub_mp3, 'rb') as merged:
+        assert mapped.read() == merged.read()
@@ -0,0 +1,79 @@
+import wave
+
+import pytest
+
+from src.podcasttool import audio, silence
+
+numpy = pytest.importorskip('numpy')
+
+FRAME_RATE = 8000
+
+
+def _write_speech(path, seconds, gaps, sample_width=2):
+    """Write a noisy stereo wave with silent gaps of (start, end) seconds."""
+    random = numpy.random.default_rng(0)
+    samples = random.integers(-8000, 8000, (seconds * FRAME_RATE, 2),
+                              dtype=numpy.int32)
+    for start, end in gaps:
+        samples[int(start * FRAME_RATE):int(end * FRAME_RATE)] = 0
+    # the lowest bytes of each little endian sample
+    data = samples.astype('<i4').view(numpy.uint8).reshape(-1, 4)
+    with wave.open(str(path), 'wb') as wave_file:
+        wave_file.setnchannels(2)
+        wave_file.setsampwidth(sample_width)
+        wave_file.setframerate(FRAME_RATE)
+        wave_file.writeframes(data[:, :sample_width].tobytes())
+
+
+def test_window_rms(tmp_path):
+    wav_file = tmp_path / 'podcast.wav'
+    _write_speech(wav_file, 2, [(1, 2)])
+
+    rms, window = silence.window_rms(wav_file, window_ms=100)
+    assert window == 800
+    assert len(rms) == 20
+    assert rms[:10].min() > 1000
+    assert not rms[10:].any()
+
+
+def test_window_rms_24bit(tmp_path):
+    _write_speech(tmp_path / '16bit.wav', 2, [(1, 2)])
+    _write_speech(tmp_path / '24bit.wav', 2, [(1, 2)], sample_width=3)
+
+    rms, _ = silence.window_rms(tmp_path / '16bit.wav', window_ms=100)
+    rms_24bit, _ = silence.window_rms(tmp_path / '24bit.wav', window_ms=100)
+    # same samples, only in wider frames
+    assert numpy.allclose(rms, rms_24bit)
+    assert not rms_24bit[10:].any()
+
+
+def test_snap_cuts(tmp_path):
+    wav_file = tmp_path / 'podcast.wav'
+    # the planned cuts are at 10s and 20s, the first near a pause
+    _write_speech(wav_file, 30, [(11.5, 12), (25, 26)])
+    ranges = audio.cut_ranges(30_000, FRAME_RATE, 10_000)
+
+    snapped = silence.snap_cuts(wav_file, ranges, tolerance_ms=3000)
+
+    assert len(snapped) == len(ranges)
+    assert snapped[0][0] == 0
+    assert snapped[-1][1] == ranges[-1][1]
+    first_cut = snapped[0][1] / FRAME_RATE
+    assert 11.5 <= first_cut <= 12
+    # no silence within the tolerance of the second cut
+    assert snapped[1][1] == ranges[1][1]
+    for (_, end), (start, _) in zip(snapped, snapped[1:]):
+        assert end == start
+
+
+def test_snap_cuts_keep_order(tmp_path):
+    wav_file = tmp_path / 'podcast.wav'
+    # the only silence is past the second planned cut
+    _write_speech(wav_file, 30, [(24, 24.5)])
+    ranges = audio.cut_ranges(30_000, FRAME_RATE, 10_000)
+
+    snapped = silence.snap_cuts(wav_file, ranges, tolerance_ms=15_000)
+
+    assert all(start < end for start, end in snapped)
+    assert snapped[0] == ranges[0]
+    assert 24 <= snapped[1][1] / FRAME_RATE <= 24.5
@@ -0,0 +1,167 @@
+import os
+import time
+
+import pytest
+
+from src.podcasttool import podcasttools
+from src.podcasttool.ftp_pool import FtpPool
+from src.podcasttool.journal import Journal
+from tests.ftp_server import FtpStandIn
+
+
+@pytest.fixture
+def server(tmp_path):
+    root = tmp_path / 'server'
+    root.mkdir()
+    with FtpStandIn(root) as ftp_server:
+        yield ftp_server
+
+
+@pytest.fixture
+def podcast_file(tmp_path):
+    file_path = tmp_path / 'Lezione_1_Parte_1.mp3'
+    file_path.write_bytes(os.urandom(1024 * 1024))
+    return file_path
+
+
+def test_upload_resume_after_drop(server, podcast_file, monkeypatch):
+    monkeypatch.setattr(podcasttools.util, 'DEV_MODE', None)
+    pool = FtpPool('127.0.0.1', 'user', 'password', port=server.port)
+    server.fail_after = 300 * 1024
+
+    updates = []
+    podcasttools.upload_to_server(str(podcast_file), '/', pool=pool,
+                                  blocksize=8192, progress=updates.append)
+    pool.close()
+
+    uploaded = os.path.join(server.root, podcast_file.name)
+    assert open(uploaded, 'rb').read() == podcast_file.read_bytes()
+    assert server.logins == 2
+    assert updates[-1].percent == 100
+    assert updates[-1].rate > 0
+
+
+def test_upload_resume_partial_file(server, podcast_file, monkeypatch):
+    monkeypatch.setattr(podcasttools.util, 'DEV_MODE', None)
+    pool = FtpPool('127.0.0.1', 'user', 'password', port=server.port)
+    uploaded = os.path.join(server.root, podcast_file.name)
+    with open(uploaded, 'wb') as partial:
+        partial.write(podcast_file.read_bytes()[:1000])
+
+    sent = []
+    podcasttools.upload_to_server(
+        str(podcast_file), '/', pool=pool, resume=True,
+        progress=lambda progress: sent.append(progress.sent))
+    pool.close()
+
+    assert open(uploaded, 'rb').read() == podcast_file.read_bytes()
+    assert sent[0] == 1000 + podcasttools.UPLOAD_BLOCKSIZE
+
+
+def _same_size(uploaded, part):
+    return (os.path.exists(uploaded)
+            and os.path.getsize(uploaded) == part.stat().st_size)
+
+
+def test_upload_while_generating(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(podcasttools.util, 'DEV_MODE', None)
+    pool = FtpPool('127.0.0.1', 'user', 'password', port=server.port)
+    monkeypatch.setattr(podcasttools.ftp_pool, 'default_pool', lambda: pool)
+
+    parts = []
+    for number in (1, 2):
+        part = tmp_path / f'Lezione_1_Parte_{number}.mp3'
+        part.write_bytes(os.urandom(64 * 1024))
+        parts.append(part)
+
+    def generate_many(paths, workers=None, on_part=None, **options):
+        for part in parts:
+            on_part({'parts': {part.name: {'path': str(part),
+                                           'server_path': 'course'}}})
+            # the next part is generated only when the previous is uploaded
+            uploaded = os.path.join(server.root, part.name)
+            deadline = time.monotonic() + 5
+            while not _same_size(uploaded, part):
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+        return {}
+
+    monkeypatch.setattr(podcasttools.PodcastFile, 'generate_many',
+                        generate_many)
+    podcasttools.generate_and_upload([], {'course': '/'})
+    pool.close()
+
+    for part in parts:
+        uploaded = os.path.join(server.root, part.name)
+        assert open(uploaded, 'rb').read() == part.read_bytes()
+
+
+def test_upload_journal(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(podcasttools.util, 'DEV_MODE', None)
+    pool = FtpPool('127.0.0.1', 'user', 'password', port=server.port)
+    monkeypatch.setattr(podcasttools.ftp_pool, 'default_pool', lambda: pool)
+
+    part = tmp_path / 'Lezione_1_Parte_1.mp3'
+    part.write_bytes(os.urandom(64 * 1024))
+
+    generated = []
+
+    def generate_many(paths, workers=None, on_part=None, **options):
+        generated.extend(paths)
+        for _ in paths:
+            on_part({'parts': {part.name: {'path': str(part),
+                                           'server_path': 'course'}}})
+        return {}
+
+    class Podcast:
+        def __init__(self, path):
+            self.hash_name = os.path.basename(path)
+
+        def output_names(self, renditions=(), hls=False):
+            return [self.hash_name]
+
+    monkeypatch.setattr(podcasttools, 'PodcastFile', Podcast)
+    Podcast.generate_many = staticmethod(generate_many)
+
+    journal = Journal(tmp_path / 'journal.jsonl')
+    podcasttools.generate_and_upload([str(part)], {'course': '/'},
+                                     journal=journal)
+    assert journal.done(part.name, 'encoded')
+    assert journal.done(part.name, 'uploaded')
+
+    resumed = Journal(tmp_path / 'journal.jsonl', resume=True)
+    podcasttools.generate_and_upload([str(part)], {'course': '/'},
+                                     journal=resumed)
+    pool.close()
+    assert generated == [str(part)]
+
+
+@pytest.mark.parametrize('options', [
+    {'renditions': [('32k', '16000')]},
+    {'renditions': [('32k', '16000')], 'hls': True}])
+def test_journal_finished(server, raw_podcast, tmp_path, monkeypatch,
+                          options):
+    monkeypatch.setattr(podcasttools.util, 'DEV_MODE', None)
+    pool = FtpPool('127.0.0.1', 'user', 'password', port=server.port)
+    monkeypatch.setattr(podcasttools.ftp_pool, 'default_pool', lambda: pool)
+
+    raw_podcast = raw_podcast()
+
+    journal = Journal(tmp_path / 'journal.jsonl')
+    html_pages = podcasttools.PodcastFile.plan_html([raw_podcast], num_cuts=2,
+                                                    journal=journal, **options)
+    server_paths = {part['server_path']: '/'
+                    for html_page in html_pages.values()
+                    for part in html_page['parts'].values()}
+    # an interrupted upload of any output is noticed
+    names = podcasttools.PodcastFile(raw_podcast).output_names(
+        options.get('renditions') or (), options.get('hls'))
+    journal.record(names[0], 'uploaded')
+    assert journal.unfinished()
+
+    podcasttools.generate_and_upload([raw_podcast], server_paths, workers=1,
+                                     journal=journal, num_cuts=2, **options)
+    pool.close()
+
+    # every output is recorded under the same name in every stage
+    assert not Journal(tmp_path / 'journal.jsonl', resume=True).unfinished()
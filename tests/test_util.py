@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from src.podcasttool import util
+
+
+def test_catalog_store(tmp_path):
+    catalog_file = tmp_path / 'catalog_names.json'
+    catalog_file.write_text(json.dumps({'intro': ['a', 'b']}))
+    store = util.CatalogStore(str(catalog_file))
+
+    assert store.view()['intro'] == ('a', 'b')
+    assert store.view() is store.view()
+    assert (store.hits, store.misses) == (2, 1)
+
+    with pytest.raises(TypeError):
+        store.view()['intro'] = []
+
+    catalog = store.copy()
+    catalog['intro'].append('c')
+    assert store.view()['intro'] == ('a', 'b')
+
+    catalog_file.write_text(json.dumps(catalog))
+    os.utime(catalog_file, ns=(0, 0))
+    assert store.view()['intro'] == ('a', 'b', 'c')
+    assert store.misses == 2
+
+
+def test_import_without_tkinter():
+    src_path = os.path.join(os.path.dirname(__file__), os.pardir, 'src')
+    code = ("import sys; sys.modules['tkinter'] = None; "
+            "import podcasttool, podcasttool.podcasttools")
+    subprocess.run([sys.executable, '-c', code], check=True,
+                   env=dict(os.environ, PYTHONPATH=src_path))
+
+
+def test_parse_rendition():
+    assert util.parse_rendition('128k/44100') == ('128k', '44100')
+    assert util.parse_rendition(' 32k / 22050Hz') == ('32k', '22050')
+    with pytest.raises(ValueError):
+        util.parse_rendition('128k')
+
+
+VM_STAT = b"""Mach Virtual Memory Statistics: (page size of 16384 bytes)
+Pages free:                               10000.
+Pages active:                            500000.
+Pages inactive:                           20000.
+Pages speculative:                         3000.
+Pages wired down:                        100000.
+Pages purgeable:                           1000.
+"""
+
+
+def test_available_memory_macos(monkeypatch):
+    def run(command, **kwargs):
+        assert command == ['vm_stat']
+        return subprocess.CompletedProcess(command, 0, stdout=VM_STAT)
+
+    monkeypatch.setattr(util.sys, 'platform', 'darwin')
+    monkeypatch.setattr(util.subprocess, 'run', run)
+    assert util.available_memory() == (10000 + 20000 + 3000 + 1000) * 16384
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/meminfo'),
+                    reason='needs /proc/meminfo')
+def test_available_memory_linux(monkeypatch):
+    monkeypatch.setattr(util.sys, 'platform', 'linux')
+    with open('/proc/meminfo') as meminfo:
+        fields = dict(line.split(':') for line in meminfo)
+    available = int(fields['MemAvailable'].split()[0]) * 1024
+    # the page cache counts as available
+    assert abs(util.available_memory() - available) < 64 * 1024 * 1024